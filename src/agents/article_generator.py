@@ -1,17 +1,21 @@
 import os
 import sys
 import copy
+import asyncio
+import contextlib
+import json
 import logging
-from typing import List, Dict
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional
 
 import dspy
 
+from ..tools.lm import apredict
 from ..tools.rm import Retriever
 from ..core.agent import BaseAgent
 from ..core.article import Article
 from ..core.callback import BaseCallbackHandler
 from ..core.information import Information, KnowledgeBase
+from ..utils.common import run_coroutine
 from ..utils.text_processing import ArticleTextProcessing
 from ..utils.eval_factuality import run_eval_factuality
 from ..utils.logger import setup_logging, get_logger
@@ -49,6 +53,10 @@ class ArticleGenerationAgent(BaseAgent):
         max_thread_num: int = 7,
         max_revision_iterations: int = 3,
         output_dir: str = "output",
+        examiner_batch_size: int = 8,
+        examiner_accept_threshold: Optional[float] = None,
+        examiner_reject_threshold: Optional[float] = None,
+        parallel_review: bool = True,
     ):
         super().__init__(name="article_generator", role="writer", lm=article_writer_lm)
         self.retriever = retriever
@@ -58,9 +66,14 @@ class ArticleGenerationAgent(BaseAgent):
         self.max_thread_num = max_thread_num
         self.max_revision_iterations = max_revision_iterations
         self.output_dir = output_dir
+        self.parallel_review = parallel_review
 
         self.snippet_examiner = SnippetExaminer(
-            lm=self.article_writer_lm, max_thread_num=self.max_thread_num
+            lm=self.article_writer_lm,
+            max_thread_num=self.max_thread_num,
+            batch_size=examiner_batch_size,
+            accept_threshold=examiner_accept_threshold,
+            reject_threshold=examiner_reject_threshold,
         )
         self.section_gen = KBToSection(lm=self.article_writer_lm)
         self.section_editor = SectionEditor(lm=self.article_writer_lm)
@@ -76,76 +89,131 @@ class ArticleGenerationAgent(BaseAgent):
         ground_truth_url: str = "",
         eval_factuality: bool = False,
     ) -> Article:
+        """Sync entry point, runs agenerate_article to completion."""
+        return run_coroutine(
+            self.agenerate_article(
+                topic=topic,
+                knowledge_base=knowledge_base,
+                article_with_outline=article_with_outline,
+                callback_handler=callback_handler,
+                article_output_dir=article_output_dir,
+                ground_truth_url=ground_truth_url,
+                eval_factuality=eval_factuality,
+            )
+        )
+
+    async def agenerate_article(
+        self,
+        topic: str,
+        knowledge_base: KnowledgeBase,
+        article_with_outline: Article,
+        callback_handler: BaseCallbackHandler = None,
+        article_output_dir=None,
+        ground_truth_url: str = "",
+        eval_factuality: bool = False,
+    ) -> Article:
+        """Generate the article section by section.
+
+        Snippet examination, writing and review calls are awaited through
+        LLM.acall instead of running in nested thread pools. All stages of all
+        sections share one limiter, so at most max_thread_num LLM calls are in
+        flight in total.
+        """
         self.ground_truth_url = ground_truth_url
-        knowledge_base.prepare_table_for_retrieval()
+        await asyncio.to_thread(knowledge_base.prepare_table_for_retrieval)
 
         if article_with_outline is None:
             raise ValueError("article_with_outline must be provided")
 
         sections_to_write = article_with_outline.get_first_level_section_names()
         logger.debug(f"Sections to write: {sections_to_write}")
+        limiter = asyncio.Semaphore(self.max_thread_num)
 
         if len(sections_to_write) == 0:
-            section_output_dict = self.generate_section(
+            section_output_dict = await self.agenerate_section(
                 topic=topic,
                 section_name=topic,
                 knowledge_base=knowledge_base,
                 section_outline="",
                 section_query=[topic],
+                limiter=limiter,
             )
             section_output_dict_collection = [section_output_dict]
         else:
-            filtered_sections = [
-                section_title
-                for section_title in sections_to_write
-                if not (
-                    section_title.lower().strip() == "introduction"
-                    or section_title.lower().strip().startswith("conclusion")
-                    or section_title.lower().strip().startswith("summary")
-                )
-            ]
 
-            def process_section(i, section_title):
-                section_query = article_with_outline.get_outline_as_list(
-                    root_section_name=section_title,
-                    add_hashtags=False,
+            async def process_section(section_title):
+                section_outline, section_query = self._prepare_section(
+                    topic, article_with_outline, section_title
                 )
-
-                section_query = [f"{topic} {query}" for query in section_query]
-                queries_with_hashtags = article_with_outline.get_outline_as_list(
-                    root_section_name=section_title,
-                    add_hashtags=True,
-                )
-                section_outline = "\n".join(queries_with_hashtags)
-
-                result = self.generate_section(
-                    topic,
-                    section_title,
-                    knowledge_base,
-                    section_outline,
-                    section_query,
+                try:
+                    return await self.agenerate_section(
+                        topic,
+                        section_title,
+                        knowledge_base,
+                        section_outline,
+                        section_query,
+                        limiter=limiter,
+                    )
+                except Exception as e:
+                    logger.error(f"Error in async section processing: {e}")
+                    return None
+
+            section_output_dict_collection = await asyncio.gather(
+                *(
+                    process_section(section_title)
+                    for section_title in self._filter_sections(sections_to_write)
                 )
-                return i, result
-
-            section_output_dict_collection = [None] * len(filtered_sections)
-
-            with ThreadPoolExecutor(max_workers=self.max_thread_num) as executor:
-                futures = [
-                    executor.submit(process_section, i, section_title)
-                    for i, section_title in enumerate(filtered_sections)
-                ]
-                for future in as_completed(futures):
-                    try:
-                        i, result = future.result()
-                        section_output_dict_collection[i] = result
-                    except Exception as e:
-                        logger.error(f"Error in threaded section processing: {e}")
-                        continue
-
+            )
             section_output_dict_collection = [
                 x for x in section_output_dict_collection if x is not None
             ]
 
+        return await asyncio.to_thread(
+            self._save_article,
+            topic=topic,
+            article_with_outline=article_with_outline,
+            section_output_dict_collection=section_output_dict_collection,
+            article_output_dir=article_output_dir,
+            eval_factuality=eval_factuality,
+        )
+
+    @staticmethod
+    def _filter_sections(sections_to_write: List[str]) -> List[str]:
+        """Drop the introduction, conclusion and summary sections."""
+        return [
+            section_title
+            for section_title in sections_to_write
+            if not (
+                section_title.lower().strip() == "introduction"
+                or section_title.lower().strip().startswith("conclusion")
+                or section_title.lower().strip().startswith("summary")
+            )
+        ]
+
+    @staticmethod
+    def _prepare_section(topic: str, article_with_outline: Article, section_title: str):
+        """Return the outline and the retrieval queries of a first-level section."""
+        section_query = article_with_outline.get_outline_as_list(
+            root_section_name=section_title,
+            add_hashtags=False,
+        )
+
+        section_query = [f"{topic} {query}" for query in section_query]
+        queries_with_hashtags = article_with_outline.get_outline_as_list(
+            root_section_name=section_title,
+            add_hashtags=True,
+        )
+        section_outline = "\n".join(queries_with_hashtags)
+        return section_outline, section_query
+
+    def _save_article(
+        self,
+        topic: str,
+        article_with_outline: Article,
+        section_output_dict_collection: List[Dict],
+        article_output_dir=None,
+        eval_factuality: bool = False,
+    ) -> Article:
         draft_article = copy.deepcopy(article_with_outline)
         article = copy.deepcopy(article_with_outline)
         for section_output_dict in section_output_dict_collection:
@@ -202,19 +270,49 @@ class ArticleGenerationAgent(BaseAgent):
         section_query,
         review_per_section: bool = False,
     ):
+        """Sync entry point, runs agenerate_section to completion."""
+        return run_coroutine(
+            self.agenerate_section(
+                topic,
+                section_name,
+                knowledge_base,
+                section_outline,
+                section_query,
+                review_per_section=review_per_section,
+            )
+        )
+
+    async def agenerate_section(
+        self,
+        topic,
+        section_name,
+        knowledge_base: KnowledgeBase,
+        section_outline,
+        section_query,
+        review_per_section: bool = False,
+        limiter: Optional[asyncio.Semaphore] = None,
+    ):
+        """Retrieve and examine the information of a section, then write and review it.
+
+        limiter bounds the LLM calls in flight; generate_article shares one
+        across all sections, otherwise the section gets its own of max_thread_num.
+        """
+        limiter = limiter or asyncio.Semaphore(self.max_thread_num)
         collected_info: List[Information] = []
         if knowledge_base is not None:
-            collected_info = knowledge_base.retrieve_information(
-                queries=section_query, search_top_k=self.retrieve_top_k
+            collected_info = await asyncio.to_thread(
+                knowledge_base.retrieve_information,
+                queries=section_query,
+                search_top_k=self.retrieve_top_k,
             )
 
             if not disable_filter:
-                collected_info = self.snippet_examiner(
-                    topic, section_query, collected_info
+                collected_info = await self.snippet_examiner.aforward(
+                    topic, section_query, collected_info, limiter=limiter
                 )
 
                 if len(collected_info) < len(section_query) * self.retrieve_top_k:
-                    additional_info = self.retriever(
+                    additional_info = await self.retriever.acall(
                         query=section_query,
                         exclude_urls=[self.ground_truth_url],
                         top_k=1,
@@ -223,38 +321,37 @@ class ArticleGenerationAgent(BaseAgent):
                         logger.debug(
                             f"Retrieved {len(additional_info)} additional information items for section '{section_name}'"
                         )
-                        merged = []
-                        for query in section_query:
-                            for info in additional_info:
-                                if info.meta.get("query") == query:
-                                    merged.append(info)
-                            for info in collected_info:
-                                if info.meta.get("query") == query:
-                                    merged.append(info)
-                        collected_info = merged
+                        collected_info = self._merge_additional_info(
+                            section_query, additional_info, collected_info
+                        )
 
             collected_info = collected_info or []
 
-        draft_section: str = self.section_gen.forward(
-            topic=topic,
-            outline=section_outline,
-            section=section_name,
-            collected_info=collected_info,
-        ).section
+        async with limiter:
+            draft_section: str = (
+                await self.section_gen.aforward(
+                    topic=topic,
+                    outline=section_outline,
+                    section=section_name,
+                    collected_info=collected_info,
+                )
+            ).section
 
-        final_section = self._review_and_revise_section_granular(
+        final_section = await self._areview_and_revise_section_granular(
             section_content=draft_section,
             section_name=section_name,
             topic=topic,
             collected_info=collected_info,
+            limiter=limiter,
         )
         final_section_no_granular = ""
         if review_per_section:
-            final_section_no_granular = self._review_and_revise_section(
+            final_section_no_granular = await self._areview_and_revise_section(
                 section_content=draft_section,
                 section_name=section_name,
                 topic=topic,
                 collected_info=collected_info,
+                limiter=limiter,
             )
 
         return {
@@ -265,101 +362,147 @@ class ArticleGenerationAgent(BaseAgent):
             "collected_info": collected_info,
         }
 
-    def _review_and_revise_section_granular(
+    @staticmethod
+    def _merge_additional_info(
+        section_query: List[str],
+        additional_info: List[Information],
+        collected_info: List[Information],
+    ) -> List[Information]:
+        """Interleave the additional and collected information query by query."""
+        merged = []
+        for query in section_query:
+            for info in additional_info:
+                if info.meta.get("query") == query:
+                    merged.append(info)
+            for info in collected_info:
+                if info.meta.get("query") == query:
+                    merged.append(info)
+        return merged
+
+    async def _areview_and_revise_section_granular(
         self,
         section_content: str,
         section_name: str,
         topic: str,
         collected_info: List[Information],
+        limiter: asyncio.Semaphore,
     ) -> str:
         """Review and revise section content granularly, section by section."""
 
         article_dict = ArticleTextProcessing.parse_article_into_dict(section_content)
 
         # Review each section/subsection individually
-        reviewed_dict = self._review_dict_recursively(
-            article_dict, topic, collected_info, section_name
+        reviewed_dict = await self._areview_dict_recursively(
+            article_dict, topic, collected_info, limiter
         )
 
         # Reconstruct the content from the reviewed dictionary
-        final_content = ArticleTextProcessing.reconstruct_content_from_dict(
-            reviewed_dict
-        )
+        return ArticleTextProcessing.reconstruct_content_from_dict(reviewed_dict)
 
-        return final_content
-
-    def _review_dict_recursively(
+    async def _areview_dict_recursively(
         self,
         section_dict: Dict[str, Dict],
         topic: str,
         collected_info: List[Information],
-        parent_section_name: str = "",
+        limiter: asyncio.Semaphore,
     ) -> Dict[str, Dict]:
-        """Recursively review each section and subsection."""
-
-        reviewed_dict = {}
+        """Recursively review each section and subsection.
 
-        for section_name, section_data in section_dict.items():
-            content = section_data["content"]
-            subsections = section_data["subsections"]
+        With parallel_review the review loops of all (sub)sections run
+        concurrently, otherwise one after the other. The returned dict keeps the
+        order of section_dict.
+        """
 
-            logger.debug(f"{'=='*4} Reviewing section: {section_name} {'=='*4}")
+        async def review(section_name, section_data):
+            content = self._areview_section_content(
+                section_data["content"], section_name, topic, collected_info, limiter
+            )
+            subsections = self._areview_dict_recursively(
+                section_data["subsections"] or {}, topic, collected_info, limiter
+            )
+            if self.parallel_review:
+                reviewed_content, reviewed_subsections = await asyncio.gather(
+                    content, subsections
+                )
+            else:
+                reviewed_content = await content
+                reviewed_subsections = await subsections
+            return section_name, {
+                "content": reviewed_content,
+                "subsections": reviewed_subsections,
+            }
 
-            if content and content.strip():
+        if self.parallel_review:
+            reviewed = await asyncio.gather(
+                *(review(name, data) for name, data in section_dict.items())
+            )
+        else:
+            reviewed = [
+                await review(name, data) for name, data in section_dict.items()
+            ]
+        return dict(reviewed)
 
-                citations = ArticleTextProcessing.extract_citations(content)
+    async def _areview_section_content(
+        self,
+        content: str,
+        section_name: str,
+        topic: str,
+        collected_info: List[Information],
+        limiter: asyncio.Semaphore,
+    ) -> str:
+        """Review the content of one (sub)section against the references it cites."""
+        logger.debug(f"{'=='*4} Reviewing section: {section_name} {'=='*4}")
 
-                # Filter collected_info to only include relevant references
-                relevant_info, citation_mapping = (
-                    ArticleTextProcessing.filter_info_by_citations(
-                        collected_info, citations
-                    )
-                )
+        if not (content and content.strip()):
+            return content
 
-                logger.debug(f"Section '{section_name}' has citations: {citations}")
-                logger.debug(f"Filtered to {len(relevant_info)} relevant references")
+        relevant_info, citation_mapping = self._filter_references(
+            content, section_name, collected_info
+        )
 
-                # Review this specific section content
-                reviewed_content = self._review_single_section(
-                    content=content,
-                    section_name=section_name,
-                    topic=topic,
-                    relevant_info=relevant_info,
-                    citation_mapping=citation_mapping,
-                )
-            else:
-                reviewed_content = content
+        # Review this specific section content
+        return await self._areview_single_section(
+            content=content,
+            section_name=section_name,
+            topic=topic,
+            relevant_info=relevant_info,
+            citation_mapping=citation_mapping,
+            limiter=limiter,
+        )
 
-            # Recursively review subsections
-            reviewed_subsections = {}
-            if subsections:
-                reviewed_subsections = self._review_dict_recursively(
-                    subsections, topic, collected_info, section_name
-                )
+    @staticmethod
+    def _filter_references(
+        content: str,
+        section_name: str,
+        collected_info: List[Information],
+    ):
+        """Keep only the references cited in content, with the mapping to their new numbers."""
+        citations = ArticleTextProcessing.extract_citations(content)
 
-            reviewed_dict[section_name] = {
-                "content": reviewed_content,
-                "subsections": reviewed_subsections,
-            }
+        # Filter collected_info to only include relevant references
+        relevant_info, citation_mapping = (
+            ArticleTextProcessing.filter_info_by_citations(collected_info, citations)
+        )
 
-        return reviewed_dict
+        logger.debug(f"Section '{section_name}' has citations: {citations}")
+        logger.debug(f"Filtered to {len(relevant_info)} relevant references")
+        return relevant_info, citation_mapping
 
-    def _review_single_section(
+    async def _areview_single_section(
         self,
         content: str,
         section_name: str,
         topic: str,
         relevant_info: List[Information],
         citation_mapping: Dict[int, int],
+        limiter: asyncio.Semaphore,
     ) -> str:
         """Review a single section with its relevant references."""
 
         # Remap citations in content to sequential numbering for review
-        content_for_review = ArticleTextProcessing.remap_citations(
+        current_content = ArticleTextProcessing.remap_citations(
             content, citation_mapping
         )
-
-        current_content = content_for_review
         outstanding_notes = ""
 
         for iteration in range(self.max_revision_iterations):
@@ -368,13 +511,14 @@ class ArticleGenerationAgent(BaseAgent):
             )
 
             # Review the section
-            review_result = self.section_reviewer.forward(
-                topic=topic,
-                section_name=section_name,
-                section_content=current_content,
-                collected_info=relevant_info,
-                previous_feedback=outstanding_notes,
-            )
+            async with limiter:
+                review_result = await self.section_reviewer.aforward(
+                    topic=topic,
+                    section_name=section_name,
+                    section_content=current_content,
+                    collected_info=relevant_info,
+                    previous_feedback=outstanding_notes,
+                )
 
             logger.debug(f"Review iteration {iteration + 1}: {review_result.verdict}")
 
@@ -383,40 +527,38 @@ class ArticleGenerationAgent(BaseAgent):
                 logger.info(
                     f"Section '{section_name}' approved after {iteration + 1} iterations"
                 )
-                final_content = ArticleTextProcessing.remap_citations_back(
-                    current_content, citation_mapping
-                )
-                return final_content
+                break
 
             outstanding_notes = review_result.feedback
 
             # Edit the section
-            edit_result = self.section_editor.forward(
-                section_content=current_content,
-                feedback=outstanding_notes,
-                collected_info=relevant_info,
-            )
+            async with limiter:
+                edit_result = await self.section_editor.aforward(
+                    section_content=current_content,
+                    feedback=outstanding_notes,
+                    collected_info=relevant_info,
+                )
 
             current_content = ArticleTextProcessing.clean_up_section(
                 edit_result.revised_section
             )
+        else:
+            if debugging:
+                logger.warning(
+                    f"Section '{section_name}' did not pass review after {self.max_revision_iterations} iterations"
+                )
 
-        if debugging:
-            logger.warning(
-                f"Section '{section_name}' did not pass review after {self.max_revision_iterations} iterations"
-            )
-
-        final_content = ArticleTextProcessing.remap_citations_back(
+        return ArticleTextProcessing.remap_citations_back(
             current_content, citation_mapping
         )
-        return final_content
 
-    def _review_and_revise_section(
+    async def _areview_and_revise_section(
         self,
         section_content: str,
         section_name: str,
         topic: str,
         collected_info: List[Information],
+        limiter: asyncio.Semaphore,
     ) -> str:
         """Review and revise section until it meets factuality standards."""
         current_content = section_content
@@ -424,13 +566,14 @@ class ArticleGenerationAgent(BaseAgent):
 
         for iteration in range(self.max_revision_iterations):
             # Review the section
-            review_result = self.section_reviewer.forward(
-                topic=topic,
-                section_name=section_name,
-                section_content=current_content,
-                collected_info=collected_info,
-                previous_feedback=outstanding_notes,
-            )
+            async with limiter:
+                review_result = await self.section_reviewer.aforward(
+                    topic=topic,
+                    section_name=section_name,
+                    section_content=current_content,
+                    collected_info=collected_info,
+                    previous_feedback=outstanding_notes,
+                )
 
             logger.info(f"Review iteration {iteration + 1}: {review_result.verdict}")
 
@@ -445,11 +588,12 @@ class ArticleGenerationAgent(BaseAgent):
             outstanding_notes = review_result.feedback
             logger.debug(f"Feedback: {review_result.feedback}")
 
-            edit_result = self.section_editor(
-                section_content=current_content,
-                feedback=outstanding_notes,
-                collected_info=collected_info,
-            )
+            async with limiter:
+                edit_result = await self.section_editor.aforward(
+                    section_content=current_content,
+                    feedback=outstanding_notes,
+                    collected_info=collected_info,
+                )
 
             current_content = ArticleTextProcessing.clean_up_section(
                 edit_result.revised_section
@@ -463,7 +607,16 @@ class ArticleGenerationAgent(BaseAgent):
 
 
 class SnippetExaminer(dspy.Module):
-    """Examine the snippets to check if they are relevant to the topic."""
+    """Examine the snippets to check if they are relevant to the topic.
+
+    With batch_size > 1 the snippets retrieved for the same query are judged
+    batch_size at a time in a single call returning a per-index verdict. Batches
+    whose answer cannot be parsed fall back to one call per snippet.
+
+    When thresholds are set, snippets whose retrieval similarity is at least
+    accept_threshold are kept and those below reject_threshold are dropped
+    without an LLM call; only the band in between is sent to the LLM.
+    """
 
     def __init__(
         self,
@@ -471,12 +624,133 @@ class SnippetExaminer(dspy.Module):
         prompt_name: str = "verifier_prompt",
         prompt_version: str = "v1",
         max_thread_num: int = 7,
+        batch_size: int = 1,
+        batch_prompt_name: str = "batch_verifier_prompt",
+        batch_prompt_version: str = "v1",
+        accept_threshold: Optional[float] = None,
+        reject_threshold: Optional[float] = None,
     ):
         super().__init__()
         self.lm = lm
         self.prompt_key = f"{prompt_name}_{prompt_version}"
+        self.batch_prompt_key = f"{batch_prompt_name}_{batch_prompt_version}"
         self.evaluate_snippet = dspy.Predict(SnippetExaminerSignature)
+        self.evaluate_snippets = dspy.Predict(BatchSnippetExaminerSignature)
         self.max_thread_num = max_thread_num
+        self.batch_size = batch_size
+        self.accept_threshold = accept_threshold
+        self.reject_threshold = reject_threshold
+
+    def prefilter(self, info: Information, snippet: str) -> Optional[bool]:
+        """Decide on a snippet from its retrieval similarity, or None if ambiguous."""
+        score = info.snippet_scores.get(snippet)
+        if score is None:
+            return None
+        if self.accept_threshold is not None and score >= self.accept_threshold:
+            return True
+        if self.reject_threshold is not None and score < self.reject_threshold:
+            return False
+        return None
+
+    def examine_snippet(self, topic: str, query: str, snippet: str) -> bool:
+        """Sync entry point, runs aexamine_snippet to completion."""
+        return run_coroutine(self.aexamine_snippet(topic, query, snippet))
+
+    @staticmethod
+    def parse_verdicts(verdicts: str, num_snippets: int) -> List[bool]:
+        """Parse a per-index JSON verdict, raising ValueError if any index is missing."""
+        verdicts = verdicts.strip()
+        verdicts = verdicts.replace("```json", "").replace("```", "").strip()
+        parsed = json.loads(verdicts)
+        if isinstance(parsed, list):
+            parsed = {str(i + 1): verdict for i, verdict in enumerate(parsed)}
+        if not isinstance(parsed, dict):
+            raise ValueError(f"Unexpected verdict format: {verdicts}")
+
+        parsed = {str(k).strip("[] "): v for k, v in parsed.items()}
+        results = []
+        for i in range(1, num_snippets + 1):
+            verdict = parsed.get(str(i))
+            if not isinstance(verdict, str) or verdict.lower().strip() not in (
+                "yes",
+                "no",
+            ):
+                raise ValueError(f"Missing verdict for snippet {i}")
+            results.append(verdict.lower().strip() == "yes")
+        return results
+
+    def examine_batch(
+        self, topic: str, query: str, snippets: List[str]
+    ) -> List[bool]:
+        """Sync entry point, runs aexamine_batch to completion."""
+        return run_coroutine(self.aexamine_batch(topic, query, snippets))
+
+    async def aexamine_snippet(
+        self,
+        topic: str,
+        query: str,
+        snippet: str,
+        limiter: Optional[asyncio.Semaphore] = None,
+    ) -> bool:
+        try:
+            async with limiter or contextlib.nullcontext():
+                answer = (
+                    await apredict(
+                        self.evaluate_snippet,
+                        self.lm,
+                        topic=topic,
+                        section=query,
+                        snippet=snippet,
+                    )
+                ).answer
+            return answer.lower().strip() == "yes"
+        except Exception as e:
+            logger.debug(f"Snippet examination failed ({e}), treating it as irrelevant")
+            return False
+
+    async def aexamine_batch(
+        self,
+        topic: str,
+        query: str,
+        snippets: List[str],
+        limiter: Optional[asyncio.Semaphore] = None,
+    ) -> List[bool]:
+        """Judge snippets in one call; limiter bounds the LLM calls in flight.
+
+        The limiter is only held around each LLM call, so the per-snippet
+        fallback can share it without deadlocking.
+        """
+        limiter = limiter or asyncio.Semaphore(self.max_thread_num)
+        if len(snippets) == 1:
+            return [await self.aexamine_snippet(topic, query, snippets[0], limiter)]
+
+        numbered_snippets = "\n\n".join(
+            f"[{i + 1}] {snippet}" for i, snippet in enumerate(snippets)
+        )
+        try:
+            async with limiter:
+                verdicts = (
+                    await apredict(
+                        self.evaluate_snippets,
+                        self.lm,
+                        topic=topic,
+                        section=query,
+                        snippets=numbered_snippets,
+                    )
+                ).verdicts
+            return self.parse_verdicts(verdicts, len(snippets))
+        except Exception as e:
+            logger.debug(
+                f"Batched examination failed ({e}), falling back to per-snippet calls"
+            )
+            return list(
+                await asyncio.gather(
+                    *(
+                        self.aexamine_snippet(topic, query, s, limiter)
+                        for s in snippets
+                    )
+                )
+            )
 
     def forward(
         self,
@@ -484,41 +758,87 @@ class SnippetExaminer(dspy.Module):
         section: str,
         collected_info: List[Information],
     ) -> List[Information]:
+        """Sync entry point, runs aforward to completion."""
+        return run_coroutine(self.aforward(topic, section, collected_info))
+
+    async def aforward(
+        self,
+        topic: str,
+        section: str,
+        collected_info: List[Information],
+        limiter: Optional[asyncio.Semaphore] = None,
+    ) -> List[Information]:
+        """Keep the snippets of collected_info judged relevant to their query.
+
+        At most max_thread_num examination calls are in flight, unless a shared
+        limiter is passed in.
+        """
+        all_snippets_with_queries, results, batches = self._plan(
+            section, collected_info
+        )
+        limiter = limiter or asyncio.Semaphore(self.max_thread_num)
+
+        async def process_batch(query, indices):
+            snippets = [all_snippets_with_queries[i][0] for i in indices]
+            return indices, await self.aexamine_batch(topic, query, snippets, limiter)
+
+        for indices, verdicts in await asyncio.gather(
+            *(process_batch(query, indices) for query, indices in batches)
+        ):
+            for i, is_relevant in zip(indices, verdicts):
+                results[i] = (all_snippets_with_queries[i][0], is_relevant)
+
+        return self._filter_info(collected_info, results)
+
+    def _plan(self, section: str, collected_info: List[Information]):
+        """Prefilter the snippets and batch the undecided ones per query.
+
+        Returns the (snippet, query) pairs, the per-pair results filled in by the
+        prefilter, and the (query, indices) batches left to send to the LLM.
+        """
         SnippetExaminerSignature.__doc__ = PROMPTS[self.prompt_key]
+        BatchSnippetExaminerSignature.__doc__ = PROMPTS[self.batch_prompt_key]
 
         all_snippets_with_queries = []
+        prefiltered = []
         for info in collected_info:
             query = info.meta.get("query", section)
             for snippet in info.snippets:
                 all_snippets_with_queries.append((snippet, query))
-
-        def process_snippet(i, query, snippet):
-            try:
-                with dspy.settings.context(lm=self.lm):
-                    answer = self.evaluate_snippet(
-                        topic=topic,
-                        section=query,
-                        snippet=snippet,
-                    ).answer
-                    is_relevant = answer.lower().strip() == "yes"
-                return i, query, snippet, is_relevant
-            except Exception as e:
-                return i, query, snippet, False
+                prefiltered.append(self.prefilter(info, snippet))
 
         results = [None] * len(all_snippets_with_queries)
-        with ThreadPoolExecutor(max_workers=self.max_thread_num) as executor:
-            futures = [
-                executor.submit(process_snippet, i, query, snippet)
-                for i, (snippet, query) in enumerate(all_snippets_with_queries)
-            ]
-
-            for future in as_completed(futures):
-                i, query, snippet, is_relevant = future.result()
-                results[i] = (snippet, is_relevant)
+        for i, decision in enumerate(prefiltered):
+            if decision is not None:
+                results[i] = (all_snippets_with_queries[i][0], decision)
+        num_accepted = sum(1 for decision in prefiltered if decision is True)
+        num_rejected = sum(1 for decision in prefiltered if decision is False)
+        if self.accept_threshold is not None or self.reject_threshold is not None:
+            logger.info(
+                f"Snippet prefilter: {num_accepted} auto-accepted, {num_rejected} auto-rejected, "
+                f"{len(prefiltered) - num_accepted - num_rejected} sent to the LLM"
+            )
 
+        # Group the undecided snippet indices per query, then split them into batches
+        indices_by_query = {}
+        for i, (_, query) in enumerate(all_snippets_with_queries):
+            if prefiltered[i] is None:
+                indices_by_query.setdefault(query, []).append(i)
+        batch_size = max(1, self.batch_size)
+        batches = [
+            (query, indices[start : start + batch_size])
+            for query, indices in indices_by_query.items()
+            for start in range(0, len(indices), batch_size)
+        ]
+        return all_snippets_with_queries, results, batches
+
+    def _filter_info(
+        self, collected_info: List[Information], results: List
+    ) -> List[Information]:
+        """Keep the relevant snippets of each piece of information."""
         relevant_snippets = [snippet for snippet, is_relevant in results if is_relevant]
         logger.info(
-            f"Snippet Examiner found {len(relevant_snippets)} relevant snippets out of {len(all_snippets_with_queries)}"
+            f"Snippet Examiner found {len(relevant_snippets)} relevant snippets out of {len(results)}"
         )
 
         filtered_info = []
@@ -543,6 +863,17 @@ class SnippetExaminerSignature(dspy.Signature):
     answer = dspy.OutputField(desc="A 'yes' or 'no' answer", format=str)
 
 
+class BatchSnippetExaminerSignature(dspy.Signature):
+    """Default System Prompt"""
+
+    topic = dspy.InputField(desc="The topic of the page", format=str)
+    section = dspy.InputField(desc="The section to be examined", format=str)
+    snippets = dspy.InputField(desc="The numbered snippets to examine", format=str)
+    verdicts = dspy.OutputField(
+        desc="A JSON object mapping each snippet index to 'yes' or 'no'", format=str
+    )
+
+
 class KBToSection(dspy.Module):
     """Use the information collected from the knowledge base to write a section."""
 
@@ -563,6 +894,16 @@ class KBToSection(dspy.Module):
         outline: str,
         section: str,
         collected_info: List[Information],
+    ) -> dspy.Prediction:
+        """Sync entry point, runs aforward to completion."""
+        return run_coroutine(self.aforward(topic, outline, section, collected_info))
+
+    async def aforward(
+        self,
+        topic: str,
+        outline: str,
+        section: str,
+        collected_info: List[Information],
     ) -> dspy.Prediction:
         WriteUniqueSection.__doc__ = PROMPTS[self.prompt_key]
         logger.debug(
@@ -577,27 +918,17 @@ class KBToSection(dspy.Module):
             )
             info += "\n\n"
 
-            snippet_content = "\n".join(apollo_info.snippets)
-            temp = (
-                f"The following reference MUST be used to write Section: '{apollo_info.meta.get('query', '')}'\n"
-                + f"Ref: [{idx + 1}]\n"
-                + f"URL: {apollo_info.url}\n"
-                + f"{snippet_content[:200]}...[truncated]"
-                + "\n\n"
-            )
-
-            # logger.debug("Snippet:\n" + temp)
-
-        with dspy.settings.context(lm=self.lm):
-            output = self.write_section(
-                topic=topic,
-                outline=outline,
-                info=info,
-                section=section,
-            )
-            section: str = ArticleTextProcessing.clean_up_section(output.output)
-            # print(section)
-        return dspy.Prediction(section=section)
+        output = await apredict(
+            self.write_section,
+            self.lm,
+            topic=topic,
+            outline=outline,
+            info=info,
+            section=section,
+        )
+        return dspy.Prediction(
+            section=ArticleTextProcessing.clean_up_section(output.output)
+        )
 
 
 class WriteUniqueSection(dspy.Signature):
@@ -636,27 +967,39 @@ class SectionReviewer(dspy.Module):
         section_content: str,
         collected_info: List[Information],
         previous_feedback: str = "",
+    ):
+        """Sync entry point, runs aforward to completion."""
+        return run_coroutine(
+            self.aforward(
+                topic, section_name, section_content, collected_info, previous_feedback
+            )
+        )
+
+    async def aforward(
+        self,
+        topic: str,
+        section_name: str,
+        section_content: str,
+        collected_info: List[Information],
+        previous_feedback: str = "",
     ):
         # Prepare references for review
         references = ""
         for idx, info in enumerate(collected_info):
-            # references += f"The following reference MUST be used to write Section: '{info.meta.get('query', '')}'\n"
             references += f"Ref: [{idx + 1}]\n"
             references += "\n".join(info.snippets)
             references += "\n\n"
 
-        # print(f"Initial content for section '{section_name}':\n{section_content}")
-        # print(f"References for section '{section_name}':\n{references}")
-
         ReviewSectionWithMemorySignature.__doc__ = PROMPTS[self.prompt_key]
-        with dspy.settings.context(lm=self.lm):
-            output = self.review_section_with_memory(
-                topic=topic,
-                section_name=section_name,
-                section_content=section_content,
-                references=references,
-                previous_feedback=previous_feedback,
-            )
+        output = await apredict(
+            self.review_section_with_memory,
+            self.lm,
+            topic=topic,
+            section_name=section_name,
+            section_content=section_content,
+            references=references,
+            previous_feedback=previous_feedback,
+        )
 
         return dspy.Prediction(
             verdict=output.verdict,
@@ -706,6 +1049,15 @@ class SectionEditor(dspy.Module):
         section_content: str,
         feedback: str,
         collected_info: List[Information],
+    ):
+        """Sync entry point, runs aforward to completion."""
+        return run_coroutine(self.aforward(section_content, feedback, collected_info))
+
+    async def aforward(
+        self,
+        section_content: str,
+        feedback: str,
+        collected_info: List[Information],
     ):
         # Prepare references for editing
         references = ""
@@ -714,21 +1066,14 @@ class SectionEditor(dspy.Module):
             references += "\n".join(info.snippets)
             references += "\n\n"
 
-        temp_Ref = ""
-        for idx, info in enumerate(collected_info):
-            temp_Ref += f"The following reference MUST be used to write Section: '{info.meta.get('query', '')}'\n"
-            temp_Ref += f"Ref: [{idx + 1}]\n"
-            temp_Ref += "\n".join(info.snippets)
-            temp_Ref += "\n\n"
-
         EditSectionSignature.__doc__ = PROMPTS[self.prompt_key]
-        with dspy.settings.context(lm=self.lm):
-            output = self.edit_section(
-                section_content=section_content,
-                feedback=feedback,
-                references=references,
-            )
-        logger.debug(f"References:\n{temp_Ref}\n")
+        output = await apredict(
+            self.edit_section,
+            self.lm,
+            section_content=section_content,
+            feedback=feedback,
+            references=references,
+        )
         logger.debug(f"Editing section content with feedback:\n{feedback}\n")
         logger.debug(f"Original section content:\n{section_content}\n")
         logger.debug(f"Revised section content:\n{output.revised_section}\n")
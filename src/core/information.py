@@ -1,3 +1,4 @@
+import os
 import copy
 import json
 import hashlib
@@ -6,10 +7,55 @@ from collections import OrderedDict
 from typing import Any, Dict, List, Optional, Tuple, Union
 
 from ..utils.file_handler import FileIOHelper
+from ..utils.embedding_store import SnippetEmbeddingStore
+from ..utils.gather_info_log import GatherInfoLog
+from ..utils.model_registry import EmbeddingModelRegistry
 
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+
+
+def top_k_indices(similarities: np.ndarray, k: int) -> np.ndarray:
+    """Row-wise top-k column indices of a similarity matrix.
+
+    Each row is ordered by descending similarity, ties broken by the lower index.
+    Uses np.argpartition and only falls back to a full sort for rows whose k-th
+    value is tied with columns left out of the partition.
+
+    Args:
+        similarities (np.ndarray): Matrix of shape (num_queries, num_snippets).
+        k (int): Number of indices to keep per row.
+
+    Returns:
+        np.ndarray: Matrix of shape (num_queries, min(k, num_snippets)).
+    """
+    num_rows, num_cols = similarities.shape
+    k = min(k, num_cols)
+    if k <= 0:
+        return np.empty((num_rows, 0), dtype=np.int64)
+
+    if k < num_cols:
+        candidates = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.tile(np.arange(num_cols), (num_rows, 1))
+    candidate_sims = np.take_along_axis(similarities, candidates, axis=1)
+
+    order = np.lexsort((candidates, -candidate_sims), axis=1)
+    top_indices = np.take_along_axis(candidates, order, axis=1)
+
+    if k < num_cols:
+        kth_sims = candidate_sims.min(axis=1, keepdims=True)
+        ambiguous_rows = np.flatnonzero((similarities >= kth_sims).sum(axis=1) > k)
+        for row in ambiguous_rows:
+            full_order = np.lexsort((np.arange(num_cols), -similarities[row]))
+            top_indices[row] = full_order[:k]
+
+    return top_indices
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row so that dot products are cosine similarities."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
 
 
 class Information:
@@ -23,6 +69,7 @@ class Information:
         snippets (list): List of brief excerpts or snippets.
         title (str): The title or headline of the information.
         url (str): The unique URL (serving as UUID) of the information.
+        snippet_scores (dict): Retrieval similarity of each snippet, when known.
     """
 
     def __init__(self, url, description, snippets, title, meta=None, score=0.0):
@@ -41,6 +88,7 @@ class Information:
         self.meta = meta if meta is not None else {}
         self.citation_uuid = -1
         self.score = score
+        self.snippet_scores = {}
 
     def __hash__(self):
         return hash(
@@ -161,6 +209,30 @@ class InformationTable(ABC):
     def retrieve_information(**kwargs):
         pass
 
+    def encode_queries(self, queries: List[str]) -> np.ndarray:
+        """Encode all queries in a single call and L2-normalize them."""
+        if (
+            "snowflake" in self.embedding_model.lower()
+            or "arctic" in self.embedding_model.lower()
+        ):
+            encoded_queries = self.encoder.encode(
+                queries, show_progress_bar=False, prompt_name="query"
+            )
+        else:
+            encoded_queries = self.encoder.encode(queries, show_progress_bar=False)
+        return normalize_rows(np.asarray(encoded_queries, dtype=np.float32))
+
+    def search_top_k(
+        self, queries: List[str], search_top_k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the top-k snippet indices of every query and their cosine similarities."""
+        if not queries or len(self.collected_snippets) == 0:
+            empty = np.empty((len(queries), 0), dtype=np.int64)
+            return empty, empty.astype(np.float32)
+        similarities = self.encode_queries(queries) @ self.normalized_snippets.T
+        top_indices = top_k_indices(similarities, search_top_k)
+        return top_indices, np.take_along_axis(similarities, top_indices, axis=1)
+
 
 class ApolloInformationTable(InformationTable):
     """
@@ -238,9 +310,8 @@ class ApolloInformationTable(InformationTable):
         return cls(conversations)
 
     def prepare_table_for_retrieval(self):
-        self.encoder = SentenceTransformer(
-            self.embedding_model,
-            trust_remote_code=True,
+        self.encoder = EmbeddingModelRegistry.get_sentence_transformer(
+            self.embedding_model
         )
         self.collected_urls = []
         self.collected_snippets = []
@@ -252,6 +323,11 @@ class ApolloInformationTable(InformationTable):
         self.encoded_snippets = self.encoder.encode(
             self.collected_snippets, show_progress_bar=False
         )
+        self.normalized_snippets = normalize_rows(
+            np.asarray(self.encoded_snippets, dtype=np.float32).reshape(
+                len(self.collected_snippets), -1
+            )
+        )
 
     def retrieve_information(
         self, queries: Union[List[str], str], search_top_k
@@ -260,25 +336,8 @@ class ApolloInformationTable(InformationTable):
         selected_snippets = []
         if type(queries) is str:
             queries = [queries]
-        for query in queries:
-            if (
-                "snowflake" in self.embedding_model.lower()
-                or "arctic" in self.embedding_model.lower()
-            ):
-                encoded_query = self.encoder.encode(
-                    query, show_progress_bar=False, prompt_name="query"
-                )
-            else:
-                encoded_query = self.encoder.encode(query, show_progress_bar=False)
-            sim = cosine_similarity([encoded_query], self.encoded_snippets)[0]
-
-            if hasattr(self, "seed") and self.seed is not None:
-                pairs = [(sim[i], i) for i in range(len(sim))]
-                pairs.sort(key=lambda x: (-x[0], x[1]))
-                top_indices = [idx for _, idx in pairs[:search_top_k]]
-            else:
-                sorted_indices = np.argsort(sim)
-                top_indices = sorted_indices[-search_top_k:][::-1]
+        top_indices_per_query, _ = self.search_top_k(queries, search_top_k)
+        for top_indices in top_indices_per_query:
             for i in top_indices:
                 selected_urls.append(self.collected_urls[i])
                 selected_snippets.append(self.collected_snippets[i])
@@ -308,6 +367,8 @@ class KnowledgeBase(InformationTable):
         # embedding_model="paraphrase-MiniLM-L6-v2",
         embedding_model="Snowflake/snowflake-arctic-embed-m-v2.0",
         seed=None,
+        embedding_store_dir: Optional[str] = None,
+        embedding_dtype: str = "float32",
     ):
         super().__init__()
         self.gather_info = gather_info
@@ -317,6 +378,8 @@ class KnowledgeBase(InformationTable):
             # self.seed,
         )
         self.embedding_model = embedding_model
+        self.embedding_store_dir = embedding_store_dir
+        self.embedding_dtype = embedding_dtype
 
     @staticmethod
     def construct_url_to_info(
@@ -368,9 +431,11 @@ class KnowledgeBase(InformationTable):
         return cls(conversations)
 
     @classmethod
-    def from_gather_info_log_file(cls, path):
-        gather_info = FileIOHelper.load_json(path)
-        return cls(gather_info)
+    def from_gather_info_log_file(cls, path, **kwargs):
+        """Load from gather_info.json, its gather_info.jsonl query journal, or both"""
+        gather_info = GatherInfoLog.load_file(path)
+        kwargs.setdefault("embedding_store_dir", os.path.dirname(str(path)))
+        return cls(gather_info, **kwargs)
 
     @classmethod
     def from_kg_last_state_log_file(cls, path):
@@ -378,9 +443,8 @@ class KnowledgeBase(InformationTable):
         return kg
 
     def prepare_table_for_retrieval(self):
-        self.encoder = SentenceTransformer(
-            self.embedding_model,
-            trust_remote_code=True,
+        self.encoder = EmbeddingModelRegistry.get_sentence_transformer(
+            self.embedding_model
         )
         self.collected_urls = []
         self.collected_snippets = []
@@ -389,8 +453,24 @@ class KnowledgeBase(InformationTable):
             for snippet in information.snippets:
                 self.collected_urls.append(url)
                 self.collected_snippets.append(snippet)
-        self.encoded_snippets = self.encoder.encode(
-            self.collected_snippets, show_progress_bar=False
+
+        if self.embedding_store_dir:
+            store = SnippetEmbeddingStore(
+                self.embedding_store_dir,
+                self.embedding_model,
+                dtype=self.embedding_dtype,
+            )
+            self.normalized_snippets = store.load_or_encode(
+                self.collected_snippets, self.encode_snippets
+            )
+        else:
+            self.normalized_snippets = self.encode_snippets(self.collected_snippets)
+        self.encoded_snippets = self.normalized_snippets
+
+    def encode_snippets(self, snippets: List[str]) -> np.ndarray:
+        encoded_snippets = self.encoder.encode(snippets, show_progress_bar=False)
+        return normalize_rows(
+            np.asarray(encoded_snippets, dtype=np.float32).reshape(len(snippets), -1)
         )
 
     def retrieve_information(
@@ -403,35 +483,26 @@ class KnowledgeBase(InformationTable):
         selected_urls = []
         selected_snippets = []
         snippet_to_query = {}  # Track which query was used for each snippet
+        snippet_to_score = {}  # Track the best similarity of each snippet
 
         if type(queries) is str:
             queries = [queries]
 
-        for query in queries:
-            if (
-                "snowflake" in self.embedding_model.lower()
-                or "arctic" in self.embedding_model.lower()
-            ):
-                encoded_query = self.encoder.encode(
-                    query, show_progress_bar=False, prompt_name="query"
-                )
-            else:
-                encoded_query = self.encoder.encode(query, show_progress_bar=False)
-            sim = cosine_similarity([encoded_query], self.encoded_snippets)[0]
-
-            if hasattr(self, "seed") and self.seed is not None:
-                pairs = [(sim[i], i) for i in range(len(sim))]
-                pairs.sort(key=lambda x: (-x[0], x[1]))
-                top_indices = [idx for _, idx in pairs[:search_top_k]]
-            else:
-                sorted_indices = np.argsort(sim)
-                top_indices = sorted_indices[-search_top_k:][::-1]
-
-            for i in top_indices:
+        top_indices_per_query, top_scores_per_query = self.search_top_k(
+            queries, search_top_k
+        )
+        for query, top_indices, top_scores in zip(
+            queries, top_indices_per_query, top_scores_per_query
+        ):
+            for i, score in zip(top_indices, top_scores):
+                snippet = self.collected_snippets[i]
                 selected_urls.append(self.collected_urls[i])
-                selected_snippets.append(self.collected_snippets[i])
+                selected_snippets.append(snippet)
                 # Track which query was used for this snippet
-                snippet_to_query[self.collected_snippets[i]] = query
+                snippet_to_query[snippet] = query
+                snippet_to_score[snippet] = max(
+                    float(score), snippet_to_score.get(snippet, float("-inf"))
+                )
 
         # Group snippets by URL
         url_to_snippets = {}
@@ -456,6 +527,9 @@ class KnowledgeBase(InformationTable):
             if hasattr(self, "seed") and self.seed is not None:
                 url_to_snippets[url].sort()
             selected_url_to_info[url].snippets = url_to_snippets[url]
+            selected_url_to_info[url].snippet_scores = {
+                snippet: snippet_to_score[snippet] for snippet in url_to_snippets[url]
+            }
 
             # Set the query in metadata
             if selected_url_to_info[url].meta is None:
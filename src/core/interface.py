@@ -19,6 +19,7 @@ class Engine(ABC):
         self.time = {}
         self.lm_cost = {}
         self.rm_cost = {}
+        self.lm_governor_metrics = {}
 
     def log_execution_time_and_lm_rm_usage(self, func):
         """Decorator to log the execution time, language model usage, and retrieval model usage of a function."""
@@ -32,6 +33,9 @@ class Engine(ABC):
             self.time[func.__name__] = execution_time
             logger.info(f"{func.__name__} executed in {execution_time:.4f} seconds")
             self.lm_cost[func.__name__] = self.lm_configs.collect_and_reset_lm_usage()
+            self.lm_governor_metrics[func.__name__] = (
+                self.lm_configs.collect_and_reset_governor_metrics()
+            )
             if hasattr(self, "retriever"):
                 self.rm_cost[func.__name__] = (
                     self.retriever.collect_and_reset_rm_usage()
@@ -83,6 +87,12 @@ class Engine(ABC):
             for model_name, tokens in v.items():
                 logger.info(f"    {model_name}: {tokens}")
 
+        logger.info("***** Request queueing of language models: *****")
+        for k, v in self.lm_governor_metrics.items():
+            logger.info(f"{k}")
+            for deployment, metrics in v.items():
+                logger.info(f"    {deployment}: {metrics}")
+
         logger.info("***** Number of queries of retrieval models: *****")
         for k, v in self.rm_cost.items():
             logger.info(f"{k}: {v}")
@@ -91,3 +101,4 @@ class Engine(ABC):
         self.time = {}
         self.lm_cost = {}
         self.rm_cost = {}
+        self.lm_governor_metrics = {}
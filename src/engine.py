@@ -13,6 +13,7 @@ from .core.article import Article
 from .core.callback import BaseCallbackHandler
 
 from .utils.file_handler import FileIOHelper
+from .utils.gather_info_log import GatherInfoLog
 from .utils.text_processing import truncate_filename
 from .utils.text_processing import makeStringRed
 from .utils.logger import setup_logging, get_logger
@@ -101,6 +102,36 @@ class RunnerArguments:
         default=None,
         metadata={"help": "Random seed for deterministic execution"},
     )
+    examiner_batch_size: int = field(
+        default=8,
+        metadata={
+            "help": "Number of snippets judged per snippet examiner call. Set to 1 for one call per snippet."
+        },
+    )
+    examiner_accept_threshold: Optional[float] = field(
+        default=None,
+        metadata={
+            "help": "Snippets with a retrieval similarity at or above this value are kept without an LLM call."
+        },
+    )
+    examiner_reject_threshold: Optional[float] = field(
+        default=None,
+        metadata={
+            "help": "Snippets with a retrieval similarity below this value are dropped without an LLM call."
+        },
+    )
+    async_mode: bool = field(
+        default=False,
+        metadata={
+            "help": "Build knowledge graph subgraphs by awaiting LM calls with litellm's async completion instead of thread pools."
+        },
+    )
+    parallel_review: bool = field(
+        default=True,
+        metadata={
+            "help": "Review the subsections of the article concurrently, within the max_thread_num LLM call limit shared across sections."
+        },
+    )
 
 
 class Runner(Engine):
@@ -130,6 +161,7 @@ class Runner(Engine):
             retriever=self.retriever,
             max_depth=self.args.depth,
             config_base_dir=self.args.output_dir,
+            async_mode=self.args.async_mode,
         )
         self.outline_generation_agent = OutlineGenerationAgent(
             lm=self.lm_configs.outline_gen_lm,
@@ -140,6 +172,10 @@ class Runner(Engine):
             article_reviewer_lm=self.lm_configs.article_reviewer_lm,
             retrieve_top_k=self.args.retrieve_top_k,
             max_thread_num=self.args.max_thread_num,
+            examiner_batch_size=self.args.examiner_batch_size,
+            examiner_accept_threshold=self.args.examiner_accept_threshold,
+            examiner_reject_threshold=self.args.examiner_reject_threshold,
+            parallel_review=self.args.parallel_review,
         )
         self.apollo_article_polishing_agent = ApolloArticlePolishingAgent(
             article_writer_lm=self.lm_configs.article_writer_lm,
@@ -209,7 +245,7 @@ class Runner(Engine):
         callback_handler: BaseCallbackHandler = None,
     ) -> Article:
 
-        draft_article = self.article_generation_agent.generate_article(
+        generate_kwargs = dict(
             topic=self.topic,
             knowledge_base=knowledge_base,
             article_with_outline=outline,
@@ -217,6 +253,9 @@ class Runner(Engine):
             article_output_dir=self.draft_article_output_dir,
             ground_truth_url=ground_truth_url,
         )
+        draft_article = self.article_generation_agent.generate_article(
+            **generate_kwargs
+        )
         # draft_article.dump_reference_to_file(
         #     os.path.join(self.draft_article_output_dir, "url_to_info.json")
         # )
@@ -284,7 +323,7 @@ class Runner(Engine):
         self,
         knowledge_base_local_path,
     ):
-        assert os.path.exists(knowledge_base_local_path), makeStringRed(
+        assert GatherInfoLog(knowledge_base_local_path).exists(), makeStringRed(
             f"{knowledge_base_local_path} not exists. Please set --do-research argument to prepare the gather_info.json for this topic."
         )
         return KnowledgeBase.from_gather_info_log_file(knowledge_base_local_path)
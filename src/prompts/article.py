@@ -51,6 +51,28 @@ Output:
 - Reply ONLY with 'yes' or 'no' to indicate whether the snippet is relevant to the section. Do not provide any other information or explanation.
 """
 
+PROMPTS[
+    "batch_verifier_prompt_v1"
+] = """
+You are a thorugough Wikipedia reviewer that needs to check whether each of the provided snippets is relevant to explain the section provided about the topic.
+
+The snippets are numbered as `[index] snippet`. Judge every snippet independently. A snippet is relevant only if it meets BOTH criteria:
+1. Be relevant to the section theme
+2. Actually mention or discuss the main topic
+
+Example:
+- Topic: "Neural Networks"
+- Section: "Backpropagation"
+- Snippets:
+[1] Backpropagation is an algorithm used to train neural networks by adjusting weights based on the error gradient.
+[2] Neural networks are computational models inspired by the human brain.
+- Verdicts: {"1": "yes", "2": "no"}
+
+
+Output:
+- Reply ONLY with a JSON object mapping every snippet index to 'yes' or 'no'. Do not provide any other information or explanation.
+"""
+
 ##################################################
 #               ARTICLE WRITER
 ##################################################
@@ -4,16 +4,18 @@ import sys
 import time
 import json
 import dspy
+import asyncio
 import argparse
+import threading
 from tqdm import tqdm
 from pathlib import Path
 from itertools import chain
 from omegaconf import OmegaConf
 from collections import defaultdict
-from typing import List, Tuple, Optional, Dict, Any
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Tuple, Optional, Dict, Any, Union
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 
-from pipeline.apollo.src import LLM
+from pipeline.apollo.src import LLM, LLMResponseCache, apredict
 from pipeline.apollo.src import VectorRM, Retriever
 from pipeline.apollo.src.prompts.graph import PROMPTS
 from pipeline.apollo.src.core.information import Information
@@ -21,13 +23,20 @@ from pipeline.apollo.src.core.information import KnowledgeBase
 from pipeline.apollo.src.agents.outline_generator import OutlineGenerationAgent
 
 from pipeline.apollo.src.utils.resolver_kg import (
-    validate_knowledge_graph,
+    KGData,
+    parse_knowledge_graph,
     extract_groups,
 )
-from pipeline.apollo.src.utils.info_diversity import eval_info_diversity_per_depth
+from pipeline.apollo.src.utils.info_diversity import InfoDiversityTracker
 from pipeline.apollo.src.utils.file_handler import load_json, dump_json
+from pipeline.apollo.src.utils.gather_info_log import GatherInfoLog
 from pipeline.apollo.src.utils.outline_token_limit import inspect_outline_token_limit
-from pipeline.apollo.src.utils.common import get_device, load_domains
+from pipeline.apollo.src.utils.common import (
+    get_device,
+    load_domains,
+    run_coroutine,
+    normalize_url,
+)
 from pipeline.apollo.src.utils.vizualize_kg import plot_kg
 from pipeline.apollo.src.utils.logger import setup_logging, get_logger, add_file_logging
 
@@ -41,48 +50,103 @@ def exit():
     sys.exit(0)
 
 
-class Config:
-    """Configuration class for the pipeline."""
+class RunContext:
+    """Settings and output paths of one knowledge graph build.
 
-    @classmethod
-    def setup(
-        cls,
-        topic,
+    Created per topic and passed to KnowledgeGraph and its modules, so topics
+    built concurrently in one process never share paths. The sections of
+    apollo.yaml (e.g. ablation, metrics) are readable as attributes.
+    """
+
+    def __init__(
+        self,
+        topic: str,
         base_dir="tmp",
         config_path=f"{config_dir}/apollo.yaml",
     ):
-        cfg = OmegaConf.load(config_path)
-        cls.cfg = cfg
-
-        # Loads attributes whithin config.yaml
-        for section_name, section_value in cfg.items():
-            setattr(cls, section_name, section_value)
+        self.cfg = OmegaConf.load(config_path)
 
-        cls.topic = topic
-        cls.topic_name = cls.topic.replace(" ", "_")
+        self.topic = topic
+        self.topic_name = self.topic.replace(" ", "_")
 
-        cls.lm_model = cls.lm.default
-        cls.lm_max_tokens = cls.lm.max_tokens[cls.lm_model]
+        self.lm_model = self.cfg.lm.default
+        self.lm_max_tokens = self.cfg.lm.max_tokens[self.lm_model]
 
-        cls.search_top_k = cls.knowledge_curation.search_top_k
-        cls.retrieve_top_k = cls.knowledge_curation.retrieve_top_k
+        self.search_top_k = self.cfg.knowledge_curation.search_top_k
+        self.retrieve_top_k = self.cfg.knowledge_curation.retrieve_top_k
+        # One of vizualize_kg.VIZ_POLICIES, deferred keeps pyvis off the worker threads
+        self.viz_policy = OmegaConf.select(
+            self.cfg, "visualization.policy", default="deferred"
+        )
 
-        cls.base_dir = Path(base_dir or cfg.paths.base_dir)
+        self.base_dir = Path(base_dir or self.cfg.paths.base_dir)
         # time_stamp = datetime.datetime.now().strftime("%y%m%d-%H%M%S")
-        # cls.topic_dir = cls.base_dir / f"{cls.topic_name}_{time_stamp}"
-        cls.topic_dir = cls.base_dir / cls.topic_name
-        cls.kg_dir = cls.topic_dir / "kg"
-        cls.states_dir = cls.kg_dir / "States"
+        # self.topic_dir = self.base_dir / f"{self.topic_name}_{time_stamp}"
+        self.topic_dir = self.base_dir / self.topic_name
+        self.kg_dir = self.topic_dir / "kg"
+        self.states_dir = self.kg_dir / "States"
 
         subdirs = {
-            "base_dir": cls.base_dir,
-            "topic_dir": cls.topic_dir,
-            "kg_dir": cls.topic_dir,
-            "states_dir": cls.states_dir,
+            "base_dir": self.base_dir,
+            "topic_dir": self.topic_dir,
+            "kg_dir": self.topic_dir,
+            "states_dir": self.states_dir,
         }
         for _, dir_path in subdirs.items():
             dir_path.mkdir(parents=True, exist_ok=True)
 
+    def __getattr__(self, name):
+        # Only called for names that are not set on the instance: look in apollo.yaml
+        cfg = self.__dict__.get("cfg")
+        if cfg is not None and not name.startswith("_") and name in cfg:
+            return cfg[name]
+        raise AttributeError(name)
+
+    def as_dict(self) -> Dict[str, Any]:
+        settings = {name: value for name, value in self.cfg.items()}
+        settings.update(self.__dict__)
+        return settings
+
+
+class ConfigMeta(type):
+    """Resolve Config attributes from the context of the current thread first.
+
+    Kept for code that still reads Config: threads that never called setup see
+    the class-level values of the latest setup.
+    """
+
+    _local = threading.local()
+
+    def __getattribute__(cls, name):
+        if not name.startswith("_"):
+            local = type.__getattribute__(cls, "_local")
+            context = getattr(local, "context", None)
+            if context is not None:
+                try:
+                    return getattr(context, name)
+                except AttributeError:
+                    pass
+        return type.__getattribute__(cls, name)
+
+
+class Config(metaclass=ConfigMeta):
+    """Compatibility shim over RunContext for code reading class-level settings."""
+
+    @classmethod
+    def setup(
+        cls,
+        topic,
+        base_dir="tmp",
+        config_path=f"{config_dir}/apollo.yaml",
+    ) -> RunContext:
+        context = RunContext(topic=topic, base_dir=base_dir, config_path=config_path)
+
+        cls._local.context = context
+        for name, value in context.as_dict().items():
+            setattr(cls, name, value)
+
+        return context
+
 
 class BaseModule(dspy.Module):
     """Base class for all modules in the pipeline."""
@@ -96,19 +160,59 @@ class BaseModule(dspy.Module):
         depth: int = 0,
         max_thread_num: int = 8,
         seed: int = None,
+        resume: bool = False,
+        context: Optional[RunContext] = None,
     ):
         super().__init__()
         self.lm = lm
+        self.context = context or Config
         self.seed = seed
+        self.resume = resume
         self.prompt_name = prompt_name
         self.prompt_version = prompt_version
         self.prompt_key = f"{self.prompt_name}_{self.prompt_version}"
         self.max_thread_num = max_thread_num
 
         depth_str = f"depth_{depth}"
-        self.output_dir: Path = Config.kg_dir / results_dir / depth_str / prompt_version
+        self.output_dir: Path = (
+            self.context.kg_dir / results_dir / depth_str / prompt_version
+        )
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
+    def plot_kg(self, kg_data, html_path: str, final: bool = False, verbose: bool = False):
+        """Save kg_data as JSON and render it following the visualization policy of the run"""
+        plot_kg(
+            kg_data,
+            output_file=html_path,
+            port=8086,
+            verbose=verbose,
+            policy=self.context.viz_policy,
+            final=final,
+        )
+
+    def load_checkpoint(self, json_path: str) -> Optional[Any]:
+        """Load an output saved by a previous run when resuming"""
+        if not self.resume or not os.path.exists(json_path):
+            return None
+        try:
+            return load_json(json_path)
+        except (OSError, json.JSONDecodeError):
+            logger.warning(f"Ignoring unreadable checkpoint: {json_path}")
+            return None
+
+    def invalidate_cached_response(self):
+        """Evict the last LM response from the response cache, so a retry asks again"""
+        if hasattr(self.lm, "invalidate_last"):
+            self.lm.invalidate_last()
+
+    def load_subgraph(self, html_path: str) -> Optional[KGData]:
+        """Load a subgraph plotted by a previous run when resuming"""
+        kg_dict = self.load_checkpoint(str(Path(html_path).with_suffix(".json")))
+        if kg_dict is None:
+            return None
+        logger.info(f"Reusing subgraph from checkpoint: {html_path}")
+        return KGData(kg_dict)
+
 
 class GenKG(dspy.Signature):
     """Default System Prompt"""
@@ -150,45 +254,90 @@ class GraphGenerator(BaseModule):
         logger.info("GraphGenerator initialized!")
         self.kg_builder = dspy.Predict(GenKG)
 
-    def forward(
-        self,
-        snippets: List[str],
-        skip: bool = False,
-        verbose: bool = False,
-    ) -> Tuple[List[Dict], List[Dict]]:
-        if skip:
-            return [], []
-
-        GenKG.__doc__ = PROMPTS[self.prompt_key].format(
-            topic=snippets[0].title,
+    def set_prompt(self, snippets: List[Information]):
+        # A signature of this instance, topics built in parallel must not share the prompt
+        self.kg_builder = dspy.Predict(
+            GenKG.with_instructions(
+                PROMPTS[self.prompt_key].format(topic=snippets[0].title)
+            )
         )
 
+    def process_snippet(
+        self,
+        i: int,
+        info: Information,
+        verbose: bool = False,
+    ) -> Tuple[int, KGData, Dict]:
+        """Build and validate the subgraph of a single snippet"""
         file_prefix = self.output_dir / self.prompt_key
+        info_number = (getattr(info, "number", None) or i) + 1
+        html_path = f"{str(file_prefix)}_snippet_{info_number}.html"
 
-        def process_snippet(i, info):
+        kg_dict = self.load_subgraph(html_path)
+        if kg_dict is None:
             with dspy.settings.context(lm=self.lm):
                 kg_dict = self.kg_builder(
                     topic=info.title,
                     snippet=info.snippets,
                 ).kg_dict
-                kg_dict = validate_knowledge_graph(kg_dict)
+                kg_dict = parse_knowledge_graph(kg_dict)
+
+            self.plot_kg(kg_dict, html_path, verbose=verbose)
+
+        kg_group = extract_groups(kg_dict)
+        json_path = f"{str(file_prefix)}_snippet_{info_number}_group.json"
+        dump_json(obj=kg_group, path=json_path)
+
+        return i, kg_dict, kg_group
+
+    async def aprocess_snippet(
+        self,
+        i: int,
+        info: Information,
+        verbose: bool = False,
+    ) -> Tuple[int, KGData, Dict]:
+        """Coroutine variant of process_snippet"""
+        file_prefix = self.output_dir / self.prompt_key
+        info_number = (getattr(info, "number", None) or i) + 1
+        html_path = f"{str(file_prefix)}_snippet_{info_number}.html"
+
+        kg_dict = self.load_subgraph(html_path)
+        if kg_dict is None:
+            kg_dict = (
+                await apredict(
+                    self.kg_builder,
+                    self.lm,
+                    topic=info.title,
+                    snippet=info.snippets,
+                )
+            ).kg_dict
+            kg_dict = await asyncio.to_thread(parse_knowledge_graph, kg_dict)
 
-            info_number = (getattr(info, "number", None) or i) + 1
-            html_path = f"{str(file_prefix)}_snippet_{info_number}.html"
-            plot_kg(kg_dict, output_file=html_path, port=8086, verbose=verbose)
+            await asyncio.to_thread(self.plot_kg, kg_dict, html_path, verbose=verbose)
 
-            kg_group = extract_groups(kg_dict)
-            json_path = f"{str(file_prefix)}_snippet_{info_number}_group.json"
-            dump_json(obj=kg_group, path=json_path)
+        kg_group = extract_groups(kg_dict)
+        json_path = f"{str(file_prefix)}_snippet_{info_number}_group.json"
+        dump_json(obj=kg_group, path=json_path)
 
-            return i, kg_dict, kg_group
+        return i, kg_dict, kg_group
+
+    def forward(
+        self,
+        snippets: List[str],
+        skip: bool = False,
+        verbose: bool = False,
+    ) -> Tuple[List[KGData], List[Dict]]:
+        if skip:
+            return [], []
+
+        self.set_prompt(snippets)
 
         subGraphs = [None] * len(snippets)
         subGroups = [None] * len(snippets)
 
         with ThreadPoolExecutor(max_workers=self.max_thread_num) as executor:
             futures = [
-                executor.submit(process_snippet, i, snippet)
+                executor.submit(self.process_snippet, i, snippet, verbose)
                 for i, snippet in enumerate(snippets)
             ]
             for future in as_completed(futures):
@@ -239,40 +388,91 @@ class HierarchyGenerator(BaseModule):
         logger.info("GraphHierarchy initialized!")
         self.kg_hierarchy = dspy.Predict(GenHierarchy)
 
+    def set_prompt(self):
+        self.kg_hierarchy = dspy.Predict(
+            GenHierarchy.with_instructions(PROMPTS[self.prompt_key])
+        )
+
+    def process_graph(
+        self,
+        i: int,
+        kg_for_hierarchy: KGData,
+        kg_group: Dict,
+        verbose: bool = False,
+    ) -> Tuple[int, KGData]:
+        """Build the hierarchy of a single subgraph"""
+        file_prefix = self.output_dir / self.prompt_key
+        html_path = f"{str(file_prefix)}_snippet_{i+1}.html"
+
+        kg_hierarchy = self.load_subgraph(html_path)
+        if kg_hierarchy is not None:
+            return i, kg_hierarchy
+
+        kg_for_hierarchy = KGData.coerce(kg_for_hierarchy)
+        if kg_group:
+            with dspy.settings.context(lm=self.lm):
+                kg_hierarchy = self.kg_hierarchy(
+                    kg=kg_for_hierarchy.to_json(),
+                    kg_group=kg_group,
+                ).kg_dict
+                kg_hierarchy = parse_knowledge_graph(kg_hierarchy)
+        else:
+            kg_hierarchy = kg_for_hierarchy
+
+        self.plot_kg(kg_hierarchy, html_path, verbose=verbose)
+
+        return i, kg_hierarchy
+
+    async def aprocess_graph(
+        self,
+        i: int,
+        kg_for_hierarchy: KGData,
+        kg_group: Dict,
+        verbose: bool = False,
+    ) -> Tuple[int, KGData]:
+        """Coroutine variant of process_graph"""
+        file_prefix = self.output_dir / self.prompt_key
+        html_path = f"{str(file_prefix)}_snippet_{i+1}.html"
+
+        kg_hierarchy = self.load_subgraph(html_path)
+        if kg_hierarchy is not None:
+            return i, kg_hierarchy
+
+        kg_for_hierarchy = KGData.coerce(kg_for_hierarchy)
+        if kg_group:
+            kg_hierarchy = (
+                await apredict(
+                    self.kg_hierarchy,
+                    self.lm,
+                    kg=kg_for_hierarchy.to_json(),
+                    kg_group=kg_group,
+                )
+            ).kg_dict
+            kg_hierarchy = await asyncio.to_thread(parse_knowledge_graph, kg_hierarchy)
+        else:
+            kg_hierarchy = kg_for_hierarchy
+
+        await asyncio.to_thread(self.plot_kg, kg_hierarchy, html_path, verbose=verbose)
+
+        return i, kg_hierarchy
+
     def forward(
         self,
-        kg_for_hierarchy: List[Dict],
+        kg_for_hierarchy: List[KGData],
         kg_group: List[Dict],
         skip: bool = False,
         verbose: bool = False,
-    ) -> List[Dict]:
+    ) -> List[KGData]:
         if skip:
             return []
 
-        file_prefix = self.output_dir / self.prompt_key
-        GenHierarchy.__doc__ = PROMPTS[self.prompt_key]
-
-        def process_graph(i, kg_for_hierarchy, kg_group):
-            if kg_group:
-                with dspy.settings.context(lm=self.lm):
-                    kg_hierarchy = self.kg_hierarchy(
-                        kg=kg_for_hierarchy,
-                        kg_group=kg_group,
-                    ).kg_dict
-                    kg_hierarchy = validate_knowledge_graph(kg_hierarchy)
-            else:
-                kg_hierarchy = kg_for_hierarchy
-
-            html_path = f"{str(file_prefix)}_snippet_{i+1}.html"
-            plot_kg(kg_hierarchy, output_file=html_path, port=8086, verbose=verbose)
-
-            return i, kg_hierarchy
+        self.set_prompt()
 
         sub_graphs_hierarchy = [None] * len(kg_for_hierarchy)
 
         with ThreadPoolExecutor(max_workers=self.max_thread_num) as executor:
             futures = [
-                executor.submit(process_graph, i, base, group)
+                executor.submit(self.process_graph, i, base, group, verbose)
                 for i, (base, group) in enumerate(zip(kg_for_hierarchy, kg_group))
             ]
             for future in as_completed(futures):
@@ -298,25 +498,33 @@ class HierarchyGenerator(BaseModule):
             graphs: List[Dict] = [load_json(path) for path in subgraphs_paths]
         else:
             load_dir = Path(self.output_dir)
-            graphs = [(json.loads(g) if isinstance(g, str) else g) for g in graphs]
-
-        merged_out_dir = load_dir.parent
-        merged_out_dir.mkdir(parents=True, exist_ok=True)
+            graphs = [KGData.coerce(g).to_dict() for g in graphs]
 
         all_keys = {key for graph in graphs for key in graph}
         merged_graph = {
             key: list(chain.from_iterable(graph.get(key, []) for graph in graphs))
             for key in all_keys
         }
+        return self.save_merged_graph(merged_graph, merged_out_dir=load_dir.parent)
+
+    def extend_merged_graph(self, merged_graph: Dict, graph: Union[KGData, str, Dict]):
+        """Append one subgraph to a merged graph in place"""
+        graph = KGData.coerce(graph).to_dict()
+        for key, values in graph.items():
+            merged_graph.setdefault(key, []).extend(values)
+        return merged_graph
+
+    def save_merged_graph(self, merged_graph: Dict, merged_out_dir: Path = None):
+        merged_out_dir = merged_out_dir or Path(self.output_dir).parent
+        merged_out_dir.mkdir(parents=True, exist_ok=True)
+
         filename = (
             merged_out_dir / f"{self.prompt_name}_{self.prompt_version}_snippet_all"
         )
         merged_html_path = str(filename.with_suffix(".html"))
-        merged_json_path = str(filename.with_suffix(".json"))
 
         # print(f"Saving merged graph to {merged_html_path}")
-        dump_json(obj=merged_graph, path=merged_json_path)
-        plot_kg(merged_graph, output_file=merged_html_path, port=8086)
+        self.plot_kg(merged_graph, merged_html_path, final=True)
 
         return merged_graph
 
@@ -367,6 +575,16 @@ class QuestionsGenerator(BaseModule):
             body = "   - None yet"
         return f"```questions_already_explored\n{body}\n```"
 
+    def set_prompt(self, topic: str, questions_seen: List[str]):
+        self.question_generator = dspy.Predict(
+            AskQuestion.with_instructions(
+                PROMPTS[self.prompt_key].format(
+                    topic=topic,
+                    questions_seen=self.format_seen(questions_seen),
+                )
+            )
+        )
+
     def forward(
         self,
         kg: Dict,
@@ -378,23 +596,69 @@ class QuestionsGenerator(BaseModule):
         if skip:
             return []
 
-        graph = json.loads(kg) if isinstance(kg, str) else kg
+        questions = self.load_questions()
+        if questions is not None:
+            return questions
 
-        AskQuestion.__doc__ = PROMPTS[self.prompt_key].format(
-            topic=topic,
-            questions_seen=self.format_seen(questions_seen),
-        )
+        self.set_prompt(topic, questions_seen)
 
         with dspy.settings.context(lm=self.lm):
             questions: str = self.question_generator(
-                kg=graph,
+                kg=json.loads(kg) if isinstance(kg, str) else kg,
                 topic=topic,
             ).queries
 
-        question_dict = json.loads(questions)
-        file_prefix = self.output_dir / self.prompt_key
-        question_path = f"{str(file_prefix)}_kg.json"
-        dump_json(obj=question_dict, path=question_path)
+        return self.save_questions(questions)
+
+    async def aforward(
+        self,
+        kg: Dict,
+        questions_seen: List[str],
+        topic: str,
+        from_checkpoint=False,
+        skip: bool = False,
+    ) -> List[str]:
+        """Coroutine variant of forward"""
+        if skip:
+            return []
+
+        questions = self.load_questions()
+        if questions is not None:
+            return questions
+
+        self.set_prompt(topic, questions_seen)
+
+        questions: str = (
+            await apredict(
+                self.question_generator,
+                self.lm,
+                kg=json.loads(kg) if isinstance(kg, str) else kg,
+                topic=topic,
+            )
+        ).queries
+
+        return self.save_questions(questions)
+
+    @property
+    def question_path(self) -> str:
+        return f"{str(self.output_dir / self.prompt_key)}_kg.json"
+
+    def load_questions(self) -> Optional[str]:
+        """Return the questions saved by a previous run when resuming"""
+        question_dict = self.load_checkpoint(self.question_path)
+        if question_dict is None:
+            return None
+        logger.info(f"Reusing questions from checkpoint: {self.question_path}")
+        return json.dumps(question_dict)
+
+    def save_questions(self, questions: str) -> str:
+        """Check that the generated questions are JSON and save them"""
+        try:
+            question_dict = json.loads(questions)
+        except json.JSONDecodeError:
+            self.invalidate_cached_response()
+            raise
+        dump_json(obj=question_dict, path=self.question_path)
 
         return questions
 
@@ -428,10 +692,7 @@ class QuestionsGenerator(BaseModule):
         out_dir.mkdir(parents=True, exist_ok=True)
         file_prefix = out_dir / self.prompt_key
 
-        AskQuestion.__doc__ = PROMPTS[self.prompt_key].format(
-            topic=topic,
-            questions_seen=self.format_seen(questions_seen),
-        )
+        self.set_prompt(topic, questions_seen)
 
         def process_graph(i, kg):
             with dspy.settings.context(lm=self.lm):
@@ -574,7 +835,7 @@ class NormalizeKG(BaseModule):
         normalized_kg, clusters = self.normalized_kg(kg, kg_dir)
         if not eval_lm:
             html_path = f"{str(file_prefix)}_snippet_.html"
-            plot_kg(normalized_lm_kg, output_file=html_path, port=8086)
+            self.plot_kg(normalized_lm_kg, html_path, final=True)
             return normalized_kg
 
         if from_checkpoint:
@@ -589,8 +850,10 @@ class NormalizeKG(BaseModule):
         file_prefix = out_dir / self.prompt_key
         file_prefix.mkdir(parents=True, exist_ok=True)
 
-        ClusterEntities.__doc__ = PROMPTS[self.prompt_key].format(
-            topic=topic,
+        self.cluster_generator = dspy.ChainOfThought(
+            ClusterEntities.with_instructions(
+                PROMPTS[self.prompt_key].format(topic=topic)
+            )
         )
 
         entities = normalized_kg["nodes"]
@@ -600,7 +863,7 @@ class NormalizeKG(BaseModule):
         normalized_lm_kg = self.apply_lm_clusters(normalized_kg, lm_clusters)
 
         html_path = f"{str(file_prefix)}_snippet_.html"
-        plot_kg(normalized_lm_kg, output_file=html_path, port=8086)
+        self.plot_kg(normalized_lm_kg, html_path, final=True)
         return normalized_lm_kg
 
 
@@ -664,11 +927,11 @@ class ReflectQueries(BaseModule):
         if skip:
             return []
 
-        QuestionToQuery.__doc__ = PROMPTS[self.prompt_key].format(
-            queries_seen=self.format_seen(queries_seen),
-            audience=AUDIENCE["researchers"],
-            topic=topic,
-        )
+        queries = self.load_queries()
+        if queries is not None:
+            return queries
+
+        self.set_prompt(topic, queries_seen)
 
         with dspy.settings.context(lm=self.lm):
             queries = self.query_reflector(
@@ -676,16 +939,73 @@ class ReflectQueries(BaseModule):
                 questions=questions,
             ).queries
 
+        return self.save_queries(queries)
+
+    async def aforward(
+        self,
+        topic: str,
+        queries_seen: List[str],
+        questions: str,
+        from_checkpoint: bool = False,
+        skip: bool = False,
+    ) -> Dict:
+        """Coroutine variant of forward"""
+        if skip:
+            return []
+
+        queries = self.load_queries()
+        if queries is not None:
+            return queries
+
+        self.set_prompt(topic, queries_seen)
+
+        queries = (
+            await apredict(
+                self.query_reflector,
+                self.lm,
+                topic=topic,
+                questions=questions,
+            )
+        ).queries
+
+        return self.save_queries(queries)
+
+    def set_prompt(self, topic: str, queries_seen: List[str]):
+        self.query_reflector = dspy.Predict(
+            QuestionToQuery.with_instructions(
+                PROMPTS[self.prompt_key].format(
+                    queries_seen=self.format_seen(queries_seen),
+                    audience=AUDIENCE["researchers"],
+                    topic=topic,
+                )
+            )
+        )
+
+    @property
+    def query_path(self) -> str:
+        return f"{str(self.output_dir / self.prompt_key)}_queries.json"
+
+    def load_queries(self) -> Optional[List[str]]:
+        """Return the queries saved by a previous run when resuming"""
+        queries_data = self.load_checkpoint(self.query_path)
+        if queries_data is None:
+            return None
+        logger.info(f"Reusing reflected queries from checkpoint: {self.query_path}")
+        return queries_data.get("combined_queries", [])
+
+    def save_queries(self, queries) -> List[str]:
+        """Parse the reflected queries, save them and return the combined list"""
         if isinstance(queries, str):
-            queries_data = json.loads(queries)
+            try:
+                queries = json.loads(queries)
+            except json.JSONDecodeError:
+                self.invalidate_cached_response()
+                raise
 
-        file_prefix = self.output_dir / self.prompt_key
-        query_path = f"{str(file_prefix)}_queries.json"
-        logger.info(f"Saving reflected queries to {query_path}")
-        dump_json(obj=queries_data, path=query_path)
+        logger.info(f"Saving reflected queries to {self.query_path}")
+        dump_json(obj=queries, path=self.query_path)
 
-        queries_list = queries_data.get("combined_queries", [])
-        return queries_list
+        return queries.get("combined_queries", [])
 
 
 class KnowledgeGraph:
@@ -695,12 +1015,31 @@ class KnowledgeGraph:
         retriever: Retriever,
         max_depth: int = 4,
         config_base_dir: str = None,
+        batch_retrieval: bool = True,
+        stream_snippets: bool = True,
+        max_thread_num: int = 8,
+        resume: bool = False,
+        async_mode: bool = False,
+        normalize_urls: bool = True,
+        viz_policy: Optional[str] = None,
     ):
         self.lm = lm
         self.retriever = retriever
         self.max_depth = max_depth
         self.current_depth = 0
         self.config_base_dir = config_base_dir
+        self.batch_retrieval = batch_retrieval
+        self.stream_snippets = stream_snippets
+        self.max_thread_num = max_thread_num
+        self.resume = resume
+        self.async_mode = async_mode
+        # Match near-duplicate URLs (scheme, trailing slash, fragment) when de-duplicating results
+        self.normalize_urls = normalize_urls
+        self.seen_urls = set()
+        # Overrides visualization.policy of apollo.yaml when set
+        self.viz_policy = viz_policy
+        # Settings and output paths of the topic being built, set by build_kg
+        self.context: Optional[RunContext] = None
 
     def init_knowledge_base(self, topic):
 
@@ -720,23 +1059,103 @@ class KnowledgeGraph:
         for i in range(self.max_depth + 1):
             self.gather_info["queries_by_depth"][str(i)] = []
 
+        self.gather_info_path = self.context.topic_dir / "gather_info.json"
+        self.gather_info_log = GatherInfoLog(self.gather_info_path)
+        self.seen_urls = set()
+
     def save_gather_info(self):
-        self.gather_info_path = Config.topic_dir / "gather_info.json"
-        dump_json(obj=self.gather_info, path=self.gather_info_path)
+        """Compact the query journal into gather_info.json, called at depth boundaries"""
+        self.gather_info_log.compact(self.gather_info)
+
+    def load_gather_info(self) -> bool:
+        """Load the gather_info saved by a previous run of the same topic"""
+        if not self.gather_info_log.exists():
+            return False
+
+        gather_info = self.gather_info_log.load(self.gather_info)
+        for i in range(self.max_depth + 1):
+            gather_info["queries_by_depth"].setdefault(str(i), [])
+        gather_info["max_depth"] = self.max_depth
+        self.gather_info = gather_info
+        self.rebuild_url_index()
+        return True
+
+    def url_key(self, url: str) -> str:
+        return normalize_url(url) if self.normalize_urls else url
+
+    def rebuild_url_index(self):
+        """Rebuild the index of recorded URLs from gather_info, only needed on resume"""
+        self.seen_urls = set()
+        for queries_data in self.gather_info["queries_by_depth"].values():
+            for query_data in queries_data:
+                for result in query_data.get("search_results", []):
+                    url = result.get("url", "")
+                    if url:
+                        self.seen_urls.add(self.url_key(url))
+
+    def find_last_completed_depth(self) -> Optional[int]:
+        """Return the highest depth with a saved KG state, if any"""
+        depths = []
+        for kg_file in self.context.states_dir.glob("kg_depth_*.json"):
+            suffix = kg_file.stem.rsplit("_", 1)[-1]
+            if suffix.isdigit():
+                depths.append(int(suffix))
+        return max(depths) if depths else None
+
+    def resume_from_checkpoint(self):
+        """Restore gather_info and the current depth from a previous run"""
+        if self.load_gather_info():
+            logger.info(f"Resuming from gather_info at: {self.gather_info_path}")
+
+        last_depth = self.find_last_completed_depth()
+        if last_depth is None:
+            logger.info("No KG state found, starting from the seed graph")
+            self.current_depth = 0
+            return
+
+        self.current_depth = last_depth
+        self.gather_info["current_depth"] = last_depth
+        logger.info(f"Resuming KG build from completed depth {last_depth}")
+
+    def replay_gather_info(
+        self, depth: int, queries: List[str]
+    ) -> Tuple[List[Information], List[str]]:
+        """Split queries into results already recorded at depth and queries to retrieve"""
+        recorded = {
+            query_data["query"]: query_data
+            for query_data in self.gather_info["queries_by_depth"][str(depth)]
+        }
+        if not recorded:
+            return [], list(queries)
+
+        replayed, missing = [], []
+        for query in queries:
+            if query not in recorded:
+                missing.append(query)
+                continue
+            for result in recorded[query].get("search_results", []):
+                info = Information.from_dict(result)
+                info.meta["query"] = query
+                replayed.append(info)
+
+        logger.info(
+            f"Replaying {len(queries) - len(missing)}/{len(queries)} queries already retrieved at depth {depth}"
+        )
+        return replayed, missing
 
     def save_kg_state(self, depth, kg_data):
-        kg_data_path = Config.states_dir / f"kg_depth_{depth}.json"
+        kg_data_path = self.context.states_dir / f"kg_depth_{depth}.json"
         dump_json(obj=kg_data, path=kg_data_path)
         logger.info(f"Knowledge graph state saved to: {kg_data_path}")
 
     def load_kg_state(self, depth):
-        kg_file = Config.states_dir / f"kg_depth_{depth}.json"
+        kg_file = self.context.states_dir / f"kg_depth_{depth}.json"
         if os.path.exists(kg_file):
             return load_json(kg_file)
         return None
 
     def update_gather_info_with_query(self, depth, query, results):
-        """Update gather_info with a new query and its results"""
+        """Update gather_info with a new query and append it to the query journal"""
         query_data = {"query": query, "search_results": []}
 
         for search_result in results:
@@ -749,9 +1168,24 @@ class KnowledgeGraph:
                 "title": getattr(search_result, "title", "Unknown Title"),
             }
             query_data["search_results"].append(result_data)
+            if result_data["url"]:
+                self.seen_urls.add(self.url_key(result_data["url"]))
 
         self.gather_info["queries_by_depth"][str(depth)].append(query_data)
-        self.save_gather_info()
+        self.gather_info_log.append(depth, query_data)
+
+    def eval_info_diversity(self, timing_stats: Dict):
+        """Update the diversity metric with the snippets retrieved since the last call"""
+        start_time = time.time()
+        self.diversity_tracker.update_from_gather_info(self.gather_info)
+        result_eval = self.diversity_tracker.report()
+        result_eval["eval_time"] = time.time() - start_time
+        timing_stats["info_diversity"][f"depth_{self.current_depth}"] = result_eval
+
+        result_eval_pretty = json.dumps(result_eval, indent=2)
+        logger.info(
+            f"Evaluation Information Diversity at Depth: {self.current_depth}\n\n{result_eval_pretty}"
+        )
 
     def print_retrieved_summary(self, depth):
         urls: list[str] = []
@@ -801,73 +1235,295 @@ class KnowledgeGraph:
         return questions
 
     def process_results(self, new_results: List[Information]) -> List[Information]:
-        seen_urls = set()
-        for depth_str, queries_data in self.gather_info["queries_by_depth"].items():
-            for query_data in queries_data:
-                for result in query_data.get("search_results", []):
-                    url = result.get("url", "")
-                    if url:
-                        seen_urls.add(url)
-
+        """Drop results whose URL is already recorded or repeated within new_results"""
+        batch_urls = set()
         updated_results = []
         for result in new_results:
-            if result.url not in seen_urls:
+            key = self.url_key(result.url)
+            if key not in self.seen_urls and key not in batch_urls:
                 updated_results.append(result)
-                seen_urls.add(result.url)
+                batch_urls.add(key)
 
         return updated_results
 
-    def process_snippets(self, snippets, depth=0, do_normalize=False):
-        """Process snippets and create the knowledge graph components"""
+    def retrieve_serial(self, queries: List[str], depth: int) -> List[Information]:
+        """Retrieve the queries one at a time, journaling each one as it completes"""
+        all_snippets = []
+        for i, query in enumerate(queries, 1):
+            logger.info(
+                f"Retrieving information for query ({i}/{len(queries)}): {query}"
+            )
 
-        logger.info(
-            f"\n--- [DEPTH {depth}]: Compiling KG with Information Gathered  ---\n"
+            query_start = time.time()
+            raw_results: List[Information] = self.retriever(
+                query=query,
+                exclude_urls=[self.ground_truth_url],
+                top_k=self.context.search_top_k,
+            )
+            results = self.process_results(raw_results)[: self.context.retrieve_top_k]
+            query_time = time.time() - query_start
+            logger.info(f"Query retrieved {len(results)} results in {query_time:.2f}s")
+
+            all_snippets.extend(results)
+
+            self.update_gather_info_with_query(
+                depth=depth,
+                query=query,
+                results=results,
+            )
+        return all_snippets
+
+    def retrieve_batch(self, queries: List[str], depth: int) -> List[Information]:
+        """Retrieve all queries of a depth together.
+
+        URLs are de-duplicated in query order once every result is back, so the
+        kept results match the ones of the serial loop.
+        """
+        if not queries:
+            return []
+
+        logger.info(f"Retrieving information for {len(queries)} queries in batch")
+        raw_results_per_query: List[List[Information]] = self.retriever(
+            query=list(queries),
+            exclude_urls=[self.ground_truth_url],
+            top_k=self.context.search_top_k,
+            group_by_query=True,
+        )
+        return self.record_batch_results(queries, raw_results_per_query, depth)
+
+    async def aretrieve_batch(self, queries: List[str], depth: int) -> List[Information]:
+        """Coroutine variant of retrieve_batch, awaiting Retriever.acall"""
+        if not queries:
+            return []
+
+        logger.info(f"Retrieving information for {len(queries)} queries in batch")
+        raw_results_per_query: List[List[Information]] = await self.retriever.acall(
+            query=list(queries),
+            exclude_urls=[self.ground_truth_url],
+            top_k=self.context.search_top_k,
+            group_by_query=True,
+        )
+        return await asyncio.to_thread(
+            self.record_batch_results, queries, raw_results_per_query, depth
         )
 
-        # Build subgraphs per snippet
+    def record_batch_results(
+        self,
+        queries: List[str],
+        raw_results_per_query: List[List[Information]],
+        depth: int,
+    ) -> List[Information]:
+        """De-duplicate the results of a batch in query order and journal every query"""
+        all_snippets = []
+        for query, raw_results in zip(queries, raw_results_per_query):
+            results = self.process_results(raw_results)[: self.context.retrieve_top_k]
+            logger.info(f"Query retrieved {len(results)} results: {query}")
+
+            all_snippets.extend(results)
+
+            self.update_gather_info_with_query(
+                depth=depth,
+                query=query,
+                results=results,
+            )
+        return all_snippets
+
+    def stream_subgraphs(
+        self,
+        snippets: List[Information],
+        graph_generator: GraphGenerator,
+        graph_hierarchy_generator: HierarchyGenerator,
+    ) -> Dict:
+        """Run GraphGenerator and HierarchyGenerator as a streaming stage graph.
+
+        A snippet's hierarchy call is submitted as soon as its subgraph is
+        validated, and both stages share one pool bounded by max_thread_num.
+        Hierarchy results are merged as they arrive, following snippet order.
+        """
+        if not snippets:
+            return graph_hierarchy_generator.save_merged_graph(
+                {"nodes": [], "edges": []}
+            )
+
+        graph_generator.set_prompt(snippets)
+        graph_hierarchy_generator.set_prompt()
+
+        sub_graphs_hierarchy = [None] * len(snippets)
+        merged_graph = {}
+        next_to_merge = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_thread_num) as executor:
+            pending = {
+                executor.submit(graph_generator.process_snippet, i, snippet): "graph"
+                for i, snippet in enumerate(snippets)
+            }
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = pending.pop(future)
+                    if stage == "graph":
+                        i, kg_dict, kg_group = future.result()
+                        hierarchy_future = executor.submit(
+                            graph_hierarchy_generator.process_graph,
+                            i,
+                            kg_dict,
+                            kg_group,
+                        )
+                        pending[hierarchy_future] = "hierarchy"
+                        continue
+
+                    i, kg_hierarchy = future.result()
+                    sub_graphs_hierarchy[i] = kg_hierarchy
+                    while (
+                        next_to_merge < len(sub_graphs_hierarchy)
+                        and sub_graphs_hierarchy[next_to_merge] is not None
+                    ):
+                        graph_hierarchy_generator.extend_merged_graph(
+                            merged_graph, sub_graphs_hierarchy[next_to_merge]
+                        )
+                        next_to_merge += 1
+
+        logger.info("Merging subgraphs...")
+        return graph_hierarchy_generator.save_merged_graph(merged_graph)
+
+    async def astream_subgraphs(
+        self,
+        snippets: List[Information],
+        graph_generator: GraphGenerator,
+        graph_hierarchy_generator: HierarchyGenerator,
+    ) -> Dict:
+        """Coroutine variant of stream_subgraphs.
+
+        Each snippet awaits its subgraph and then its hierarchy call, with at
+        most max_thread_num snippets in progress, like the threaded pool.
+        """
+        if not snippets:
+            return graph_hierarchy_generator.save_merged_graph(
+                {"nodes": [], "edges": []}
+            )
+
+        graph_generator.set_prompt(snippets)
+        graph_hierarchy_generator.set_prompt()
+
+        semaphore = asyncio.Semaphore(self.max_thread_num)
+
+        async def process(i, snippet):
+            async with semaphore:
+                i, kg_dict, kg_group = await graph_generator.aprocess_snippet(
+                    i, snippet
+                )
+                return await graph_hierarchy_generator.aprocess_graph(
+                    i, kg_dict, kg_group
+                )
+
+        sub_graphs_hierarchy = await asyncio.gather(
+            *(process(i, snippet) for i, snippet in enumerate(snippets))
+        )
+
+        merged_graph = {}
+        for _, kg_hierarchy in sub_graphs_hierarchy:
+            graph_hierarchy_generator.extend_merged_graph(merged_graph, kg_hierarchy)
+
+        logger.info("Merging subgraphs...")
+        return await asyncio.to_thread(
+            graph_hierarchy_generator.save_merged_graph, merged_graph
+        )
+
+    def subgraph_generators(self, depth: int) -> Tuple[GraphGenerator, HierarchyGenerator]:
+        """Create the subgraph and hierarchy generators of depth"""
         graph_generator = GraphGenerator(
             lm=self.lm,
             prompt_version="v7",
             depth=depth,
+            context=self.context,
+            max_thread_num=self.max_thread_num,
+            resume=self.resume,
         )
-        sub_graphs, sub_groups = graph_generator.forward(
-            snippets=snippets,
-            skip=False,
-        )
-
-        # Build hierarchy graphs
         graph_hierarchy_generator = HierarchyGenerator(
             lm=self.lm,
             prompt_version="v8",
             depth=depth,
+            context=self.context,
+            max_thread_num=self.max_thread_num,
+            resume=self.resume,
         )
-        sub_graphs_hierarchy = graph_hierarchy_generator.forward(
-            kg_for_hierarchy=sub_graphs,
-            kg_group=sub_groups,
-            skip=False,
-        )
+        return graph_generator, graph_hierarchy_generator
 
-        # Merge subgraphs
-        merged_subgraphs = graph_hierarchy_generator.merge_subgraphs(
-            graphs=sub_graphs_hierarchy,
+    def normalize_kg(self, kg: Dict, depth: int) -> Dict:
+        """Merge near-duplicate entities of kg"""
+        normalizer = NormalizeKG(
+            lm=self.lm,
+            prompt_version="v4",
+            depth=depth,
+            context=self.context,
+        )
+        return normalizer.forward(
+            kg=kg,
+            topic=self.topic,
             from_checkpoint=False,
             skip=False,
         )
 
-        # Normalize the graph
-        if do_normalize:
-            normalizer = NormalizeKG(
-                lm=self.lm,
-                prompt_version="v4",
-                depth=depth,
+    def process_snippets(self, snippets, depth=0, do_normalize=False):
+        """Process snippets and create the knowledge graph components"""
+
+        logger.info(
+            f"\n--- [DEPTH {depth}]: Compiling KG with Information Gathered  ---\n"
+        )
+
+        graph_generator, graph_hierarchy_generator = self.subgraph_generators(depth)
+
+        if self.async_mode:
+            merged_subgraphs = run_coroutine(
+                self.astream_subgraphs(
+                    snippets, graph_generator, graph_hierarchy_generator
+                )
             )
-            normalized_kg = normalizer.forward(
-                kg=merged_subgraphs,
-                topic=self.topic,
+        elif self.stream_snippets:
+            merged_subgraphs = self.stream_subgraphs(
+                snippets, graph_generator, graph_hierarchy_generator
+            )
+        else:
+            # Build subgraphs per snippet
+            sub_graphs, sub_groups = graph_generator.forward(
+                snippets=snippets,
+                skip=False,
+            )
+
+            # Build hierarchy graphs
+            sub_graphs_hierarchy = graph_hierarchy_generator.forward(
+                kg_for_hierarchy=sub_graphs,
+                kg_group=sub_groups,
+                skip=False,
+            )
+
+            # Merge subgraphs
+            merged_subgraphs = graph_hierarchy_generator.merge_subgraphs(
+                graphs=sub_graphs_hierarchy,
                 from_checkpoint=False,
                 skip=False,
             )
-            return normalized_kg
+
+        # Normalize the graph
+        if do_normalize:
+            return self.normalize_kg(merged_subgraphs, depth)
+
+        return merged_subgraphs
+
+    async def aprocess_snippets(self, snippets, depth=0, do_normalize=False):
+        """Coroutine variant of process_snippets, always streaming the snippets"""
+
+        logger.info(
+            f"\n--- [DEPTH {depth}]: Compiling KG with Information Gathered  ---\n"
+        )
+
+        graph_generator, graph_hierarchy_generator = self.subgraph_generators(depth)
+        merged_subgraphs = await self.astream_subgraphs(
+            snippets, graph_generator, graph_hierarchy_generator
+        )
+
+        if do_normalize:
+            return await asyncio.to_thread(self.normalize_kg, merged_subgraphs, depth)
 
         return merged_subgraphs
 
@@ -875,71 +1531,141 @@ class KnowledgeGraph:
         """Build the initial knowledge graph (depth 0)"""
 
         init_query = f"What is {self.topic}?"
-        search_results = self.retriever(
-            query=init_query,
-            exclude_urls=[self.ground_truth_url],
-            top_k=5,
-        )
+        search_results, missing_queries = self.replay_gather_info(0, [init_query])
+        if missing_queries:
+            search_results = self.retriever(
+                query=init_query,
+                exclude_urls=[self.ground_truth_url],
+                top_k=5,
+            )
+            self.record_seed_results(init_query, search_results)
+        kg = self.process_snippets(search_results, depth=0)
+        self.save_depth(0, kg)
+
+    async def ainit_seeds_kg(self):
+        """Coroutine variant of init_seeds_kg"""
+
+        init_query = f"What is {self.topic}?"
+        search_results, missing_queries = self.replay_gather_info(0, [init_query])
+        if missing_queries:
+            search_results = await self.retriever.acall(
+                query=init_query,
+                exclude_urls=[self.ground_truth_url],
+                top_k=5,
+            )
+            await asyncio.to_thread(
+                self.record_seed_results, init_query, search_results
+            )
+        kg = await self.aprocess_snippets(search_results, depth=0)
+        await asyncio.to_thread(self.save_depth, 0, kg)
+
+    def record_seed_results(self, init_query: str, search_results: List[Information]):
         logger.info(f"Retrieved {len(search_results)} results for initial query")
         self.update_gather_info_with_query(
             depth=0,
             query=init_query,
             results=search_results,
         )
-        kg = self.process_snippets(search_results, depth=0)
-        self.save_kg_state(depth=0, kg_data=kg)
-
-    def expand_kg(self, depth=None):
 
-        if depth is None:
-            depth = self.current_depth
+    def save_depth(self, depth: int, kg: Dict):
+        """Compact the query journal and save the knowledge graph of depth"""
+        self.save_gather_info()
+        self.save_kg_state(depth=depth, kg_data=kg)
 
+    def load_expansion_base(self, depth: int) -> Optional[Dict]:
+        """Load the knowledge graph of depth to expand"""
         current_kg = self.load_kg_state(depth)
+        if current_kg is None:
+            logger.info(f"No knowledge graph found at depth {depth}")
+            return None
+
         logger.info(
             f"Loaded KG at depth {depth}: {len(current_kg.get('nodes', []))} nodes, {len(current_kg.get('edges', []))} edges"
         )
+        return current_kg
 
-        if current_kg is None:
-            logger.info(f"No knowledge graph found at depth {depth}")
+    def questions_generator(self, depth: int) -> QuestionsGenerator:
+        return QuestionsGenerator(
+            lm=self.lm,
+            prompt_version="v7",
+            depth=depth,
+            context=self.context,
+            resume=self.resume,
+        )
+
+    def query_reflector(self, depth: int) -> Optional[ReflectQueries]:
+        """Create the query reflector of depth, None when the reflection is ablated"""
+        if self.context.ablation.outline.without_reflection:
+            logger.info(
+                f"Skipping query reflection due to ablation setting 'Config.ablation.outline.without_reflection': {self.context.ablation.outline.without_reflection}"
+            )
             return None
 
-        # Generate questions
-        questions_generator = QuestionsGenerator(
+        return ReflectQueries(
             lm=self.lm,
-            prompt_version="v7",
+            prompt_version="v3",
             depth=depth,
+            context=self.context,
+            resume=self.resume,
         )
 
-        kg_graph = {k: current_kg[k] for k in ("nodes", "edges")}
-        questions_seen = current_kg.get("questions_seen", [])
+    def merge_expansion(
+        self,
+        depth: int,
+        current_kg: Dict,
+        new_kg: Dict,
+        new_questions: List[str],
+        new_queries: List[str],
+    ) -> Dict:
+        """Merge the knowledge graph of the new depth into current_kg and save it"""
+        new_depth = depth + 1
+        merged_kg = {
+            "nodes": current_kg.get("nodes", []) + new_kg.get("nodes", []),
+            "edges": current_kg.get("edges", []) + new_kg.get("edges", []),
+            "keywords": current_kg.get("keywords", []) + new_kg.get("keywords", []),
+            "questions": current_kg.get("questions", []) + new_kg.get("questions", []),
+            "questions_seen": current_kg.get("questions_seen", []) + new_questions,
+            "queries_seen": current_kg.get("queries_seen", []) + new_queries,
+        }
+
+        logger.info(
+            f"Merged KG at depth {new_depth}: {len(merged_kg.get('nodes', []))} nodes, {len(merged_kg.get('edges', []))} edges"
+        )
+
+        self.save_depth(new_depth, merged_kg)
+        self.current_depth = new_depth
+
+        return merged_kg
+
+    def expand_kg(self, depth=None):
+
+        if depth is None:
+            depth = self.current_depth
+
+        current_kg = self.load_expansion_base(depth)
+        if current_kg is None:
+            return None
 
-        questions: str = questions_generator.forward(
+        # Generate questions
+        kg_graph = {k: current_kg[k] for k in ("nodes", "edges")}
+        questions: str = self.questions_generator(depth).forward(
             kg=kg_graph,
-            questions_seen=questions_seen,
+            questions_seen=current_kg.get("questions_seen", []),
             topic=self.topic,
             from_checkpoint=False,
             skip=False,
         )
         new_questions: List[str] = self.extract_question_list(questions)
 
-        if Config.ablation.outline.without_reflection:
-            logger.info(
-                f"Skipping query reflection due to ablation setting 'Config.ablation.outline.without_reflection': {Config.ablation.outline.without_reflection}"
-            )
+        # Generate queries
+        query_reflector = self.query_reflector(depth)
+        if query_reflector is None:
             queries: List[str] = new_questions
             new_queries: List[str] = []
-
         else:
-            # Generate queries
-            queries_seen = current_kg.get("queries_seen", [])
-            query_reflector = ReflectQueries(
-                lm=self.lm,
-                prompt_version="v3",
-                depth=depth,
-            )
             queries: List[str] = query_reflector.forward(
                 topic=self.topic,
-                queries_seen=queries_seen,
+                queries_seen=current_kg.get("queries_seen", []),
                 questions=questions,
                 from_checkpoint=False,
                 skip=False,
@@ -947,54 +1673,83 @@ class KnowledgeGraph:
             new_queries: List[str] = queries
 
         # Retrieve information for new depth
-        all_snippets = []
         new_depth = depth + 1
         retrieval_start = time.time()
-        for i, query in enumerate(queries, 1):
-            logger.info(
-                f"Retrieving information for query ({i}/{len(queries)}): {query}"
-            )
+        all_snippets, missing_queries = self.replay_gather_info(new_depth, queries)
+        if self.batch_retrieval:
+            all_snippets += self.retrieve_batch(missing_queries, depth=new_depth)
+        else:
+            all_snippets += self.retrieve_serial(missing_queries, depth=new_depth)
+        total_time = time.time() - retrieval_start
+        self.print_retrieval_timing(queries, total_time)
 
-            query_start = time.time()
-            raw_results: List[Information] = self.retriever(
-                query=query,
-                exclude_urls=[self.ground_truth_url],
-                top_k=Config.search_top_k,
-            )
-            results = self.process_results(raw_results)[: Config.retrieve_top_k]
-            query_time = time.time() - query_start
-            logger.info(f"Query retrieved {len(results)} results in {query_time:.2f}s")
+        # Create sub-graphs from the retrieved snippets
+        new_kg = self.process_snippets(all_snippets, depth=new_depth)
 
-            all_snippets.extend(results)
+        return self.merge_expansion(
+            depth, current_kg, new_kg, new_questions, new_queries
+        )
 
-            self.update_gather_info_with_query(
-                depth=new_depth,
-                query=query,
-                results=results,
+    async def aexpand_kg(self, depth=None):
+        """Coroutine variant of expand_kg.
+
+        Questions, queries and subgraphs await the LM's async client and the
+        retrieval awaits Retriever.acall; the queries of a depth are always
+        retrieved in one batch. File I/O runs in worker threads.
+        """
+        if depth is None:
+            depth = self.current_depth
+
+        current_kg = await asyncio.to_thread(self.load_expansion_base, depth)
+        if current_kg is None:
+            return None
+
+        # Generate questions
+        kg_graph = {k: current_kg[k] for k in ("nodes", "edges")}
+        questions: str = await self.questions_generator(depth).aforward(
+            kg=kg_graph,
+            questions_seen=current_kg.get("questions_seen", []),
+            topic=self.topic,
+            from_checkpoint=False,
+            skip=False,
+        )
+        new_questions: List[str] = self.extract_question_list(questions)
+
+        # Generate queries
+        query_reflector = self.query_reflector(depth)
+        if query_reflector is None:
+            queries: List[str] = new_questions
+            new_queries: List[str] = []
+        else:
+            queries: List[str] = await query_reflector.aforward(
+                topic=self.topic,
+                queries_seen=current_kg.get("queries_seen", []),
+                questions=questions,
+                from_checkpoint=False,
+                skip=False,
             )
+            new_queries: List[str] = queries
+
+        # Retrieve information for new depth
+        new_depth = depth + 1
+        retrieval_start = time.time()
+        all_snippets, missing_queries = self.replay_gather_info(new_depth, queries)
+        all_snippets += await self.aretrieve_batch(missing_queries, depth=new_depth)
         total_time = time.time() - retrieval_start
         self.print_retrieval_timing(queries, total_time)
 
         # Create sub-graphs from the retrieved snippets
-        new_kg = self.process_snippets(all_snippets, depth=new_depth)
+        new_kg = await self.aprocess_snippets(all_snippets, depth=new_depth)
 
-        merged_kg = {
-            "nodes": current_kg.get("nodes", []) + new_kg.get("nodes", []),
-            "edges": current_kg.get("edges", []) + new_kg.get("edges", []),
-            "keywords": current_kg.get("keywords", []) + new_kg.get("keywords", []),
-            "questions": current_kg.get("questions", []) + new_kg.get("questions", []),
-            "questions_seen": current_kg.get("questions_seen", []) + new_questions,
-            "queries_seen": current_kg.get("queries_seen", []) + new_queries,
-        }
-
-        logger.info(
-            f"Merged KG at depth {new_depth}: {len(merged_kg.get('nodes', []))} nodes, {len(merged_kg.get('edges', []))} edges"
+        return await asyncio.to_thread(
+            self.merge_expansion, depth, current_kg, new_kg, new_questions, new_queries
         )
 
-        self.save_kg_state(new_depth, merged_kg)
-        self.current_depth = new_depth
-
-        return merged_kg
+    async def run_stage(self, stage, astage, *args):
+        """Await the coroutine variant of a stage in async_mode, else run the blocking one in a worker thread"""
+        if self.async_mode:
+            return await astage(*args)
+        return await asyncio.to_thread(stage, *args)
 
     def build_kg(
         self,
@@ -1002,15 +1757,52 @@ class KnowledgeGraph:
         ground_truth_url: str = "",
         max_depth=None,
         base_dir=None,
+        resume: Optional[bool] = None,
+    ):
+        """Build the knowledge graph of topic, see abuild_kg"""
+        return run_coroutine(
+            self.abuild_kg(
+                topic,
+                ground_truth_url=ground_truth_url,
+                max_depth=max_depth,
+                base_dir=base_dir,
+                resume=resume,
+            )
+        )
+
+    async def abuild_kg(
+        self,
+        topic: str,
+        ground_truth_url: str = "",
+        max_depth=None,
+        base_dir=None,
+        resume: Optional[bool] = None,
     ):
+        """Build the knowledge graph of topic depth by depth, then draft its outline.
+
+        With async_mode, the seed and expansion stages are awaited on this event
+        loop (LM calls through litellm's async client, retrieval through
+        Retriever.acall). Otherwise each stage runs blocking in a worker thread
+        with its own thread pools.
+        """
 
-        Config.setup(
+        self.context = Config.setup(
             topic=topic,
             base_dir=base_dir or self.config_base_dir,
         )
+        if self.viz_policy is not None:
+            self.context.viz_policy = self.viz_policy
         self.init_knowledge_base(topic)
         self.ground_truth_url = ground_truth_url
 
+        if resume is not None:
+            self.resume = resume
+        if self.resume:
+            self.resume_from_checkpoint()
+        elif os.path.exists(self.gather_info_log.journal_path):
+            # Queries journaled by an earlier run must not leak into a fresh build
+            os.remove(self.gather_info_log.journal_path)
+
         start_time_total = time.time()
         logger.info(f"Starting knowledge graph build process for topic: {self.topic}")
 
@@ -1019,6 +1811,11 @@ class KnowledgeGraph:
             "seed_generation": 0,
             "expansions": {},
         }
+        if self.context.metrics.eval_info_diversity:
+            self.diversity_tracker = InfoDiversityTracker(
+                embedding_model="paraphrase-MiniLM-L6-v2"
+            )
+            timing_stats["info_diversity"] = {}
 
         if max_depth is None:
             max_depth = self.max_depth
@@ -1028,7 +1825,7 @@ class KnowledgeGraph:
             start_time = time.time()
             logger.info("Initializing seed knowledge graph (depth 0)")
             try:
-                self.init_seeds_kg()
+                await self.run_stage(self.init_seeds_kg, self.ainit_seeds_kg)
                 seed_time = time.time() - start_time
                 timing_stats["seed_generation"] = seed_time
                 logger.info(
@@ -1042,16 +1839,8 @@ class KnowledgeGraph:
         max_retries = 3
 
         while self.current_depth < max_depth:
-            if Config.metrics.eval_info_diversity:
-                result_eval: dict = eval_info_diversity_per_depth(
-                    base_dir=Config.topic_dir,
-                    max_depth=max_depth,
-                    embedding_model="paraphrase-MiniLM-L6-v2",
-                )
-                result_eval_pretty = json.dumps(result_eval, indent=2)
-                logger.info(
-                    f"Evaluation Information Diversity at Depth: {self.current_depth}\n\n{result_eval_pretty}"
-                )
+            if self.context.metrics.eval_info_diversity:
+                await asyncio.to_thread(self.eval_info_diversity, timing_stats)
 
             current_depth = self.current_depth
             next_depth = current_depth + 1
@@ -1064,7 +1853,7 @@ class KnowledgeGraph:
             self.print_retrieved_summary(self.current_depth)
 
             try:
-                self.expand_kg(current_depth)
+                await self.run_stage(self.expand_kg, self.aexpand_kg, current_depth)
                 expansion_time = time.time() - start_time
                 timing_stats["expansions"][
                     f"{current_depth}→{next_depth}"
@@ -1083,7 +1872,7 @@ class KnowledgeGraph:
                     logger.info(
                         f"Retrying expansion at depth {current_depth} (Attempt {retry_count}/{max_retries})"
                     )
-                    time.sleep(5)
+                    await asyncio.sleep(5)
                     continue
                 else:
                     logger.warning(
@@ -1092,6 +1881,9 @@ class KnowledgeGraph:
                     self.current_depth = next_depth
                     retry_count = 0
 
+        if self.context.metrics.eval_info_diversity:
+            await asyncio.to_thread(self.eval_info_diversity, timing_stats)
+
         # Final processing
         final_kg = self.load_kg_state(self.current_depth)
         total_time = time.time() - start_time_total
@@ -1103,29 +1895,104 @@ class KnowledgeGraph:
         )
         logger.info(f"Final knowledge graph depth: {self.current_depth}")
 
-        timing_path = Config.topic_dir / "timing_stats.json"
+        timing_path = self.context.topic_dir / "timing_stats.json"
         with open(timing_path, "w") as f:
             json.dump(timing_stats, f, indent=2)
 
         kg = inspect_outline_token_limit(final_kg)
-        kb = KnowledgeBase.from_gather_info_log_file(self.gather_info_path)
+        kb = await asyncio.to_thread(
+            KnowledgeBase.from_gather_info_log_file, self.gather_info_path
+        )
 
         """Generate Draft Outline"""
         # TODO: temp gen outlines here should be moved to engine.py
         try:
-            outline_lm = LLM("gpt-4o-mini", max_tokens=2000, temperature=1, cache=False)
-            outline_generator = OutlineGenerationAgent(lm=outline_lm)
-            outline, draft_outline = outline_generator.generate_outline(
-                topic=self.topic,
-                kg=kg,
-                return_draft_outline=True,
-                output_dir=Config.topic_dir,
-            )
+            await asyncio.to_thread(self.generate_draft_outline, kg)
         except Exception as e:
             logger.error(f"Error generating outline: {e}")
 
         return kb, kg
 
+    def generate_draft_outline(self, kg: Dict):
+        outline_lm = LLM(
+            "gpt-4o-mini",
+            max_tokens=2000,
+            temperature=1,
+            cache=False,
+            response_cache=getattr(self.lm, "response_cache", None),
+        )
+        outline_generator = OutlineGenerationAgent(lm=outline_lm)
+        return outline_generator.generate_outline(
+            topic=self.topic,
+            kg=kg,
+            return_draft_outline=True,
+            output_dir=self.context.topic_dir,
+        )
+
+
+def build_topic_kg(args, domain, topic, rm, response_cache=None):
+    """Build the knowledge graph of one topic on the calling thread.
+
+    Each topic gets its own LM and retriever view, which share the rate governor,
+    response cache, embedding model and Qdrant client of the whole run.
+    """
+    logger.info(f"Generating article for topic '{topic}'.")
+
+    base_dir = os.path.join(args.tmp, args.dataset, domain, args.jobid)
+
+    lm = LLM(
+        model=args.lm,
+        max_tokens=args.max_tokens,
+        temperature=1,
+        cache=False,
+        response_cache=response_cache,
+        max_concurrency=getattr(args, "max_inflight_requests", None),
+    )
+
+    retriever = Retriever(rm=rm.for_topic(topic), max_thread=6)
+
+    kg_manager = KnowledgeGraph(
+        lm=lm,
+        retriever=retriever,
+        max_depth=args.depth,
+        config_base_dir=base_dir,
+        resume=getattr(args, "resume", False),
+        viz_policy=getattr(args, "viz_policy", None),
+    )
+    kg_manager.build_kg(topic=topic)
+
+
+def run_topic_batch(topics, build_fn, max_concurrent_topics=1, desc="Generating articles"):
+    """Run build_fn over topics, max_concurrent_topics at a time.
+
+    While one topic is in a phase that makes no LM calls (retrieval, validation,
+    plotting) the others keep the LM budget busy. Progress and ETA are logged as
+    topics finish; failed topics are logged and returned.
+    """
+    failed = []
+    start_time = time.time()
+
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrent_topics)) as executor:
+        futures = {executor.submit(build_fn, topic): topic for topic in topics}
+        with tqdm(total=len(topics), desc=desc) as progress:
+            for num_done, future in enumerate(as_completed(futures), start=1):
+                topic = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Error generating article for topic '{topic}': {e}")
+                    failed.append(topic)
+                progress.update(1)
+
+                elapsed = time.time() - start_time
+                eta = elapsed / num_done * (len(topics) - num_done)
+                logger.info(
+                    f"[{num_done}/{len(topics)}] Finished topic '{topic}' "
+                    f"(elapsed {elapsed:.0f}s, ETA {eta:.0f}s, {len(failed)} failed)"
+                )
+
+    return failed
+
 
 def main(args):
 
@@ -1135,6 +2002,10 @@ def main(args):
 
     domains = load_domains(selected_domains=getattr(args, "target_domain", None))
 
+    response_cache = None
+    if getattr(args, "llm_cache_dir", None):
+        response_cache = LLMResponseCache(args.llm_cache_dir)
+
     for i, (domain, topics) in enumerate(
         tqdm(domains.items(), desc="Domain and topics")
     ):
@@ -1144,39 +2015,20 @@ def main(args):
             device=get_device(),
             k=args.top_k,
             seed=args.seed,
+            backend=getattr(args, "rm_backend", "docker"),
+            vector_store_path=getattr(args, "vector_store_path", None),
+            topic_index=getattr(args, "topic_index", False),
+            topic_index_dir=getattr(args, "topic_index_dir", None),
         )
 
         if getattr(args, "specific_topics", None):
             topics = [topic for topic in topics if topic in args.specific_topics]
 
-        for j, topic in enumerate(tqdm(topics, desc="Generating articles")):
-            logger.info(f"Generating article for topic '{topic}'.")
-
-            args.base_dir = os.path.join(args.tmp, args.dataset, domain, args.jobid)
-
-            lm = LLM(
-                model=args.lm,
-                max_tokens=args.max_tokens,
-                temperature=1,
-                cache=False,
-            )
-
-            rm.set_filter_by(topic)
-            retriever = Retriever(rm=rm, max_thread=6)
-
-            try:
-                kg_manager = KnowledgeGraph(
-                    lm=lm,
-                    retriever=retriever,
-                    max_depth=args.depth,
-                    config_base_dir=args.base_dir,
-                )
-
-                kg_manager.build_kg(topic=topic)
-
-            except Exception as e:
-                logger.error(f"Error generating article for topic '{topic}': {e}")
-                continue
+        run_topic_batch(
+            topics,
+            lambda topic: build_topic_kg(args, domain, topic, rm, response_cache),
+            max_concurrent_topics=getattr(args, "max_concurrent_topics", 1),
+        )
 
         rm.cleanup()
 
@@ -1196,6 +2048,15 @@ if __name__ == "__main__":
     args.lm = "gpt-4o-mini"
     args.disable_logger = False
     args.tmp = "temp/"
+    args.llm_cache_dir = None
+    args.resume = False
+    args.max_concurrent_topics = 1
+    args.max_inflight_requests = None
+    args.rm_backend = "docker"
+    args.vector_store_path = None
+    args.topic_index = False
+    args.topic_index_dir = None
+    args.viz_policy = "deferred"
 
     if args.disable_logger:
         logger.disabled = True
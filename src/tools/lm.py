@@ -1,8 +1,14 @@
 # lm.py
 import os
 import copy
+import json
+import time
+import asyncio
+import random
+import hashlib
 import logging
 import threading
+import contextvars
 from abc import ABC
 from collections import OrderedDict
 from typing import Optional, Literal
@@ -12,6 +18,390 @@ import dspy
 logging.getLogger("LiteLLM").setLevel(logging.WARNING)
 logging.getLogger("httpx").setLevel(logging.WARNING)
 
+# (cache, key) of the last response an LLM returned in this thread or task
+_last_cache_entry = contextvars.ContextVar("llm_last_cache_entry", default=None)
+
+
+class LLMResponseCache:
+    """Persistent, content-addressed cache of LM responses.
+
+    Entries are keyed by the model, the rendered prompt/messages (which carry the
+    signature doc and inputs of each dspy.Predict call) and the request kwargs.
+    Backed by diskcache, so it is safe to share across threads and processes, and
+    bounded in size with least-recently-used eviction.
+    """
+
+    IGNORED_KWARGS = {"api_key", "api_base", "api_version", "aws_profile_name"}
+
+    def __init__(
+        self,
+        cache_dir: str,
+        size_limit: int = 2**30,
+        namespace: str = "",
+    ):
+        """
+        Params:
+            cache_dir: Directory of the on-disk cache.
+            size_limit: Maximum size of the cache in bytes.
+            namespace: Optional prefix to separate caches of different runs.
+        """
+        import diskcache
+
+        self.cache_dir = cache_dir
+        self.namespace = namespace
+        self.cache = diskcache.Cache(
+            directory=str(cache_dir),
+            size_limit=size_limit,
+            eviction_policy="least-recently-used",
+        )
+
+    def make_key(self, model: str, prompt=None, messages=None, **kwargs) -> str:
+        request = {
+            "namespace": self.namespace,
+            "model": model,
+            "prompt": prompt,
+            "messages": messages,
+            "kwargs": {
+                k: v for k, v in kwargs.items() if k not in self.IGNORED_KWARGS
+            },
+        }
+        serialized = json.dumps(request, sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        return self.cache.get(key, default=None)
+
+    def set(self, key: str, outputs):
+        self.cache.set(key, outputs)
+
+    def delete(self, key: str) -> bool:
+        return self.cache.delete(key)
+
+    def close(self):
+        self.cache.close()
+
+
+class LLMRateGovernor:
+    """Process-wide request governor of one LM deployment.
+
+    Every LLM instance pointing at the same deployment shares one governor, so
+    nested thread pools across agents draw from a single budget. Requests wait
+    on two token buckets (requests/min and tokens/min) and an optional cap on
+    in-flight requests. A rate limit error (429) pauses the deployment with a
+    jittered exponential backoff and scales the budget down; successful calls
+    slowly restore it.
+    """
+
+    _governors = {}
+    _registry_lock = threading.Lock()
+
+    MIN_RATE_FACTOR = 0.1
+    RATE_RECOVERY_STEP = 0.05
+
+    def __init__(
+        self,
+        deployment: str,
+        rpm_limit: Optional[int] = None,
+        tpm_limit: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        max_retries: int = 5,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+    ):
+        """
+        Params:
+            deployment: Name of the deployment the budget belongs to.
+            rpm_limit: Requests per minute, None for no limit.
+            tpm_limit: Tokens per minute (prompt + completion), None for no limit.
+            max_concurrency: Maximum number of in-flight requests, None for no limit.
+            max_retries: Number of retries of a request failing with a rate limit or transient error.
+            base_backoff: First backoff delay in seconds after a rate limit error.
+            max_backoff: Upper bound of the backoff delay in seconds.
+        """
+        self.deployment = deployment
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self._condition = threading.Condition()
+        self.rpm_limit = None
+        self.tpm_limit = None
+        self.max_concurrency = None
+        self.rate_factor = 1.0
+        self.backoff_until = 0.0
+        self.consecutive_rate_limits = 0
+        self.configure(rpm_limit, tpm_limit, max_concurrency)
+
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.num_requests = 0
+        self.num_rate_limited = 0
+        self.total_wait_seconds = 0.0
+
+    @classmethod
+    def for_deployment(cls, deployment: str, **limits):
+        """Return the governor shared by every LLM of deployment, configuring it with the given limits."""
+        with cls._registry_lock:
+            governor = cls._governors.get(deployment)
+            if governor is None:
+                governor = cls(deployment, **limits)
+                cls._governors[deployment] = governor
+                return governor
+        governor.configure(**limits)
+        return governor
+
+    def configure(
+        self,
+        rpm_limit: Optional[int] = None,
+        tpm_limit: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        **kwargs,
+    ):
+        """Set the limits that are given, keeping the others.
+
+        Re-applying an unchanged limit leaves its bucket alone, so creating one
+        more LLM on a deployment does not hand out a fresh minute of budget. A
+        bucket only starts full when its limit is first set, and is capped when
+        its limit drops.
+        """
+        with self._condition:
+            now = time.monotonic()
+            self._refill(now)
+            if rpm_limit is not None and rpm_limit != self.rpm_limit:
+                if self.rpm_limit is None:
+                    self._request_tokens = float(rpm_limit)
+                    self._request_refill_at = now
+                else:
+                    self._request_tokens = min(self._request_tokens, float(rpm_limit))
+                self.rpm_limit = rpm_limit
+            if tpm_limit is not None and tpm_limit != self.tpm_limit:
+                if self.tpm_limit is None:
+                    self._llm_tokens = float(tpm_limit)
+                    self._token_refill_at = now
+                else:
+                    self._llm_tokens = min(self._llm_tokens, float(tpm_limit))
+                self.tpm_limit = tpm_limit
+            if max_concurrency is not None:
+                self.max_concurrency = max_concurrency
+            for key, value in kwargs.items():
+                setattr(self, key, value)
+            self._condition.notify_all()
+
+    def _refill(self, now: float):
+        if self.rpm_limit is not None:
+            rate = self.rpm_limit * self.rate_factor / 60.0
+            self._request_tokens = min(
+                float(self.rpm_limit),
+                self._request_tokens + (now - self._request_refill_at) * rate,
+            )
+            self._request_refill_at = now
+        if self.tpm_limit is not None:
+            rate = self.tpm_limit * self.rate_factor / 60.0
+            self._llm_tokens = min(
+                float(self.tpm_limit),
+                self._llm_tokens + (now - self._token_refill_at) * rate,
+            )
+            self._token_refill_at = now
+
+    def _seconds_until_ready(self, now: float, estimated_tokens: int) -> float:
+        """Return 0 if a request can start now, else how long to wait before checking again."""
+        waits = [self.backoff_until - now]
+        if self.rpm_limit is not None and self._request_tokens < 1:
+            rate = self.rpm_limit * self.rate_factor / 60.0
+            waits.append((1 - self._request_tokens) / rate)
+        if self.tpm_limit is not None:
+            # A request larger than the whole bucket only waits for a full bucket
+            needed = min(estimated_tokens, self.tpm_limit)
+            if self._llm_tokens < needed:
+                rate = self.tpm_limit * self.rate_factor / 60.0
+                waits.append((needed - self._llm_tokens) / rate)
+        wait = max(waits)
+        if wait <= 0 and (
+            self.max_concurrency is not None and self.in_flight >= self.max_concurrency
+        ):
+            # Woken up by release()
+            return None
+        return max(wait, 0.0)
+
+    def _reserve(self, estimated_tokens: int, start: float):
+        if self.rpm_limit is not None:
+            self._request_tokens -= 1
+        if self.tpm_limit is not None:
+            self._llm_tokens -= estimated_tokens
+        self.in_flight += 1
+        self.num_requests += 1
+        self.total_wait_seconds += time.monotonic() - start
+
+    def acquire(self, estimated_tokens: int = 0):
+        """Block until the budget allows one more request of about estimated_tokens."""
+        start = time.monotonic()
+        with self._condition:
+            self.queue_depth += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    wait = self._seconds_until_ready(now, estimated_tokens)
+                    if wait == 0:
+                        break
+                    self._condition.wait(timeout=wait)
+            finally:
+                self.queue_depth -= 1
+
+            self._reserve(estimated_tokens, start)
+
+    async def acquire_async(self, estimated_tokens: int = 0):
+        """Like acquire, but sleeps on the event loop instead of blocking the thread."""
+        start = time.monotonic()
+        with self._condition:
+            self.queue_depth += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        try:
+            while True:
+                with self._condition:
+                    now = time.monotonic()
+                    self._refill(now)
+                    wait = self._seconds_until_ready(now, estimated_tokens)
+                    if wait == 0:
+                        self._reserve(estimated_tokens, start)
+                        return
+                # Released slots are not signalled to coroutines, so poll for them
+                await asyncio.sleep(wait if wait is not None else 0.05)
+        finally:
+            with self._condition:
+                self.queue_depth -= 1
+
+    def release(self, estimated_tokens: int = 0, used_tokens: Optional[int] = None):
+        """Finish a request, charging the difference between the estimated and used tokens."""
+        with self._condition:
+            self.in_flight -= 1
+            if self.tpm_limit is not None and used_tokens is not None:
+                self._llm_tokens -= used_tokens - estimated_tokens
+            self._condition.notify_all()
+
+    def record_success(self):
+        with self._condition:
+            self.consecutive_rate_limits = 0
+            self.rate_factor = min(1.0, self.rate_factor + self.RATE_RECOVERY_STEP)
+
+    def record_rate_limit(self) -> float:
+        """Pause the deployment after a rate limit error and return the backoff delay."""
+        with self._condition:
+            self.num_rate_limited += 1
+            self.consecutive_rate_limits += 1
+            self.rate_factor = max(self.MIN_RATE_FACTOR, self.rate_factor / 2)
+            delay = min(
+                self.max_backoff,
+                self.base_backoff * 2 ** (self.consecutive_rate_limits - 1),
+            )
+            delay *= random.uniform(0.5, 1.0)
+            self.backoff_until = max(self.backoff_until, time.monotonic() + delay)
+            self._condition.notify_all()
+        logging.warning(
+            f"Rate limited on {self.deployment}, backing off {delay:.1f}s "
+            f"(budget at {self.rate_factor:.0%})"
+        )
+        return delay
+
+    @staticmethod
+    def is_rate_limit_error(error: Exception) -> bool:
+        if getattr(error, "status_code", None) == 429:
+            return True
+        message = str(error).lower()
+        return (
+            type(error).__name__ == "RateLimitError"
+            or "429" in message
+            or "rate limit" in message
+        )
+
+    TRANSIENT_STATUS_CODES = {408, 500, 502, 503, 504}
+    TRANSIENT_ERRORS = {
+        "Timeout",
+        "APIConnectionError",
+        "InternalServerError",
+        "BadGatewayError",
+        "ServiceUnavailableError",
+    }
+
+    @classmethod
+    def is_transient_error(cls, error: Exception) -> bool:
+        """Whether error is a server or network hiccup worth retrying (timeouts, 5xx, dropped connections)."""
+        if getattr(error, "status_code", None) in cls.TRANSIENT_STATUS_CODES:
+            return True
+        return type(error).__name__ in cls.TRANSIENT_ERRORS or isinstance(
+            error, (TimeoutError, ConnectionError)
+        )
+
+    def retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Return how long to wait before retrying a failed request, or None to give up.
+
+        Rate limit errors pause the whole deployment (see record_rate_limit), so
+        the retry only waits in acquire. Transient errors back off this request
+        alone with a jittered exponential delay.
+        """
+        if attempt >= self.max_retries:
+            return None
+        if self.is_rate_limit_error(error):
+            self.record_rate_limit()
+            return 0.0
+        if not self.is_transient_error(error):
+            return None
+        delay = min(self.max_backoff, self.base_backoff * 2**attempt)
+        delay *= random.uniform(0.5, 1.0)
+        logging.warning(
+            f"Transient error on {self.deployment} ({type(error).__name__}), "
+            f"retrying in {delay:.1f}s"
+        )
+        return delay
+
+    def get_metrics_and_reset(self) -> dict:
+        """Return the queue and throttling metrics since the last reset, then reset the counters."""
+        with self._condition:
+            metrics = {
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "in_flight": self.in_flight,
+                "requests": self.num_requests,
+                "rate_limited": self.num_rate_limited,
+                "total_wait_seconds": round(self.total_wait_seconds, 3),
+                "rate_factor": round(self.rate_factor, 3),
+            }
+            self.max_queue_depth = self.queue_depth
+            self.num_requests = 0
+            self.num_rate_limited = 0
+            self.total_wait_seconds = 0.0
+            return metrics
+
+
+async def apredict(predictor: dspy.Predict, lm: dspy.LM, **inputs) -> dspy.Prediction:
+    """Run a dspy.Predict on lm without holding a thread for the request.
+
+    The prompt is rendered and parsed with the configured dspy adapter and sent
+    through lm.acall. LMs without acall, and answers the adapter cannot parse,
+    fall back to the sync predictor in a worker thread.
+    """
+
+    def predict_in_thread():
+        with dspy.settings.context(lm=lm):
+            return predictor(**inputs)
+
+    if not hasattr(lm, "acall"):
+        return await asyncio.to_thread(predict_in_thread)
+
+    adapter = dspy.settings.adapter or dspy.ChatAdapter()
+    messages = adapter.format(predictor.signature, predictor.demos, inputs)
+    outputs = await lm.acall(messages=messages, **predictor.config)
+    try:
+        return dspy.Prediction(**adapter.parse(predictor.signature, outputs[0]))
+    except Exception as e:
+        logging.debug(f"Could not parse async completion ({e}), retrying in a thread")
+        # The sync predictor sends the same request, do not replay the bad answer
+        if hasattr(lm, "invalidate_last"):
+            lm.invalidate_last()
+        return await asyncio.to_thread(predict_in_thread)
+
 
 class LLM(dspy.LM):
     """Language class Manager to initialize Azure or Bedrock models"""
@@ -69,6 +459,14 @@ class LLM(dspy.LM):
         aws_profile_name: Optional[str] = "USERNAME",
         # Common parameters
         model_type: Literal["chat", "text"] = "chat",
+        # Response cache parameters
+        response_cache: Optional[LLMResponseCache] = None,
+        cache_dir: Optional[str] = None,
+        cache_size_limit: int = 2**30,
+        # Rate governor parameters, shared by every LLM of the same deployment
+        rpm_limit: Optional[int] = None,
+        tpm_limit: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
         **kwargs,
     ):
         if model is None:
@@ -80,6 +478,12 @@ class LLM(dspy.LM):
         self._token_usage_lock = threading.Lock()
         self.prompt_tokens = 0
         self.completion_tokens = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        if response_cache is None and cache_dir is not None:
+            response_cache = LLMResponseCache(cache_dir, size_limit=cache_size_limit)
+        self.response_cache = response_cache
 
         if provider == "azure":
             api_key = api_key or os.getenv("AZURE_API_KEY")
@@ -146,6 +550,20 @@ class LLM(dspy.LM):
                 f"Provider {provider} not supported. Choose 'azure' or 'bedrock'."
             )
 
+        def env_limit(name):
+            value = os.getenv(name)
+            return int(value) if value else None
+
+        self.rate_governor = LLMRateGovernor.for_deployment(
+            f"{self.model}@{api_base or aws_region_name}",
+            rpm_limit=rpm_limit or env_limit("LLM_RPM_LIMIT"),
+            tpm_limit=tpm_limit or env_limit("LLM_TPM_LIMIT"),
+            max_concurrency=max_concurrency or env_limit("LLM_MAX_CONCURRENCY"),
+        )
+        # The governor owns the retries of rate-limited and transient failures: with
+        # litellm's own retries a 429 would be retried before the governor could back off
+        self.num_retries = 0
+
     def _detect_provider(self, model: str) -> str:
         """
         Automatically detect the provider based on the model name.
@@ -201,9 +619,46 @@ class LLM(dspy.LM):
             if isinstance(response, dict):
                 logging.error(f"Response keys: {list(response.keys())}")
 
-    def __call__(self, *args, **kwargs):
+    def _lookup_cache(self, prompt=None, messages=None, **kwargs):
+        """Return (cache_key, cached outputs or None); the key is None when caching is off."""
+        if self.response_cache is None:
+            return None, None
+
+        cache_key = self.response_cache.make_key(
+            self.model, prompt, messages, **{**self.kwargs, **kwargs}
+        )
+        cached = self.response_cache.get(cache_key)
+        _last_cache_entry.set((self.response_cache, cache_key))
+        with self._token_usage_lock:
+            if cached is not None:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+        return cache_key, cached
+
+    def invalidate_last(self) -> bool:
+        """Evict the last response this LLM returned in the current thread or task.
+
+        Call it when a response cannot be used (e.g. it fails to parse), so a
+        retry sends the request again instead of replaying the cached answer.
+        Returns whether an entry was evicted.
+        """
+        entry = _last_cache_entry.get()
+        if entry is None or self.response_cache is None:
+            return False
+        cache, cache_key = entry
+        if cache is not self.response_cache:
+            return False
+        _last_cache_entry.set(None)
+        return cache.delete(cache_key)
+
+    def __call__(self, prompt=None, messages=None, **kwargs):
         """Override __call__ to ensure we capture usage from the history."""
-        result = super().__call__(*args, **kwargs)
+        cache_key, cached = self._lookup_cache(prompt, messages, **kwargs)
+        if cached is not None:
+            return cached
+
+        result = self._governed_call(prompt=prompt, messages=messages, **kwargs)
 
         if self.history and self.history[-1].get("usage"):
             usage_data = self.history[-1]["usage"]
@@ -211,8 +666,125 @@ class LLM(dspy.LM):
                 self.prompt_tokens += usage_data.get("prompt_tokens", 0)
                 self.completion_tokens += usage_data.get("completion_tokens", 0)
 
+        # Empty answers are not worth replaying
+        if cache_key is not None and any(result):
+            self.response_cache.set(cache_key, result)
+
         return result
 
+    def estimate_tokens(self, prompt=None, messages=None, **kwargs) -> int:
+        """Rough token count of a request (about 4 characters per token plus max_tokens)."""
+        text = prompt or ""
+        if messages:
+            text += "".join(str(message.get("content", "")) for message in messages)
+        max_tokens = kwargs.get("max_tokens", self.kwargs.get("max_tokens")) or 0
+        return len(text) // 4 + max_tokens
+
+    def _governed_call(self, prompt=None, messages=None, **kwargs):
+        """Call the LM within the budget of the deployment, retrying on rate limit and transient errors."""
+        governor = self.rate_governor
+        estimated_tokens = self.estimate_tokens(prompt, messages, **kwargs)
+
+        for attempt in range(governor.max_retries + 1):
+            governor.acquire(estimated_tokens)
+            used_tokens = None
+            try:
+                history_len = len(self.history)
+                result = super().__call__(prompt=prompt, messages=messages, **kwargs)
+                if len(self.history) > history_len and self.history[-1].get("usage"):
+                    usage_data = self.history[-1]["usage"]
+                    used_tokens = usage_data.get("prompt_tokens", 0) + usage_data.get(
+                        "completion_tokens", 0
+                    )
+            except Exception as e:
+                delay = governor.retry_delay(e, attempt)
+                if delay is None:
+                    raise
+            else:
+                delay = None
+            finally:
+                governor.release(estimated_tokens, used_tokens)
+
+            if delay is not None:
+                time.sleep(delay)
+                continue
+            governor.record_success()
+            return result
+
+    async def acall(self, prompt=None, messages=None, **kwargs):
+        """Async counterpart of __call__ built on litellm.acompletion.
+
+        Shares the response cache, the rate governor and the usage counters of
+        the sync path, and appends the call to the LM history.
+        """
+        import litellm
+
+        cache_key, cached = self._lookup_cache(prompt, messages, **kwargs)
+        if cached is not None:
+            return cached
+
+        messages = messages or [{"role": "user", "content": prompt}]
+        request = {**self.kwargs, **kwargs}
+        # Retried by the governor below, see __init__
+        request["num_retries"] = 0
+
+        governor = self.rate_governor
+        estimated_tokens = self.estimate_tokens(prompt, messages, **kwargs)
+
+        for attempt in range(governor.max_retries + 1):
+            await governor.acquire_async(estimated_tokens)
+            used_tokens = None
+            try:
+                response = await litellm.acompletion(
+                    model=self.model, messages=messages, **request
+                )
+                usage = getattr(response, "usage", None)
+                if usage is not None:
+                    used_tokens = (getattr(usage, "prompt_tokens", 0) or 0) + (
+                        getattr(usage, "completion_tokens", 0) or 0
+                    )
+            except Exception as e:
+                delay = governor.retry_delay(e, attempt)
+                if delay is None:
+                    raise
+            else:
+                delay = None
+            finally:
+                governor.release(estimated_tokens, used_tokens)
+
+            if delay is not None:
+                await asyncio.sleep(delay)
+                continue
+            governor.record_success()
+            break
+
+        outputs = [choice.message.content for choice in response.choices]
+        usage_data = {
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        }
+        with self._token_usage_lock:
+            self.prompt_tokens += usage_data["prompt_tokens"]
+            self.completion_tokens += usage_data["completion_tokens"]
+            self.history.append(
+                {
+                    "prompt": prompt,
+                    "messages": messages,
+                    "kwargs": kwargs,
+                    "response": response,
+                    "outputs": outputs,
+                    "usage": usage_data,
+                    "model": self.model,
+                    "model_type": self.model_type,
+                    "timestamp": time.time(),
+                }
+            )
+
+        if cache_key is not None and any(outputs):
+            self.response_cache.set(cache_key, outputs)
+
+        return outputs
+
     def get_usage_and_reset(self):
         """Get the total tokens used and reset the token usage."""
         with self._token_usage_lock:
@@ -222,8 +794,13 @@ class LLM(dspy.LM):
                     "completion_tokens": self.completion_tokens,
                 }
             }
+            if self.response_cache is not None:
+                usage[self.model_name]["cache_hits"] = self.cache_hits
+                usage[self.model_name]["cache_misses"] = self.cache_misses
             self.prompt_tokens = 0
             self.completion_tokens = 0
+            self.cache_hits = 0
+            self.cache_misses = 0
             return usage
 
 
@@ -461,15 +1038,26 @@ class LMConfigs(ABC):
                 if model_name not in model_name_to_usage:
                     model_name_to_usage[model_name] = tokens
                 else:
-                    model_name_to_usage[model_name]["prompt_tokens"] += tokens[
-                        "prompt_tokens"
-                    ]
-                    model_name_to_usage[model_name]["completion_tokens"] += tokens[
-                        "completion_tokens"
-                    ]
+                    for key, count in tokens.items():
+                        model_name_to_usage[model_name][key] = (
+                            model_name_to_usage[model_name].get(key, 0) + count
+                        )
 
         return model_name_to_usage
 
+    def collect_and_reset_governor_metrics(self):
+        """Collect the metrics of the rate governors behind the configured LMs, once per deployment."""
+        governors = {}
+        for attr_name in self.__dict__:
+            governor = getattr(getattr(self, attr_name), "rate_governor", None)
+            if "_lm" in attr_name and governor is not None:
+                governors[governor.deployment] = governor
+
+        return {
+            deployment: governor.get_metrics_and_reset()
+            for deployment, governor in governors.items()
+        }
+
     def log_v0(self):
 
         return OrderedDict(
@@ -1,19 +1,27 @@
 import os
+import re
+import time
+import random
 
 os.environ["TOKENIZERS_PARALLELISM"] = "true"
 
+import copy
+import json
+import asyncio
+import threading
 import concurrent.futures
-from typing import Union, List, Callable
-from collections import defaultdict
+from typing import Union, List, Callable, Optional
+from collections import defaultdict, OrderedDict
 
 import dspy
 import requests
+import numpy as np
 
 from langchain_qdrant import Qdrant
 from qdrant_client import QdrantClient, models
-from langchain_huggingface import HuggingFaceEmbeddings
 
-from ..core.information import Information
+from ..core.information import Information, top_k_indices, normalize_rows
+from ..utils.model_registry import EmbeddingModelRegistry
 from ..utils.text_processing import ArticleTextProcessing
 from ..utils.logger import setup_logging, get_logger
 
@@ -28,9 +36,130 @@ warnings.filterwarnings(
     message=".*The class `Qdrant` was deprecated.*",
 )
 
+class WebSearchSession:
+    """Pooled HTTP client of the web search retrievers.
+
+    Keeps connections alive across queries, fans a query list out over a
+    bounded thread pool, retries rate-limited and transient failures with
+    jittered exponential backoff (honouring Retry-After / X-RateLimit-Reset),
+    and records the latency of every query.
+    """
+
+    RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        max_retries: int = 3,
+        base_backoff: float = 1.0,
+        max_backoff: float = 30.0,
+        timeout: float = 30.0,
+    ):
+        """
+        Params:
+            max_concurrency: Maximum number of queries in flight, also the connection pool size.
+            max_retries: Number of retries of a query failing with a retryable error.
+            base_backoff: First backoff delay in seconds.
+            max_backoff: Upper bound of the backoff delay in seconds.
+            timeout: Timeout of a single HTTP request in seconds.
+        """
+        from requests.adapters import HTTPAdapter
+
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=max_concurrency, pool_maxsize=max_concurrency
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._latency_lock = threading.Lock()
+        self.latencies = []
+
+    def backoff_delay(self, attempt: int, response=None) -> float:
+        """Delay before retry attempt, preferring the delay asked for by the provider."""
+        if response is not None:
+            for header in ("Retry-After", "X-RateLimit-Reset"):
+                value = response.headers.get(header)
+                if value:
+                    try:
+                        # Brave sends a comma-separated list, the first entry is the shortest window
+                        return min(self.max_backoff, float(value.split(",")[0]))
+                    except ValueError:
+                        pass
+        delay = min(self.max_backoff, self.base_backoff * 2**attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+    def get_json(self, url: str, params: dict = None, headers: dict = None) -> dict:
+        """GET url with URL-encoded params and return the decoded JSON body."""
+        start_time = time.time()
+        try:
+            for attempt in range(self.max_retries + 1):
+                response = None
+                try:
+                    response = self.session.get(
+                        url, params=params, headers=headers, timeout=self.timeout
+                    )
+                    if response.status_code not in self.RETRY_STATUS_CODES:
+                        response.raise_for_status()
+                        return response.json()
+                    error = requests.HTTPError(
+                        f"{response.status_code} from {url}", response=response
+                    )
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    error = e
+
+                if attempt == self.max_retries:
+                    raise error
+                delay = self.backoff_delay(attempt, response)
+                logger.debug(f"Retrying {url} in {delay:.1f}s after: {error}")
+                time.sleep(delay)
+        finally:
+            with self._latency_lock:
+                self.latencies.append(time.time() - start_time)
+
+    def map(self, fn: Callable, items: List) -> List:
+        """Apply fn to every item with at most max_concurrency in flight, keeping the order."""
+        if len(items) <= 1 or self.max_concurrency <= 1:
+            return [fn(item) for item in items]
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_concurrency
+        ) as executor:
+            return list(executor.map(fn, items))
+
+    def get_latency_stats_and_reset(self) -> dict:
+        """Return the count, mean, p50, p95 and max of the query latencies in seconds."""
+        with self._latency_lock:
+            latencies = sorted(self.latencies)
+            self.latencies = []
+        if not latencies:
+            return {"count": 0}
+        return {
+            "count": len(latencies),
+            "mean": sum(latencies) / len(latencies),
+            "p50": latencies[len(latencies) // 2],
+            "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            "max": latencies[-1],
+        }
+
+    def close(self):
+        self.session.close()
+
+
 class BraveRM(dspy.Retrieve):
     def __init__(
-        self, brave_search_api_key=None, k=3, is_valid_source: Callable = None
+        self,
+        brave_search_api_key=None,
+        k=3,
+        is_valid_source: Callable = None,
+        max_concurrency: int = 4,
+        max_retries: int = 3,
+        timeout: float = 30.0,
     ):
         super().__init__(k=k)
         if not brave_search_api_key and not os.environ.get("BRAVE_API_KEY"):
@@ -42,6 +171,10 @@ class BraveRM(dspy.Retrieve):
         else:
             self.brave_search_api_key = os.environ["BRAVE_API_KEY"]
         self.usage = 0
+        self.base_url = "https://api.search.brave.com/res/v1/web/search"
+        self.http = WebSearchSession(
+            max_concurrency=max_concurrency, max_retries=max_retries, timeout=timeout
+        )
 
         # If not None, is_valid_source shall be a function that takes a URL and returns a boolean.
         if is_valid_source:
@@ -52,9 +185,47 @@ class BraveRM(dspy.Retrieve):
     def get_usage_and_reset(self):
         usage = self.usage
         self.usage = 0
+        latency = self.http.get_latency_stats_and_reset()
+        if latency["count"]:
+            logger.info(
+                f"BraveRM latency over {latency['count']} queries: "
+                f"mean {latency['mean']:.2f}s, p50 {latency['p50']:.2f}s, "
+                f"p95 {latency['p95']:.2f}s, max {latency['max']:.2f}s"
+            )
 
         return {"BraveRM": usage}
 
+    def search(self, query: str, exclude_urls: List[str] = []) -> List[dict]:
+        """Search a single query, returning no results if it fails."""
+        try:
+            headers = {
+                "Accept": "application/json",
+                "Accept-Encoding": "gzip",
+                "X-Subscription-Token": self.brave_search_api_key,
+            }
+            response = self.http.get_json(
+                self.base_url,
+                params={"result_filter": "web", "q": query},
+                headers=headers,
+            )
+            results = response.get("web", {}).get("results", [])
+
+            if exclude_urls:
+                results = [r for r in results if r.get("url") not in exclude_urls]
+
+            return [
+                {
+                    "snippets": result.get("extra_snippets", []),
+                    "title": result.get("title"),
+                    "url": result.get("url"),
+                    "description": result.get("description"),
+                }
+                for result in results[: self.k]
+            ]
+        except Exception as e:
+            logger.error(f"Error occurs when searching query {query}: {e}")
+            return []
+
     def forward(
         self,
         query_or_queries: Union[str, List[str]],
@@ -69,46 +240,46 @@ class BraveRM(dspy.Retrieve):
         Returns:
             a list of Dicts, each dict has keys of 'description', 'snippets' (list of strings), 'title', 'url'
         """
+        collected_results = []
+        for results in self.forward_per_query(query_or_queries, exclude_urls):
+            collected_results.extend(results)
+
+        return collected_results
+
+    def forward_per_query(
+        self,
+        query_or_queries: Union[str, List[str]],
+        exclude_urls: List[str] = [],
+    ) -> List[List[dict]]:
+        """
+        Search every query over the pooled session, at most max_concurrency at a time.
+
+        Args:
+            query_or_queries (Union[str, List[str]]): The query or queries to search for.
+            exclude_urls (List[str]): A list of urls to exclude from the search results.
+
+        Returns:
+            One list of result dicts per query, in the order of the queries
+        """
         queries = (
             [query_or_queries]
             if isinstance(query_or_queries, str)
             else query_or_queries
         )
         self.usage += len(queries)
-        collected_results = []
-        for query in queries:
-            try:
-                headers = {
-                    "Accept": "application/json",
-                    "Accept-Encoding": "gzip",
-                    "X-Subscription-Token": self.brave_search_api_key,
-                }
-                response = requests.get(
-                    f"https://api.search.brave.com/res/v1/web/search?result_filter=web&q={query}",
-                    headers=headers,
-                ).json()
-                results = response.get("web", {}).get("results", [])
-
-                if exclude_urls:
-                    results = [r for r in results if r.get("url") not in exclude_urls]
-
-                for result in results[: self.k]:
-                    collected_results.append(
-                        {
-                            "snippets": result.get("extra_snippets", []),
-                            "title": result.get("title"),
-                            "url": result.get("url"),
-                            "description": result.get("description"),
-                        }
-                    )
-            except Exception as e:
-                logger.error(f"Error occurs when searching query {query}: {e}")
-
-        return collected_results
+        return self.http.map(lambda q: self.search(q, exclude_urls), queries)
 
 
 class YouRM(dspy.Retrieve):
-    def __init__(self, ydc_api_key=None, k=3, is_valid_source: Callable = None):
+    def __init__(
+        self,
+        ydc_api_key=None,
+        k=3,
+        is_valid_source: Callable = None,
+        max_concurrency: int = 4,
+        max_retries: int = 3,
+        timeout: float = 30.0,
+    ):
         super().__init__(k=k)
         if not ydc_api_key and not os.environ.get("YDC_API_KEY"):
             raise RuntimeError(
@@ -119,6 +290,10 @@ class YouRM(dspy.Retrieve):
         else:
             self.ydc_api_key = os.environ["YDC_API_KEY"]
         self.usage = 0
+        self.base_url = "https://api.ydc-index.io/search"
+        self.http = WebSearchSession(
+            max_concurrency=max_concurrency, max_retries=max_retries, timeout=timeout
+        )
 
         # If not None, is_valid_source shall be a function that takes a URL and returns a boolean.
         if is_valid_source:
@@ -129,9 +304,33 @@ class YouRM(dspy.Retrieve):
     def get_usage_and_reset(self):
         usage = self.usage
         self.usage = 0
+        latency = self.http.get_latency_stats_and_reset()
+        if latency["count"]:
+            logger.info(
+                f"YouRM latency over {latency['count']} queries: "
+                f"mean {latency['mean']:.2f}s, p50 {latency['p50']:.2f}s, "
+                f"p95 {latency['p95']:.2f}s, max {latency['max']:.2f}s"
+            )
 
         return {"YouRM": usage}
 
+    def search(self, query: str, exclude_urls: List[str] = []) -> List[dict]:
+        """Search a single query, returning no results if it fails."""
+        try:
+            headers = {"X-API-Key": self.ydc_api_key}
+            results = self.http.get_json(
+                self.base_url, params={"query": query}, headers=headers
+            )
+
+            authoritative_results = []
+            for r in results["hits"]:
+                if self.is_valid_source(r["url"]) and r["url"] not in exclude_urls:
+                    authoritative_results.append(r)
+            return authoritative_results[: self.k]
+        except Exception as e:
+            logger.error(f"Error occurs when searching query {query}: {e}")
+            return []
+
     def forward(
         self, query_or_queries: Union[str, List[str]], exclude_urls: List[str] = []
     ):
@@ -144,31 +343,249 @@ class YouRM(dspy.Retrieve):
         Returns:
             a list of Dicts, each dict has keys of 'description', 'snippets' (list of strings), 'title', 'url'
         """
+        collected_results = []
+        for results in self.forward_per_query(query_or_queries, exclude_urls):
+            collected_results.extend(results)
+
+        return collected_results
+
+    def forward_per_query(
+        self,
+        query_or_queries: Union[str, List[str]],
+        exclude_urls: List[str] = [],
+    ) -> List[List[dict]]:
+        """
+        Search every query over the pooled session, at most max_concurrency at a time.
+
+        Args:
+            query_or_queries (Union[str, List[str]]): The query or queries to search for.
+            exclude_urls (List[str]): A list of urls to exclude from the search results.
+
+        Returns:
+            One list of result dicts per query, in the order of the queries
+        """
         queries = (
             [query_or_queries]
             if isinstance(query_or_queries, str)
             else query_or_queries
         )
         self.usage += len(queries)
-        collected_results = []
-        for query in queries:
-            try:
-                headers = {"X-API-Key": self.ydc_api_key}
-                results = requests.get(
-                    f"https://api.ydc-index.io/search?query={query}",
-                    headers=headers,
-                ).json()
-
-                authoritative_results = []
-                for r in results["hits"]:
-                    if self.is_valid_source(r["url"]) and r["url"] not in exclude_urls:
-                        authoritative_results.append(r)
-                if "hits" in results:
-                    collected_results.extend(authoritative_results[: self.k])
-            except Exception as e:
-                logger.error(f"Error occurs when searching query {query}: {e}")
+        return self.http.map(lambda q: self.search(q, exclude_urls), queries)
 
-        return collected_results
+
+class QueryResultCache:
+    """Bounded LRU cache of retrieval results, optionally persisted on disk.
+
+    Entries live in memory up to max_entries; with cache_dir they are also
+    written to a diskcache store, so later runs start warm.
+    """
+
+    def __init__(self, max_entries: int = 10000, cache_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # Also guards the hit/miss counters of the retrievers sharing this cache
+        self.lock = threading.Lock()
+
+        self.disk_cache = None
+        if cache_dir is not None:
+            import diskcache
+
+            self.disk_cache = diskcache.Cache(directory=str(cache_dir))
+
+    @staticmethod
+    def make_key(collection_name: str, filter_title: Optional[str], query: str, k: int):
+        normalized_query = " ".join(query.lower().split())
+        return (collection_name, filter_title or "", normalized_query, k)
+
+    def get(self, key):
+        with self.lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return copy.deepcopy(self._entries[key])
+
+        if self.disk_cache is not None:
+            value = self.disk_cache.get(key, default=None)
+            if value is not None:
+                self._put_in_memory(key, value)
+                return copy.deepcopy(value)
+        return None
+
+    def set(self, key, value):
+        value = copy.deepcopy(value)
+        self._put_in_memory(key, value)
+        if self.disk_cache is not None:
+            self.disk_cache.set(key, value)
+
+    def _put_in_memory(self, key, value):
+        with self.lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def close(self):
+        if self.disk_cache is not None:
+            self.disk_cache.close()
+
+
+class FlatIndexHit:
+    """A search hit of FlatVectorIndex, shaped like a Qdrant scored point."""
+
+    __slots__ = ("payload", "score")
+
+    def __init__(self, payload: dict, score: float):
+        self.payload = payload
+        self.score = score
+
+
+class FlatVectorIndex:
+    """Exact cosine search over vectors exported from a Qdrant collection.
+
+    Meant for small collections and per-topic slices on single-node jobs: the
+    vectors are searched with one matrix product per batch of queries, without
+    a Qdrant server. Filtering by title matches the Qdrant filter on
+    metadata.title.
+
+    On-disk layout:
+        <index_dir>/vectors.npy
+        <index_dir>/payloads.json
+    """
+
+    def __init__(self, vectors: np.ndarray, payloads: List[dict]):
+        self.vectors = vectors
+        self.payloads = payloads
+
+        rows_by_title = defaultdict(list)
+        for row, payload in enumerate(self.payloads):
+            title = (payload.get("metadata") or {}).get("title")
+            rows_by_title[title].append(row)
+        self.rows_by_title = {
+            title: np.asarray(rows, dtype=np.int64)
+            for title, rows in rows_by_title.items()
+        }
+
+    def __len__(self):
+        return len(self.payloads)
+
+    @staticmethod
+    def exists(index_dir: str) -> bool:
+        return os.path.exists(os.path.join(index_dir, "vectors.npy")) and os.path.exists(
+            os.path.join(index_dir, "payloads.json")
+        )
+
+    @classmethod
+    def load(cls, index_dir: str) -> "FlatVectorIndex":
+        """Load an index saved in index_dir, with the vectors memory-mapped."""
+        if not cls.exists(index_dir):
+            raise ValueError(
+                f"No flat index found in {index_dir}. Export one with FlatVectorIndex.export_from_qdrant first."
+            )
+        vectors = np.load(os.path.join(index_dir, "vectors.npy"), mmap_mode="r")
+        with open(os.path.join(index_dir, "payloads.json"), "r", encoding="utf-8") as f:
+            payloads = json.load(f)
+        return cls(vectors, payloads)
+
+    def save(self, index_dir: str):
+        """Atomically write the index to index_dir."""
+        os.makedirs(index_dir, exist_ok=True)
+
+        tmp_vectors_path = os.path.join(index_dir, f"vectors.{os.getpid()}.tmp")
+        with open(tmp_vectors_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(self.vectors, dtype=np.float32))
+        tmp_payloads_path = os.path.join(index_dir, f"payloads.{os.getpid()}.tmp")
+        with open(tmp_payloads_path, "w", encoding="utf-8") as f:
+            json.dump(self.payloads, f)
+        os.replace(tmp_vectors_path, os.path.join(index_dir, "vectors.npy"))
+        os.replace(tmp_payloads_path, os.path.join(index_dir, "payloads.json"))
+
+    @classmethod
+    def export_from_qdrant(
+        cls,
+        client: QdrantClient,
+        collection_name: str,
+        index_dir: Optional[str] = None,
+        scroll_filter: Optional[models.Filter] = None,
+        batch_size: int = 1024,
+    ) -> "FlatVectorIndex":
+        """Read the vectors and payloads of a Qdrant collection, optionally filtered, into an index.
+
+        The index is saved to index_dir when one is given.
+        """
+        vectors, payloads = [], []
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=collection_name,
+                scroll_filter=scroll_filter,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True,
+            )
+            for point in points:
+                vector = point.vector
+                if isinstance(vector, dict):
+                    vector = next(iter(vector.values()))
+                vectors.append(vector)
+                payloads.append(point.payload or {})
+            if offset is None:
+                break
+
+        if vectors:
+            matrix = normalize_rows(np.asarray(vectors, dtype=np.float32))
+        else:
+            matrix = np.empty((0, 0), dtype=np.float32)
+        index = cls(matrix, payloads)
+
+        if index_dir is not None:
+            index.save(index_dir)
+            logger.info(
+                f"Exported {len(payloads)} points of '{collection_name}' to {index_dir}"
+            )
+        return index
+
+    def subset(self, title: str) -> "FlatVectorIndex":
+        """Return an in-memory index holding only the points of title."""
+        rows = self.rows_by_title.get(title)
+        if rows is None:
+            return FlatVectorIndex(np.empty((0, 0), dtype=np.float32), [])
+        return FlatVectorIndex(
+            np.asarray(self.vectors[rows], dtype=np.float32),
+            [self.payloads[row] for row in rows],
+        )
+
+    def search_batch(
+        self, query_vectors, k: int, title: Optional[str] = None
+    ) -> List[List[FlatIndexHit]]:
+        """Return the k most similar points per query, optionally restricted to a title."""
+        if title:
+            rows = self.rows_by_title.get(title)
+            if rows is None:
+                return [[] for _ in query_vectors]
+            matrix = self.vectors[rows]
+        else:
+            rows = None
+            matrix = self.vectors
+
+        if len(matrix) == 0:
+            return [[] for _ in query_vectors]
+
+        queries = normalize_rows(np.asarray(query_vectors, dtype=np.float32))
+        similarities = queries @ np.asarray(matrix, dtype=np.float32).T
+        top_indices = top_k_indices(similarities, k)
+
+        results = []
+        for query_row, indices in enumerate(top_indices):
+            results.append(
+                [
+                    FlatIndexHit(
+                        payload=self.payloads[rows[j] if rows is not None else j],
+                        score=float(similarities[query_row, j]),
+                    )
+                    for j in indices
+                ]
+            )
+        return results
 
 
 class VectorRM(dspy.Retrieve):
@@ -191,6 +608,14 @@ class VectorRM(dspy.Retrieve):
         k: int = 3,
         seed: int = None,
         query_prefix: str = "query:",
+        search_batch_size: int = 64,
+        cache_size: int = 10000,
+        cache_dir: Optional[str] = None,
+        backend: str = "docker",
+        vector_store_path: Optional[str] = None,
+        topic_index: bool = False,
+        topic_index_dir: Optional[str] = None,
+        topic_index_cache_size: int = 8,
     ):
         """
         Params:
@@ -200,37 +625,73 @@ class VectorRM(dspy.Retrieve):
             k: Number of top chunks to retrieve.
             seed: Seed for deterministic behavior.
             query_prefix: Prefix to add to the query before embedding.
+            search_batch_size: Maximum number of queries embedded and searched per Qdrant request.
+            cache_size: Number of query results kept in memory, 0 to disable the cache.
+            cache_dir: Directory to persist the query results in, if any.
+            backend: Where the collection is searched:
+                "docker": Qdrant server running in the Docker container "qdrant".
+                "local": embedded Qdrant stored on disk at vector_store_path.
+                "numpy": flat NumPy index stored at vector_store_path/<collection_name> (see FlatVectorIndex).
+            vector_store_path: Path of the on-disk store, required by the "local" and "numpy" backends.
+            topic_index: Search an exact flat index of the filtered topic's chunks instead of
+                running a filtered search over the whole collection.
+            topic_index_dir: Directory to persist the per-topic indexes in, if any.
+            topic_index_cache_size: Number of per-topic indexes kept in memory.
         """
         super().__init__(k=k)
         self.seed = seed
         self.usage = 0
         self.query_prefix = query_prefix
+        self.search_batch_size = search_batch_size
         self.embedding_model = embedding_model
         self.filter_condition = None
+        self.filter_title = None
 
         if not collection_name:
             raise ValueError("Please provide a collection name.")
         if not embedding_model:
             raise ValueError("Please provide an embedding model.")
 
-        model_kwargs = {"device": device, "trust_remote_code": True}
-        encode_kwargs = {"normalize_embeddings": True}
-        self.model = HuggingFaceEmbeddings(
-            model_name=embedding_model,
-            model_kwargs=model_kwargs,
-            encode_kwargs=encode_kwargs,
+        self.device = device
+        self.model = EmbeddingModelRegistry.get_hf_embeddings(
+            embedding_model, device=device
         )
 
         self.collection_name = collection_name
         self.client = None
         self.qdrant = None
-        self.cache = {}
+        self.flat_index = None
+        self.search_params = None
+
+        self.topic_index = topic_index
+        self.topic_index_dir = topic_index_dir
+        self.topic_index_cache_size = topic_index_cache_size
+        self.topic_flat_index = None
+        self._topic_indexes = OrderedDict()
+        self._topic_indexes_lock = threading.Lock()
+        self.cache = (
+            QueryResultCache(max_entries=cache_size, cache_dir=cache_dir)
+            if cache_size
+            else None
+        )
+        self.cache_hits = 0
+        self.cache_misses = 0
 
         if self.seed is not None:
             logger.info(f"Initializing deterministic VectorRM with seed {self.seed}")
             self._make_deterministic()
 
-        self.init_docker_qdrant()
+        if backend == "docker":
+            self.init_docker_qdrant()
+        elif backend == "local":
+            self.init_offline_vector_db(vector_store_path)
+        elif backend == "numpy":
+            self.init_flat_index(vector_store_path)
+        else:
+            raise ValueError(
+                f"Backend {backend} not supported. Choose 'docker', 'local' or 'numpy'."
+            )
+        self.backend = backend
 
     def set_filter_by(self, title: str):
         """
@@ -241,6 +702,7 @@ class VectorRM(dspy.Retrieve):
         """
 
         if title:
+            self.filter_title = title
             self.filter_condition = models.Filter(
                 must=[
                     models.FieldCondition(
@@ -249,6 +711,76 @@ class VectorRM(dspy.Retrieve):
                     )
                 ]
             )
+            if self.topic_index:
+                self.topic_flat_index = self.get_topic_index(title)
+
+    def get_topic_index(self, title: str) -> FlatVectorIndex:
+        """
+        Return the flat index of the chunks of title, building it on first use.
+
+        Indexes are kept in an in-memory LRU shared by the topic views of this
+        retriever and, with topic_index_dir, saved to and reloaded from disk.
+
+        Args:
+            title (str): The title whose chunks the index holds.
+        """
+        with self._topic_indexes_lock:
+            if title in self._topic_indexes:
+                self._topic_indexes.move_to_end(title)
+                return self._topic_indexes[title]
+
+        index_dir = None
+        if self.topic_index_dir is not None:
+            title_slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", title)
+            index_dir = os.path.join(
+                self.topic_index_dir, self.collection_name, title_slug
+            )
+
+        if index_dir is not None and FlatVectorIndex.exists(index_dir):
+            index = FlatVectorIndex.load(index_dir)
+        elif self.flat_index is not None:
+            index = self.flat_index.subset(title)
+            if index_dir is not None:
+                index.save(index_dir)
+        else:
+            index = FlatVectorIndex.export_from_qdrant(
+                self.client,
+                self.collection_name,
+                index_dir=index_dir,
+                scroll_filter=self.filter_condition,
+            )
+        logger.info(f"Topic index of '{title}' holds {len(index)} chunks")
+
+        with self._topic_indexes_lock:
+            self._topic_indexes[title] = index
+            self._topic_indexes.move_to_end(title)
+            while len(self._topic_indexes) > self.topic_index_cache_size:
+                self._topic_indexes.popitem(last=False)
+        return index
+
+    def for_topic(self, title: str) -> "VectorRM":
+        """
+        Return a view of this retriever filtered by title.
+
+        The view shares the client, collection and embedding model, and keeps its
+        own filter and usage counter, so topics can be retrieved concurrently.
+
+        Args:
+            title (str): The title to filter by when retrieving documents.
+        """
+        view = copy.copy(self)
+        view.usage = 0
+        view.cache_hits = 0
+        view.cache_misses = 0
+        view.filter_condition = None
+        view.filter_title = None
+        view.topic_flat_index = None
+        view.set_filter_by(title)
+        if hasattr(self, "_original_forward"):
+            # Rebind the deterministic forward to the view
+            del view._original_forward
+            view._make_deterministic()
+        return view
 
     def _check_collection(self):
         """
@@ -322,29 +854,58 @@ class VectorRM(dspy.Retrieve):
         except Exception as e:
             raise ValueError(f"Error occurs when loading the vector store: {e}")
 
+    def init_flat_index(self, vector_store_path: str):
+        """
+        Load the flat NumPy index of the collection from the given folder path.
+
+        Args:
+            vector_store_path (str): Folder holding one flat index per collection.
+        """
+        if vector_store_path is None:
+            raise ValueError("Please provide a folder path.")
+
+        self.flat_index = FlatVectorIndex.load(
+            os.path.join(vector_store_path, self.collection_name)
+        )
+        logger.info(
+            f"Loaded flat index of '{self.collection_name}' with {len(self.flat_index)} vectors"
+        )
+
     def get_usage_and_reset(self):
-        usage = self.usage
+        usage = {"VectorRM": self.usage}
         self.usage = 0
+        if self.cache is not None:
+            with self.cache.lock:
+                usage["VectorRM_cache_hits"] = self.cache_hits
+                usage["VectorRM_cache_misses"] = self.cache_misses
+                self.cache_hits = 0
+                self.cache_misses = 0
+
+        return usage
 
-        return {"VectorRM": usage}
+    def cleanup(self, release_model: bool = False):
+        """Release resources when done with this retriever.
 
-    def cleanup(self):
-        """Release resources when done with this retriever."""
+        Args:
+            release_model (bool): Also drop the shared embedding model from the registry.
+        """
         self.client = None
         self.qdrant = None
+        self.flat_index = None
+        self.topic_flat_index = None
+        self._topic_indexes.clear()
         self.filter_condition = None
+        if self.cache is not None:
+            self.cache.close()
 
         self.model = None
+        if release_model:
+            EmbeddingModelRegistry.release(self.embedding_model, device=self.device)
 
         import gc
 
         gc.collect()
 
-        import torch
-
-        if torch.cuda.is_available():
-            torch.cuda.empty_cache()
-
     def get_vector_count(self):
         """
         Get the count of vectors in the collection.
@@ -352,6 +913,8 @@ class VectorRM(dspy.Retrieve):
         Returns:
             int: Number of vectors in the collection.
         """
+        if self.flat_index is not None:
+            return len(self.flat_index)
         return self.qdrant.client.count(collection_name=self.collection_name)
 
     def _make_deterministic(self):
@@ -369,67 +932,86 @@ class VectorRM(dspy.Retrieve):
                 else query_or_queries
             )
             queries = sorted(queries)
-            self.usage += len(queries)
 
             collected_results = []
-            for query in queries:
-                if (
-                    "snowflake" in self.embedding_model.lower()
-                    or "arctic" in self.embedding_model.lower()
-                ):
-                    if not query.strip():
-                        logger.info("Empty query received!")
-                    query = self.query_prefix + query
-
-                if self.qdrant is None:
-                    logger.warning("Qdrant is not initialized")
-                    continue
-
-                if self.filter_condition:
-                    related_docs = self.qdrant.similarity_search_with_score(
-                        query=query,
-                        k=self.k,
+            for results in self.forward_per_query(queries, exclude_urls):
+                collected_results.extend(results)
+            return collected_results
+
+        self.forward = types.MethodType(deterministic_forward, self)
+
+    def prepare_query(self, query: str) -> str:
+        if (
+            "snowflake" in self.embedding_model.lower()
+            or "arctic" in self.embedding_model.lower()
+        ):
+            if not query.strip():
+                logger.info("Empty query received!")
+            query = self.query_prefix + query
+        return query
+
+    def search_batch(self, queries: List[str]) -> List[list]:
+        """
+        Embed the queries in one call and search them in one Qdrant request.
+
+        Args:
+            queries (List[str]): The queries, already prepared for embedding.
+
+        Returns:
+            One list of scored points per query, best first.
+        """
+        vectors = self.model.embed_documents(queries)
+
+        if self.topic_flat_index is not None:
+            return self.topic_flat_index.search_batch(vectors, self.k)
+
+        if self.flat_index is not None:
+            return self.flat_index.search_batch(vectors, self.k, self.filter_title)
+
+        if hasattr(self.client, "query_batch_points"):
+            responses = self.client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=[
+                    models.QueryRequest(
+                        query=vector,
                         filter=self.filter_condition,
-                        search_params=self.search_params,
-                    )
-                else:
-                    related_docs = self.qdrant.similarity_search_with_score(
-                        query,
-                        k=self.k,
-                        search_params=self.search_params,
+                        limit=self.k,
+                        params=self.search_params,
+                        with_payload=True,
                     )
+                    for vector in vectors
+                ],
+            )
+            return [response.points for response in responses]
 
-                related_docs = sorted(
-                    related_docs, key=lambda x: (-x[1], x[0].metadata.get("url", ""))
+        return self.client.search_batch(
+            collection_name=self.collection_name,
+            requests=[
+                models.SearchRequest(
+                    vector=vector,
+                    filter=self.filter_condition,
+                    limit=self.k,
+                    params=self.search_params,
+                    with_payload=True,
                 )
+                for vector in vectors
+            ],
+        )
 
-                for doc, score in related_docs:
-                    result = {
-                        "description": doc.metadata.get("description", ""),
-                        "snippets": [doc.page_content],
-                        "title": doc.metadata.get("title", ""),
-                        "url": doc.metadata.get("url", ""),
-                        "score": score,
-                    }
-                    collected_results.append(result)
-            return collected_results
-
-        self.forward = types.MethodType(deterministic_forward, self)
-
-    def forward(
+    def forward_per_query(
         self,
         query_or_queries: Union[str, List[str]],
-        exclude_urls: List[str],
-    ) -> List[dict]:
+        exclude_urls: List[str] = None,
+    ) -> List[List[dict]]:
         """
-        Search in your data for self.k top passages for query or queries.
+        Search self.k top passages for every query with batched embedding and Qdrant requests.
 
         Args:
             query_or_queries (Union[str, List[str]]): The query or queries to search for.
             exclude_urls (List[str]): Dummy parameter to match the interface. Does not have any effect.
 
         Returns:
-            a list of Dicts, each dict has keys of 'description', 'snippets' (list of strings), 'title', 'url'
+            One list of result dicts per query, in the order of the queries
         """
         queries = (
             [query_or_queries]
@@ -437,40 +1019,71 @@ class VectorRM(dspy.Retrieve):
             else query_or_queries
         )
         self.usage += len(queries)
-        collected_results = []
 
-        for query in queries:
-            if (
-                "snowflake" in self.embedding_model.lower()
-                or "arctic" in self.embedding_model.lower()
-            ):
-                if not query.strip():
-                    logger.info("Empty query received!")
-                query = self.query_prefix + query
-
-            if self.filter_condition:
-                related_docs = self.qdrant.similarity_search_with_score(
-                    query=query,
-                    k=self.k,
-                    filter=self.filter_condition,
-                    search_params=self.search_params,
-                )
-            else:
-                related_docs = self.qdrant.similarity_search_with_score(
-                    query,
-                    k=self.k,
-                    search_params=self.search_params,
+        if self.qdrant is None and self.flat_index is None:
+            logger.warning("Qdrant is not initialized")
+            return [[] for _ in queries]
+
+        results_per_query = [None] * len(queries)
+        cache_keys = [None] * len(queries)
+        if self.cache is not None:
+            for i, query in enumerate(queries):
+                cache_keys[i] = QueryResultCache.make_key(
+                    self.collection_name, self.filter_title, query, self.k
                 )
+                results_per_query[i] = self.cache.get(cache_keys[i])
+            num_hits = sum(results is not None for results in results_per_query)
+            # Counted from the Retriever's worker threads
+            with self.cache.lock:
+                self.cache_hits += num_hits
+                self.cache_misses += len(queries) - num_hits
+
+        missing = [i for i, results in enumerate(results_per_query) if results is None]
+        prepared_queries = [self.prepare_query(queries[i]) for i in missing]
+
+        for start in range(0, len(prepared_queries), self.search_batch_size):
+            batch = prepared_queries[start : start + self.search_batch_size]
+            batch_indices = missing[start : start + self.search_batch_size]
+            for i, points in zip(batch_indices, self.search_batch(batch)):
+                results = []
+                for point in points:
+                    payload = point.payload or {}
+                    metadata = payload.get("metadata") or {}
+                    results.append(
+                        {
+                            "description": metadata.get("description", ""),
+                            "snippets": [payload.get("page_content", "")],
+                            "title": metadata.get("title", ""),
+                            "url": metadata.get("url", ""),
+                            "score": point.score,
+                        }
+                    )
+                if self.seed is not None:
+                    results.sort(key=lambda x: (-x["score"], x["url"]))
+                results_per_query[i] = results
+                if cache_keys[i] is not None:
+                    self.cache.set(cache_keys[i], results)
 
-            for doc, score in related_docs:
-                result = {
-                    "description": doc.metadata.get("description", ""),
-                    "snippets": [doc.page_content],
-                    "title": doc.metadata.get("title", ""),
-                    "url": doc.metadata.get("url", ""),
-                    "score": score,
-                }
-                collected_results.append(result)
+        return results_per_query
+
+    def forward(
+        self,
+        query_or_queries: Union[str, List[str]],
+        exclude_urls: List[str],
+    ) -> List[dict]:
+        """
+        Search in your data for self.k top passages for query or queries.
+
+        Args:
+            query_or_queries (Union[str, List[str]]): The query or queries to search for.
+            exclude_urls (List[str]): Dummy parameter to match the interface. Does not have any effect.
+
+        Returns:
+            a list of Dicts, each dict has keys of 'description', 'snippets' (list of strings), 'title', 'url'
+        """
+        collected_results = []
+        for results in self.forward_per_query(query_or_queries, exclude_urls):
+            collected_results.extend(results)
 
         return collected_results
 
@@ -500,10 +1113,24 @@ class Retriever:
 
         return name_to_usage
 
-    def __call__(self, *args, top_k: int = None, **kwargs):
+    def __call__(
+        self, *args, top_k: int = None, group_by_query: bool = False, **kwargs
+    ):
         self.rm.k = top_k if top_k is not None else self._default_k
+        if group_by_query:
+            return self.retrieve_per_query(*args, **kwargs)
         return self.retrieve(*args, **kwargs)
 
+    async def acall(
+        self, *args, top_k: int = None, group_by_query: bool = False, **kwargs
+    ):
+        """Coroutine variant of __call__."""
+        self.rm.k = top_k if top_k is not None else self._default_k
+        results = await self.aretrieve_per_query(*args, **kwargs)
+        if group_by_query:
+            return results
+        return [info for result in results for info in result]
+
     def retrieve(
         self,
         query: Union[str, List[str]],
@@ -519,33 +1146,99 @@ class Retriever:
         Returns:
             List of Information objects
         """
-        queries = query if isinstance(query, list) else [query]
         to_return = []
+        for result in self.retrieve_per_query(query, exclude_urls=exclude_urls):
+            to_return.extend(result)
+
+        return to_return
+
+    def retrieve_per_query(
+        self,
+        query: Union[str, List[str]],
+        exclude_urls: List[str] = [],
+    ) -> List[List[Information]]:
+        """
+        Retrieve information for every query concurrently, keeping the results grouped.
+
+        Args:
+            query: The query or list of queries
+            exclude_urls: URLs to exclude from results
+
+        Returns:
+            One list of Information objects per query, in the order of the queries
+        """
+        queries = query if isinstance(query, list) else [query]
 
-        def process_query(q):
-            retrieved_data_list = self.rm(
-                query_or_queries=[q],
-                exclude_urls=exclude_urls,
+        if self.supports_batch():
+            # The retrieval model searches the whole list itself, in batched
+            # requests (VectorRM) or over its own bounded connection pool (web search)
+            retrieved_data_lists = self.rm.forward_per_query(
+                queries, exclude_urls=exclude_urls
             )
-            local_to_return = []
-            for data in retrieved_data_list:
-                for i in range(len(data["snippets"])):
-                    data["snippets"][i] = ArticleTextProcessing.remove_citations(
-                        data["snippets"][i]
-                    )
-                apollo_info = Information.from_dict(data)
-                apollo_info.meta["query"] = q
-                local_to_return.append(apollo_info)
-            return local_to_return
+            return [
+                self.to_information(retrieved_data_list, q)
+                for q, retrieved_data_list in zip(queries, retrieved_data_lists)
+            ]
 
         with concurrent.futures.ThreadPoolExecutor(
             max_workers=self.max_thread
         ) as executor:
-            results = list(executor.map(process_query, queries))
+            results = list(
+                executor.map(lambda q: self.retrieve_query(q, exclude_urls), queries)
+            )
 
-        for result in results:
-            to_return.extend(result)
+        return results
+
+    def supports_batch(self) -> bool:
+        """Whether the retrieval model can search a list of queries in one grouped call."""
+        return hasattr(self.rm, "forward_per_query")
+
+    async def aretrieve_per_query(
+        self,
+        query: Union[str, List[str]],
+        exclude_urls: List[str] = [],
+        max_concurrency: int = None,
+    ) -> List[List[Information]]:
+        """
+        Coroutine variant of retrieve_per_query.
+
+        The retrieval models are blocking, so each query runs in a worker thread;
+        a semaphore keeps at most max_concurrency (default max_thread) of them in flight.
+
+        Returns:
+            One list of Information objects per query, in the order of the queries
+        """
+        queries = query if isinstance(query, list) else [query]
+        if self.supports_batch():
+            return await asyncio.to_thread(self.retrieve_per_query, queries, exclude_urls)
+
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_thread)
+
+        async def process_query(q):
+            async with semaphore:
+                return await asyncio.to_thread(self.retrieve_query, q, exclude_urls)
+
+        return list(await asyncio.gather(*(process_query(q) for q in queries)))
 
+    def retrieve_query(self, query: str, exclude_urls: List[str] = []) -> List[Information]:
+        """Retrieve the information of a single query."""
+        retrieved_data_list = self.rm(
+            query_or_queries=[query],
+            exclude_urls=exclude_urls,
+        )
+        return self.to_information(retrieved_data_list, query)
+
+    @staticmethod
+    def to_information(retrieved_data_list: List[dict], query: str) -> List[Information]:
+        to_return = []
+        for data in retrieved_data_list:
+            for i in range(len(data["snippets"])):
+                data["snippets"][i] = ArticleTextProcessing.remove_citations(
+                    data["snippets"][i]
+                )
+            apollo_info = Information.from_dict(data)
+            apollo_info.meta["query"] = query
+            to_return.append(apollo_info)
         return to_return
 
     def print_results(self, search_results):
@@ -68,4 +68,48 @@ def load_domains(
         print(f"No valid domains found. Available: {list(all_domains.keys())}")
         return None
 
-    return filtered_domains
\ No newline at end of file
+    return filtered_domains
+
+
+# =============================================
+# Helper Functions for Async Execution
+# =============================================
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+def run_coroutine(coro):
+    """Run coro to completion from sync code, also when an event loop already runs in this thread."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+# =============================================
+# Helper Functions for URL Matching
+# =============================================
+
+from urllib.parse import urlsplit
+
+
+def normalize_url(url: str) -> str:
+    """Key under which near-duplicate URLs match.
+
+    Drops the scheme and fragment, lowercases the host and strips the trailing
+    slash of the path, so http://a.org/x/, https://A.org/x and
+    https://a.org/x#intro all map to "a.org/x".
+    """
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    if not parts.netloc:
+        return url.strip().rstrip("/")
+    key = parts.netloc.lower() + parts.path.rstrip("/")
+    if parts.query:
+        key += f"?{parts.query}"
+    return key
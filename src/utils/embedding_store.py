@@ -0,0 +1,148 @@
+import os
+import re
+import json
+import hashlib
+from typing import Callable, List
+
+import numpy as np
+
+from .logger import setup_logging, get_logger
+
+setup_logging()
+logger = get_logger(__name__)
+
+
+class SnippetEmbeddingStore:
+    """On-disk store of snippet embeddings for one embedding model.
+
+    Embeddings are saved as a .npy matrix (loaded memory-mapped) next to a JSON
+    index holding the content hash of the snippet behind each row. Only snippets
+    whose hash is missing from the index are encoded on later runs.
+
+    Layout:
+        <store_dir>/embeddings/<model_slug>/embeddings.npy
+        <store_dir>/embeddings/<model_slug>/index.json
+    """
+
+    def __init__(
+        self,
+        store_dir: str,
+        embedding_model: str,
+        dtype: str = "float32",
+    ):
+        """
+        Params:
+            store_dir: Directory of the topic, usually where gather_info.json lives.
+            embedding_model: Name of the model the embeddings come from.
+            dtype: Storage dtype of the matrix, "float32" or "float16".
+        """
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported embedding dtype: {dtype}")
+
+        self.embedding_model = embedding_model
+        self.dtype = np.dtype(dtype)
+
+        model_slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", embedding_model)
+        self.store_dir = os.path.join(store_dir, "embeddings", model_slug)
+        self.matrix_path = os.path.join(self.store_dir, "embeddings.npy")
+        self.index_path = os.path.join(self.store_dir, "index.json")
+
+    @staticmethod
+    def hash_snippet(snippet: str) -> str:
+        return hashlib.sha256(snippet.encode("utf-8")).hexdigest()
+
+    def load(self):
+        """Return (hashes, matrix) of the store, or ([], None) if it is missing or stale."""
+        if not (os.path.exists(self.matrix_path) and os.path.exists(self.index_path)):
+            return [], None
+
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            matrix = np.load(self.matrix_path, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable embedding store {self.store_dir}: {e}")
+            return [], None
+
+        hashes = index.get("hashes", [])
+        if (
+            index.get("embedding_model") != self.embedding_model
+            or matrix.dtype != self.dtype
+            or matrix.ndim != 2
+            or matrix.shape[0] != len(hashes)
+        ):
+            logger.warning(f"Ignoring stale embedding store {self.store_dir}")
+            return [], None
+
+        return hashes, matrix
+
+    def save(self, hashes: List[str], matrix: np.ndarray):
+        """Atomically replace the store with the given rows."""
+        os.makedirs(self.store_dir, exist_ok=True)
+
+        tmp_matrix_path = f"{self.matrix_path}.{os.getpid()}.tmp"
+        with open(tmp_matrix_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(matrix, dtype=self.dtype))
+        tmp_index_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_index_path, "w", encoding="utf-8") as f:
+            json.dump({"embedding_model": self.embedding_model, "hashes": hashes}, f)
+
+        os.replace(tmp_matrix_path, self.matrix_path)
+        os.replace(tmp_index_path, self.index_path)
+
+    def load_or_encode(
+        self,
+        snippets: List[str],
+        encode_fn: Callable[[List[str]], np.ndarray],
+    ) -> np.ndarray:
+        """Return one embedding row per snippet, encoding only the unseen ones.
+
+        When the store already holds the snippets in the same order the memory-mapped
+        matrix is returned as is, without copying it into memory.
+
+        Args:
+            snippets: Snippets in the row order expected by the caller.
+            encode_fn: Function encoding a list of snippets into a 2D array.
+        """
+        hashes = [self.hash_snippet(snippet) for snippet in snippets]
+        stored_hashes, stored_matrix = self.load()
+
+        if stored_matrix is not None and stored_hashes[: len(hashes)] == hashes:
+            logger.info(f"Loaded {len(hashes)} snippet embeddings from {self.store_dir}")
+            return stored_matrix[: len(hashes)]
+
+        hash_to_row = {h: row for row, h in enumerate(stored_hashes)}
+        missing = list(dict.fromkeys(h for h in hashes if h not in hash_to_row))
+        snippet_by_hash = dict(zip(hashes, snippets))
+
+        new_embeddings = None
+        if missing:
+            new_embeddings = np.asarray(
+                encode_fn([snippet_by_hash[h] for h in missing]), dtype=self.dtype
+            )
+        logger.info(
+            f"Encoded {len(missing)} new snippets, reused {len(set(hashes)) - len(missing)} from {self.store_dir}"
+        )
+
+        rows = []
+        missing_to_row = {h: i for i, h in enumerate(missing)}
+        for h in hashes:
+            if h in missing_to_row:
+                rows.append(new_embeddings[missing_to_row[h]])
+            else:
+                rows.append(stored_matrix[hash_to_row[h]])
+
+        # Keep the rows of the current snippets first so the next identical run is zero-copy
+        current = set(hashes)
+        leftover_hashes = [h for h in stored_hashes if h not in current]
+        leftover_rows = [stored_matrix[hash_to_row[h]] for h in leftover_hashes]
+
+        all_rows = rows + leftover_rows
+        if not all_rows:
+            return np.empty((0, 0), dtype=self.dtype)
+
+        self.save(hashes + leftover_hashes, np.stack(all_rows))
+        _, matrix = self.load()
+        if matrix is None:
+            return np.stack(rows)
+        return matrix[: len(hashes)]
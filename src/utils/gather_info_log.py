@@ -0,0 +1,136 @@
+import os
+import json
+import threading
+from typing import Any, Dict, List, Optional
+
+from .logger import setup_logging, get_logger
+
+setup_logging()
+logger = get_logger(__name__)
+
+
+class GatherInfoLog:
+    """Append-only journal of the queries gathered for a topic.
+
+    Every retrieved query is appended as one JSON line to gather_info.jsonl, so
+    recording a query costs a single small write instead of re-serializing the
+    whole gather_info. The journal is compacted into gather_info.json at depth
+    boundaries; a crash in between only loses the line being written.
+
+    Layout:
+        <topic_dir>/gather_info.json   compacted gather_info
+        <topic_dir>/gather_info.jsonl  {"depth", "query", "search_results"} per line
+    """
+
+    def __init__(self, gather_info_path):
+        """
+        Params:
+            gather_info_path: Path of the compacted gather_info.json.
+        """
+        self.gather_info_path = str(gather_info_path)
+        self.journal_path = self.journal_path_for(self.gather_info_path)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def journal_path_for(gather_info_path) -> str:
+        root, _ = os.path.splitext(str(gather_info_path))
+        return f"{root}.jsonl"
+
+    def exists(self) -> bool:
+        return os.path.exists(self.gather_info_path) or os.path.exists(
+            self.journal_path
+        )
+
+    def append(self, depth: int, query_data: Dict[str, Any]):
+        """Append the results of one query at depth to the journal."""
+        record = {"depth": str(depth), **query_data}
+        line = json.dumps(record, ensure_ascii=True) + "\n"
+        with self._lock:
+            os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+
+    @staticmethod
+    def read_journal(journal_path) -> List[Dict[str, Any]]:
+        """Read the journal records, skipping a line torn by a crash."""
+        if not os.path.exists(journal_path):
+            return []
+
+        records = []
+        with open(journal_path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(
+                        f"Skipping unreadable line {line_no} of {journal_path}"
+                    )
+        return records
+
+    @staticmethod
+    def apply_journal(
+        gather_info: Dict[str, Any], records: List[Dict[str, Any]]
+    ) -> int:
+        """Add the journal records missing from gather_info, returning how many were added."""
+        queries_by_depth = gather_info.setdefault("queries_by_depth", {})
+        recorded = {
+            (depth, query_data.get("query"))
+            for depth, queries in queries_by_depth.items()
+            for query_data in queries
+        }
+
+        added = 0
+        for record in records:
+            record = dict(record)
+            depth = str(record.pop("depth", 0))
+            key = (depth, record.get("query"))
+            # Records compacted just before a crash can still be in the journal
+            if key in recorded:
+                continue
+            queries_by_depth.setdefault(depth, []).append(record)
+            recorded.add(key)
+            added += 1
+        return added
+
+    @classmethod
+    def load_file(cls, path) -> Dict[str, Any]:
+        """Load gather_info from either gather_info.json or its .jsonl journal.
+
+        Given the compacted file, the queries left in the journal next to it are
+        added on top.
+        """
+        path = str(path)
+        if path.endswith(".jsonl"):
+            gather_info_path = f"{path[: -len('.jsonl')]}.json"
+        else:
+            gather_info_path = path
+        return cls(gather_info_path).load()
+
+    def load(self, gather_info: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Return the compacted gather_info (or the given base) with the journal applied."""
+        if os.path.exists(self.gather_info_path):
+            with open(self.gather_info_path, "r", encoding="utf-8") as f:
+                gather_info = json.load(f)
+        elif gather_info is None:
+            gather_info = {"queries_by_depth": {}}
+
+        added = self.apply_journal(gather_info, self.read_journal(self.journal_path))
+        if added:
+            logger.info(f"Recovered {added} queries from {self.journal_path}")
+        return gather_info
+
+    def compact(self, gather_info: Dict[str, Any]):
+        """Atomically write gather_info.json and empty the journal."""
+        with self._lock:
+            os.makedirs(os.path.dirname(self.gather_info_path) or ".", exist_ok=True)
+            tmp_path = f"{self.gather_info_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(gather_info, f, indent=4, ensure_ascii=True)
+            os.replace(tmp_path, self.gather_info_path)
+
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
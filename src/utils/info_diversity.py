@@ -4,9 +4,10 @@ import json
 import numpy as np
 from tqdm import tqdm
 
-from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 
+from .model_registry import EmbeddingModelRegistry
+
 
 RUNS_EVAL = {
     "o_rag": [
@@ -97,7 +98,7 @@ def eval_info_diversity_per_depth(
     pipeline: str = "apollo",
     show_progress_bar: bool = True,
 ) -> dict:
-    model = SentenceTransformer(embedding_model, trust_remote_code=True)
+    model = EmbeddingModelRegistry.get_sentence_transformer(embedding_model)
 
     all_diversity = []
     depth_snippets = [[] for _ in range(max_depth)]
@@ -138,14 +139,6 @@ def eval_info_diversity_per_depth(
             per_depth.append(1.0 - mean_sim)
         else:
             per_depth.append(0.0)
-    try:
-        import torch, gc
-
-        del model
-        torch.cuda.empty_cache()
-        gc.collect()
-    except ImportError:
-        pass
 
     return {
         "pipeline": pipeline,
@@ -153,3 +146,86 @@ def eval_info_diversity_per_depth(
         "average_diversity": avg_div,
         "per_depth_diversity": per_depth,
     }
+
+
+class InfoDiversityTracker:
+    """Incremental information-diversity metric for a single KG build.
+
+    Only the snippets added since the last update are embedded. The tracker keeps
+    the sum of the normalized embeddings overall and per depth, so the mean
+    pairwise cosine similarity follows from
+    sum_{i<j} e_i . e_j = (|sum_i e_i|^2 - n) / 2
+    without ever building the N x N similarity matrix.
+    """
+
+    def __init__(self, embedding_model: str = "paraphrase-MiniLM-L6-v2"):
+        self.embedding_model = embedding_model
+        self.total_sum = None
+        self.total_count = 0
+        self.depth_sums = {}
+        self.depth_counts = {}
+        self.seen_entries = {}
+
+    @staticmethod
+    def mean_pairwise_similarity(sum_vector, count: int) -> float:
+        if sum_vector is None or count < 2:
+            return 0.0
+        pair_sum = (float(np.dot(sum_vector, sum_vector)) - count) / 2.0
+        return pair_sum / (count * (count - 1) / 2.0)
+
+    def update(self, depth: int, snippets: list):
+        """Embed the snippet lists added at depth and fold them into the running sums."""
+        if not snippets:
+            return
+
+        model = EmbeddingModelRegistry.get_sentence_transformer(self.embedding_model)
+        embeddings = model.encode(
+            [" ".join(snippet) for snippet in snippets], show_progress_bar=False
+        )
+        embeddings = np.asarray(embeddings, dtype=np.float64)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings = embeddings / np.maximum(norms, 1e-12)
+        batch_sum = embeddings.sum(axis=0)
+
+        key = str(depth)
+        if self.total_sum is None:
+            self.total_sum = np.zeros_like(batch_sum)
+        self.total_sum += batch_sum
+        self.total_count += len(embeddings)
+        self.depth_sums[key] = self.depth_sums.get(key, 0) + batch_sum
+        self.depth_counts[key] = self.depth_counts.get(key, 0) + len(embeddings)
+
+    def update_from_gather_info(self, gather_info: dict):
+        """Track the gather_info entries recorded since the previous call."""
+        for depth, queries in gather_info.get("queries_by_depth", {}).items():
+            start = self.seen_entries.get(depth, 0)
+            new_snippets = []
+            for qry in queries[start:]:
+                for res in qry.get("search_results", []):
+                    if s := res.get("snippets"):
+                        new_snippets.append(s)
+            self.seen_entries[depth] = len(queries)
+            self.update(int(depth), new_snippets)
+
+    def report(self) -> dict:
+        per_depth = {
+            depth: 1.0
+            - self.mean_pairwise_similarity(self.depth_sums[depth], count)
+            if count > 1
+            else 0.0
+            for depth, count in sorted(
+                self.depth_counts.items(), key=lambda item: int(item[0])
+            )
+        }
+        average = (
+            1.0 - self.mean_pairwise_similarity(self.total_sum, self.total_count)
+            if self.total_count > 1
+            else 0.0
+        )
+        return {
+            "pipeline": "apollo",
+            "model": self.embedding_model,
+            "num_snippets": self.total_count,
+            "average_diversity": average,
+            "per_depth_diversity": per_depth,
+        }
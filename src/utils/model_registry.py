@@ -0,0 +1,114 @@
+import gc
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from .common import get_device
+from .logger import setup_logging, get_logger
+
+setup_logging()
+logger = get_logger(__name__)
+
+
+class SentenceTransformerEmbeddings(Embeddings):
+    """LangChain Embeddings over a shared SentenceTransformer.
+
+    Encodes like HuggingFaceEmbeddings (newlines replaced by spaces, normalized
+    vectors) without loading a second copy of the model.
+    """
+
+    def __init__(self, client, normalize_embeddings: bool = True):
+        self.client = client
+        self.normalize_embeddings = normalize_embeddings
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        texts = [text.replace("\n", " ") for text in texts]
+        embeddings = self.client.encode(
+            texts, normalize_embeddings=self.normalize_embeddings
+        )
+        return embeddings.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class EmbeddingModelRegistry:
+    """Process-wide registry of embedding models.
+
+    Each encoder is loaded once per (model name, device) and shared by every
+    caller in the process, whether used directly or through LangChain, so batch
+    runs over many topics stop paying the load time and holding duplicate copies
+    in RAM/VRAM. Models stay loaded until they are released explicitly.
+    """
+
+    _models: Dict[Tuple[str, str], Any] = {}
+    _key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def _make_key(cls, model_name: str, device=None):
+        # Resolve the default device, so callers omitting it share the same copy
+        return (model_name, str(device if device is not None else get_device()))
+
+    @classmethod
+    def _get_or_load(cls, key, loader: Callable[[], Any]):
+        with cls._lock:
+            if key in cls._models:
+                return cls._models[key]
+            key_lock = cls._key_locks.setdefault(key, threading.Lock())
+
+        # Load outside the registry lock so different models can load concurrently
+        with key_lock:
+            with cls._lock:
+                if key in cls._models:
+                    return cls._models[key]
+            logger.info(f"Loading embedding model {key[0]} on {key[1]}")
+            model = loader()
+            with cls._lock:
+                cls._models[key] = model
+            return model
+
+    @classmethod
+    def get_sentence_transformer(cls, model_name: str, device=None):
+        """Return the shared SentenceTransformer for model_name on device."""
+
+        def loader():
+            from sentence_transformers import SentenceTransformer
+
+            return SentenceTransformer(model_name, device=key[1], trust_remote_code=True)
+
+        key = cls._make_key(model_name, device)
+        return cls._get_or_load(key, loader)
+
+    @classmethod
+    def get_hf_embeddings(cls, model_name: str, device=None) -> Embeddings:
+        """Return normalizing LangChain embeddings over the shared SentenceTransformer."""
+        return SentenceTransformerEmbeddings(
+            cls.get_sentence_transformer(model_name, device=device)
+        )
+
+    @classmethod
+    def release(cls, model_name: Optional[str] = None, device=None):
+        """Release the models of model_name (on device if given), or every model."""
+        with cls._lock:
+            keys = [
+                key
+                for key in cls._models
+                if model_name is None
+                or (key[0] == model_name and (device is None or key[1] == str(device)))
+            ]
+            for key in keys:
+                cls._models.pop(key, None)
+                cls._key_locks.pop(key, None)
+
+        if keys:
+            logger.info(f"Released {len(keys)} embedding model(s)")
+            gc.collect()
+            try:
+                import torch
+
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+            except ImportError:
+                pass
@@ -1,4 +1,6 @@
 import json
+import threading
+from typing import Any, Dict, List, Optional, Union
 from pipeline.apollo.src.utils.logger import setup_logging, get_logger
 
 from pipeline.apollo.src import LLM
@@ -10,8 +12,206 @@ logger = get_logger(__name__)
 logger.disabled = True
 
 
+class KGData:
+    """Parsed knowledge graph passed between the KG modules.
+
+    Wraps the graph dict as parsed from the LM output, keeping its key order and
+    any extra keys. It is validated once and handed from GraphGenerator to
+    HierarchyGenerator and the merge as is; to_json is only needed at I/O
+    boundaries (LM prompts and files).
+    """
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None):
+        self.data = data if data is not None else {"nodes": [], "edges": []}
+        self.data.setdefault("nodes", [])
+        self.data.setdefault("edges", [])
+
+    @property
+    def nodes(self) -> List[Dict]:
+        return self.data["nodes"]
+
+    @property
+    def edges(self) -> List[Dict]:
+        return self.data["edges"]
+
+    @classmethod
+    def coerce(cls, graph: Union["KGData", Dict, str]) -> "KGData":
+        """Wrap a dict or JSON string, returning KGData instances unchanged."""
+        if isinstance(graph, KGData):
+            return graph
+        if isinstance(graph, str):
+            graph = json.loads(graph)
+        return cls(graph)
+
+    def validate(self) -> "KGData":
+        """Drop, in one pass, the nodes without an id and the edges not linking two of the nodes."""
+        valid_nodes = []
+        for i, node in enumerate(self.nodes):
+            if isinstance(node, dict) and node.get("id") is not None:
+                valid_nodes.append(node)
+            else:
+                logger.info(f"Removing node {i} without an id: {node}")
+        self.data["nodes"] = valid_nodes
+
+        node_ids = {node["id"] for node in valid_nodes}
+        valid_edges = []
+        for i, edge in enumerate(self.edges):
+            if not isinstance(edge, dict):
+                logger.info(f"Warning: Edge {i} is not an object")
+            elif edge.get("from") not in node_ids:
+                logger.info(
+                    f"Warning: Edge {i} references non-existent 'from' node: {edge.get('from')}"
+                )
+            elif edge.get("to") not in node_ids:
+                logger.info(
+                    f"Warning: Edge {i} references non-existent 'to' node: {edge.get('to')}"
+                )
+            else:
+                valid_edges.append(edge)
+                continue
+            logger.info(f"Removing invalid edge: {edge}")
+
+        self.data["edges"] = valid_edges
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self.data
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.data, indent=indent)
+
+    def __str__(self) -> str:
+        return self.to_json()
+
+
+_fixing_lm = None
+_fixing_lm_lock = threading.Lock()
+
+
+def get_fixing_lm():
+    """LM shared by every fixing_agent call of the process."""
+    global _fixing_lm
+    with _fixing_lm_lock:
+        if _fixing_lm is None:
+            _fixing_lm = LLM("gpt-4o-mini")
+        return _fixing_lm
+
+
+def strip_json_wrappers(text: str) -> str:
+    """Drop markdown fences, triple quotes and any text around the outer JSON value."""
+    if '"""' in text:
+        text = text.replace('"""', '"')
+    if "```" in text:
+        text = text.replace("```json", "").replace("```", "")
+
+    starts = [pos for pos in (text.find("{"), text.find("[")) if pos != -1]
+    if not starts:
+        return text.strip()
+    return text[min(starts) :].strip()
+
+
+def _drop_trailing_comma(out: list):
+    """Remove a comma (and the whitespace after it) at the end of out."""
+    i = len(out) - 1
+    while i >= 0 and out[i] in " \t\r\n":
+        i -= 1
+    if i >= 0 and out[i] == ",":
+        del out[i:]
+
+
+def repair_json(text: str) -> Optional[Any]:
+    """Parse almost-JSON produced by an LM without calling a model.
+
+    In a single pass over the text it strips // and /* */ comments and trailing
+    commas, turns single-quoted strings into double-quoted ones and escapes raw
+    newlines and control characters inside strings. If the text is truncated,
+    it is cut after the last complete element of the outermost array (e.g. the
+    last full node or edge, never inside one) and the open brackets are closed.
+
+    Returns the parsed value, or None when the text is still not valid JSON.
+    """
+    text = strip_json_wrappers(text)
+    closers = {"{": "}", "[": "]"}
+    out = []
+    stack = []
+    # (len(out), open brackets) after the last complete element of the outermost array
+    checkpoint = None
+    quote = None
+    i, n = 0, len(text)
+
+    while i < n:
+        ch = text[i]
+
+        if quote:
+            if ch == "\\" and i + 1 < n:
+                nxt = text[i + 1]
+                # \' is not a valid JSON escape, the quote needs none in "..."
+                out.append(nxt if nxt == "'" else ch + nxt)
+                i += 2
+                continue
+            if ch == quote:
+                out.append('"')
+                quote = None
+            elif ch == '"':
+                out.append('\\"')
+            elif ch == "\n":
+                out.append("\\n")
+            elif ch == "\r":
+                out.append("\\r")
+            elif ch == "\t":
+                out.append("\\t")
+            elif ord(ch) < 0x20:
+                out.append(f"\\u{ord(ch):04x}")
+            else:
+                out.append(ch)
+            i += 1
+            continue
+
+        if ch == "/" and text.startswith("//", i):
+            end = text.find("\n", i)
+            i = n if end == -1 else end
+            continue
+        if ch == "/" and text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+            continue
+
+        if ch in "\"'":
+            quote = ch
+            out.append('"')
+        elif ch in closers:
+            stack.append(ch)
+            out.append(ch)
+        elif ch in "}]":
+            _drop_trailing_comma(out)
+            if stack and closers[stack[-1]] == ch:
+                stack.pop()
+            out.append(ch)
+            if stack and stack[-1] == "[" and "[" not in stack[:-1]:
+                checkpoint = (len(out), list(stack))
+            elif not stack and text[i + 1 :].strip():
+                # Ignore whatever the LM wrote after the outer value
+                break
+        else:
+            out.append(ch)
+        i += 1
+
+    if quote or stack:
+        if checkpoint is None:
+            return None
+        length, stack = checkpoint
+        del out[length:]
+        _drop_trailing_comma(out)
+        out.extend(closers[bracket] for bracket in reversed(stack))
+
+    try:
+        return json.loads("".join(out))
+    except json.JSONDecodeError:
+        return None
+
+
 def fixing_agent(kg_dict):
-    lm = LLM("gpt-4o-mini")
+    lm = get_fixing_lm()
     prompt = f"""
 
     The following dict is intended to be a pure JSON, but has errors (comments, trailing commas, bad quotes, etc).
@@ -37,8 +237,13 @@ def fixing_agent(kg_dict):
     return fixed_kg
 
 
-def validate_knowledge_graph(kg_text):
+def validate_knowledge_graph(kg_text) -> str:
     """Ensures all nodes referenced in edges actually exist in the nodes list."""
+    return parse_knowledge_graph(kg_text).to_json()
+
+
+def parse_knowledge_graph(kg_text) -> KGData:
+    """Parse the LM output into a KGData, repairing it if needed, and validate its edges."""
     parsed_kg = None
     last_err = None
 
@@ -59,20 +264,13 @@ def validate_knowledge_graph(kg_text):
         position_marker = " " * (min(100, e.pos - start)) + "^"
         print(f"   {position_marker}")
 
-    # --- Attempt 2: manual hacks ---
+    # --- Attempt 2: local repair (fences, comments, quotes, trailing commas, truncation) ---
     if parsed_kg is None:
-        try:
-            fixed = kg_text
-            if '"""' in fixed:
-                fixed = fixed.replace('"""', '"')
-                logger.info("Applied triple-quote replacement")
-            if "```json" in fixed or "```" in fixed:
-                fixed = fixed.replace("```json", "").replace("```", "")
-                logger.info("Removed markdown code fences")
-            parsed_kg = json.loads(fixed)
-        except Exception as e:
-            last_err = e
-            logger.info("Manual fixes failed to parse JSON")
+        parsed_kg = repair_json(kg_text)
+        if parsed_kg is not None:
+            logger.info("Local JSON repair succeeded")
+        else:
+            logger.info("Local JSON repair failed to parse JSON")
 
     # --- Attempts 3 & 4: LLM cleanup ---
     attempts = 0
@@ -80,40 +278,24 @@ def validate_knowledge_graph(kg_text):
         attempts += 1
         try:
             cleaned = fixing_agent(kg_text)
-            parsed_kg = json.loads(cleaned)
+            parsed_kg = repair_json(cleaned)
+            if parsed_kg is None:
+                parsed_kg = json.loads(cleaned)
             logger.info(f"LLM cleaning succeeded on attempt {attempts}")
         except Exception as e:
             last_err = e
             logger.info(f"LLM cleaning attempt {attempts} failed: {e}")
 
     # --- Give up: fallback to empty graph ---
-    if parsed_kg is None:
+    if not isinstance(parsed_kg, dict):
         logger.warning(
             "All JSON parsing attempts failed. "
             "Proceeding with an empty graph to avoid interrupting execution."
         )
         parsed_kg = {"nodes": [], "edges": []}
 
-    node_ids = {node["id"] for node in parsed_kg["nodes"]}
-    invalid_edges = []
-
-    for i, edge in enumerate(parsed_kg["edges"]):
-        if edge["from"] not in node_ids:
-            logger.info(
-                f"Warning: Edge {i} references non-existent 'from' node: {edge['from']}"
-            )
-            invalid_edges.append(i)
-        elif edge["to"] not in node_ids:
-            logger.info(
-                f"Warning: Edge {i} references non-existent 'to' node: {edge['to']}"
-            )
-            invalid_edges.append(i)
-
-    for i in sorted(invalid_edges, reverse=True):
-        logger.info(f"Removing invalid edge: {parsed_kg['edges'][i]}")
-        parsed_kg["edges"].pop(i)
-
-    return json.dumps(parsed_kg, indent=2)
+    # A truncated graph may be cut before its edges, KGData fills them in
+    return KGData(parsed_kg).validate()
 
 
 from collections import defaultdict
@@ -127,7 +309,7 @@ def extract_groups(data):
         except json.JSONDecodeError:
             raise ValueError("Invalid JSON string for kg_data.")
 
-    edges = data["edges"]
+    edges = data.edges if isinstance(data, KGData) else data["edges"]
 
     # Step 1: Group edges by (from, relationship)
     group_map = defaultdict(list)
@@ -2,8 +2,8 @@ import os
 import sys
 import json
 import inspect
+import threading
 from pathlib import Path
-from pyvis.network import Network
 
 try:
     from .start_server import run_server_in_background, is_web_server_running
@@ -49,6 +49,7 @@ def handle_server_start(
 
 def create_network(kg_data, height="900px", width="100%"):
     """Creates a Knowledge Graph Network"""
+    from pyvis.network import Network
 
     net = Network(
         height=height,
@@ -565,6 +566,33 @@ def setup_paths(output_file: str = None):
     return str(html_path), str(json_path)
 
 
+# off: only save the JSON; final: render merged/normalized graphs only;
+# all: render every graph; deferred: save the JSON and queue it for render_deferred
+VIZ_POLICIES = ("off", "final", "all", "deferred")
+DEFERRED_MANIFEST = "deferred_plots.txt"
+
+_manifest_lock = threading.Lock()
+
+
+def should_render(policy="all", final=False):
+    if policy not in VIZ_POLICIES:
+        raise ValueError(f"Unknown visualization policy {policy!r}, expected one of {VIZ_POLICIES}")
+    return policy == "all" or (policy == "final" and final)
+
+
+def defer_plot(json_path):
+    """Queue json_path in the manifest of its directory for render_deferred."""
+    manifest_path = os.path.join(os.path.dirname(json_path), DEFERRED_MANIFEST)
+    with _manifest_lock:
+        with open(manifest_path, "a", encoding="utf-8") as f:
+            f.write(os.path.basename(json_path) + "\n")
+
+
+def render_html(kg_data, html_path):
+    net = create_network(kg_data)
+    save_html(net, html_path)
+
+
 def plot_kg(
     kg_data,
     file_name=None,
@@ -572,24 +600,79 @@ def plot_kg(
     port=8086,
     start_server=True,
     verbose = False,
+    policy="all",
+    final=False,
 ):
+    """Save kg_data as JSON next to output_file and render it to HTML as policy allows.
+
+    The JSON is always written since resumed runs reload subgraphs from it. The
+    web server is only started from the main thread, never from LLM workers.
+    """
     if isinstance(kg_data, str):
         try:
             kg_data = json.loads(kg_data)
         except json.JSONDecodeError:
             raise ValueError("Invalid JSON string for kg_data.")
+    elif hasattr(kg_data, "to_dict"):
+        kg_data = kg_data.to_dict()
 
     html_path, json_path = setup_paths(output_file)
-
-    net = create_network(kg_data)
-    save_html(net, html_path)
     save_json(kg_data, json_path)
 
+    if policy == "deferred":
+        defer_plot(json_path)
+        return
+    if not should_render(policy, final):
+        return
+
+    render_html(kg_data, html_path)
+
     # print(f"Knowledge graph saved to: {html_path}")
-    handle_server_start(html_path, start_server, port, verbose)
+    if threading.current_thread() is threading.main_thread():
+        handle_server_start(html_path, start_server, port, verbose)
+
+
+def render_manifest(manifest_path):
+    """Render the graphs listed in one deferred manifest, then remove it."""
+    manifest_path = Path(manifest_path)
+    names = dict.fromkeys(
+        line.strip()
+        for line in manifest_path.read_text(encoding="utf-8").splitlines()
+        if line.strip()
+    )
+    rendered = 0
+    for name in names:
+        json_path = manifest_path.parent / name
+        if not json_path.exists():
+            continue
+        kg_data = json.loads(json_path.read_text(encoding="utf-8"))
+        render_html(kg_data, str(json_path.with_suffix(".html")))
+        rendered += 1
+    manifest_path.unlink()
+    return rendered
+
+
+def render_deferred(root_dir, max_workers=1):
+    """Render the HTML of every graph queued by deferred plot_kg calls under root_dir.
+
+    Returns the number of rendered graphs. A manifest is removed once all of its
+    graphs are rendered, so the renderer can be re-run after a failure.
+    """
+    manifests = sorted(Path(root_dir).rglob(DEFERRED_MANIFEST))
+    if max_workers <= 1:
+        return sum(render_manifest(path) for path in manifests)
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return sum(executor.map(render_manifest, manifests))
 
 
-if __name__ == "__main__":
+if __name__ == "__main__" and len(sys.argv) > 1:
+    # python vizualize_kg.py <output_dir> [max_workers]: render deferred graphs
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    print(f"Rendered {render_deferred(sys.argv[1], max_workers=workers)} graphs")
+elif __name__ == "__main__":
     example_data = {
         "nodes": [
             {"id": 1, "label": "Concept A"},
@@ -0,0 +1,111 @@
+"""Tests of the gather_info query journal: append, replay, dedup and compaction."""
+
+import json
+import os
+import tempfile
+import unittest
+
+from pipeline.apollo.src.utils.gather_info_log import GatherInfoLog
+
+
+def query_data(query, url):
+    return {"query": query, "search_results": [{"url": url, "snippets": []}]}
+
+
+class GatherInfoLogTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "topic", "gather_info.json")
+        self.log = GatherInfoLog(self.path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_journal_sits_next_to_gather_info(self):
+        self.assertEqual(
+            self.log.journal_path, os.path.join(self.tmp_dir.name, "topic", "gather_info.jsonl")
+        )
+        self.assertFalse(self.log.exists())
+
+    def test_replays_journal_without_compacted_file(self):
+        self.log.append(1, query_data("q1", "https://a.org"))
+        self.log.append(2, query_data("q2", "https://b.org"))
+
+        gather_info = self.log.load()
+
+        self.assertTrue(self.log.exists())
+        self.assertEqual(
+            gather_info["queries_by_depth"],
+            {"1": [query_data("q1", "https://a.org")], "2": [query_data("q2", "https://b.org")]},
+        )
+
+    def test_replay_skips_queries_already_compacted(self):
+        compacted = {"queries_by_depth": {"1": [query_data("q1", "https://a.org")]}}
+        self.log.compact(compacted)
+        # A crash right after compaction can leave the same query journaled again
+        self.log.append(1, query_data("q1", "https://a.org"))
+        self.log.append(1, query_data("q1", "https://a.org"))
+        self.log.append(1, query_data("q2", "https://b.org"))
+        # The same query at another depth is a different record
+        self.log.append(2, query_data("q1", "https://c.org"))
+
+        gather_info = self.log.load()
+
+        self.assertEqual(
+            [q["query"] for q in gather_info["queries_by_depth"]["1"]], ["q1", "q2"]
+        )
+        self.assertEqual(
+            gather_info["queries_by_depth"]["2"], [query_data("q1", "https://c.org")]
+        )
+
+    def test_apply_journal_counts_added_records(self):
+        gather_info = {"queries_by_depth": {"0": [query_data("q0", "https://a.org")]}}
+        records = [
+            {"depth": "0", **query_data("q0", "https://a.org")},
+            {"depth": 0, **query_data("q1", "https://b.org")},
+        ]
+
+        added = GatherInfoLog.apply_journal(gather_info, records)
+
+        self.assertEqual(added, 1)
+        self.assertEqual(
+            [q["query"] for q in gather_info["queries_by_depth"]["0"]], ["q0", "q1"]
+        )
+        # The records passed in are left untouched
+        self.assertEqual(records[0]["depth"], "0")
+
+    def test_skips_torn_last_line(self):
+        self.log.append(1, query_data("q1", "https://a.org"))
+        with open(self.log.journal_path, "a", encoding="utf-8") as f:
+            f.write('{"depth": "1", "query": "q2", "search_res')
+
+        records = GatherInfoLog.read_journal(self.log.journal_path)
+
+        self.assertEqual([r["query"] for r in records], ["q1"])
+
+    def test_compact_writes_gather_info_and_removes_journal(self):
+        self.log.append(1, query_data("q1", "https://a.org"))
+        gather_info = self.log.load({"topic": "t", "queries_by_depth": {}})
+
+        self.log.compact(gather_info)
+
+        self.assertFalse(os.path.exists(self.log.journal_path))
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f), gather_info)
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["gather_info.json"])
+
+    def test_load_file_accepts_either_path(self):
+        self.log.compact({"queries_by_depth": {"1": [query_data("q1", "https://a.org")]}})
+        self.log.append(1, query_data("q2", "https://b.org"))
+
+        for path in (self.path, self.log.journal_path):
+            with self.subTest(path=path):
+                gather_info = GatherInfoLog.load_file(path)
+                self.assertEqual(
+                    [q["query"] for q in gather_info["queries_by_depth"]["1"]],
+                    ["q1", "q2"],
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""Tests of the local JSON repair and validation of LM knowledge graphs."""
+
+import unittest
+
+from pipeline.apollo.src.utils.resolver_kg import (
+    KGData,
+    parse_knowledge_graph,
+    repair_json,
+)
+
+
+class RepairJsonTest(unittest.TestCase):
+    def test_strips_fences_comments_and_trailing_commas(self):
+        text = """Here is the graph:
+```json
+{
+  // the nodes
+  "nodes": [{"id": "a"}, {"id": "b"},],
+  /* no edges yet */
+  "edges": [],
+}
+```"""
+
+        self.assertEqual(
+            repair_json(text), {"nodes": [{"id": "a"}, {"id": "b"}], "edges": []}
+        )
+
+    def test_fixes_quotes_and_raw_newlines(self):
+        text = "{'nodes': [{'id': 'a', 'label': 'it\\'s \"quoted\"\nover lines'}]}"
+
+        self.assertEqual(
+            repair_json(text),
+            {"nodes": [{"id": "a", "label": 'it\'s "quoted"\nover lines'}]},
+        )
+
+    def test_ignores_text_after_the_value(self):
+        self.assertEqual(repair_json('{"nodes": []} Let me know!'), {"nodes": []})
+
+    def test_cuts_truncated_text_after_the_last_whole_edge(self):
+        text = (
+            '{"nodes": [{"id": "a"}, {"id": "b"}], '
+            '"edges": [{"from": "a", "to": "b"}, {"from": "b", "to'
+        )
+
+        self.assertEqual(
+            repair_json(text),
+            {
+                "nodes": [{"id": "a"}, {"id": "b"}],
+                "edges": [{"from": "a", "to": "b"}],
+            },
+        )
+
+    def test_never_cuts_inside_a_node_or_edge(self):
+        text = '{"nodes":[{"id":"a"}],"edges":[{"from":"a","props":{"w":1},"to":"b'
+
+        # The open edges array is dropped with the unfinished edge
+        self.assertEqual(repair_json(text), {"nodes": [{"id": "a"}]})
+
+    def test_cuts_nested_arrays_at_the_outer_element(self):
+        text = '{"nodes": [{"id": "a", "tags": [{"k": 1}, {"k": 2}]}, {"id": "b", "tags": [{"k"'
+
+        self.assertEqual(
+            repair_json(text),
+            {"nodes": [{"id": "a", "tags": [{"k": 1}, {"k": 2}]}]},
+        )
+
+    def test_returns_none_without_a_complete_element(self):
+        self.assertIsNone(repair_json('{"nodes": [{"id": "a"'))
+        self.assertIsNone(repair_json("no json here"))
+
+
+class KGDataTest(unittest.TestCase):
+    def test_validate_drops_incomplete_nodes_and_edges(self):
+        kg = KGData(
+            {
+                "nodes": [{"id": "a"}, {"id": "b"}, {"label": "no id"}, "c"],
+                "edges": [
+                    {"from": "a", "to": "b"},
+                    {"from": "a"},
+                    {"from": "a", "to": "missing"},
+                    {"to": "b"},
+                    "a->b",
+                ],
+            }
+        ).validate()
+
+        self.assertEqual(kg.nodes, [{"id": "a"}, {"id": "b"}])
+        self.assertEqual(kg.edges, [{"from": "a", "to": "b"}])
+
+    def test_parse_knowledge_graph_repairs_truncated_output(self):
+        text = '{"nodes":[{"id":"a"},{"id":"b"}],"edges":[{"from":"a","props":{"w":1},"to":"b'
+
+        kg = parse_knowledge_graph(text)
+
+        self.assertEqual(kg.nodes, [{"id": "a"}, {"id": "b"}])
+        self.assertEqual(kg.edges, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""Tests of the batched snippet verdict parsing and its per-snippet fallback."""
+
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from pipeline.apollo.src.agents.article_generator import SnippetExaminer
+
+
+class ParseVerdictsTest(unittest.TestCase):
+    def test_parses_index_keyed_object(self):
+        verdicts = '{"1": "yes", "2": "No", "3": " YES "}'
+
+        self.assertEqual(SnippetExaminer.parse_verdicts(verdicts, 3), [True, False, True])
+
+    def test_parses_fenced_object_with_bracketed_keys(self):
+        verdicts = '```json\n{"[1]": "no", "[2]": "yes"}\n```'
+
+        self.assertEqual(SnippetExaminer.parse_verdicts(verdicts, 2), [False, True])
+
+    def test_parses_list_in_snippet_order(self):
+        self.assertEqual(
+            SnippetExaminer.parse_verdicts('["yes", "no"]', 2), [True, False]
+        )
+
+    def test_ignores_extra_indices(self):
+        verdicts = '{"1": "yes", "2": "no", "3": "yes"}'
+
+        self.assertEqual(SnippetExaminer.parse_verdicts(verdicts, 2), [True, False])
+
+    def test_rejects_missing_or_unclear_verdicts(self):
+        for verdicts in (
+            '{"1": "yes"}',
+            '{"1": "yes", "2": "maybe"}',
+            '{"1": "yes", "2": true}',
+            '"yes"',
+        ):
+            with self.subTest(verdicts=verdicts):
+                with self.assertRaises(ValueError):
+                    SnippetExaminer.parse_verdicts(verdicts, 2)
+
+    def test_rejects_invalid_json(self):
+        with self.assertRaises(ValueError):
+            SnippetExaminer.parse_verdicts("1: yes, 2: no", 2)
+
+
+class ExamineBatchTest(unittest.TestCase):
+    def setUp(self):
+        self.examiner = SnippetExaminer(lm=None, batch_size=3)
+        self.calls = []
+
+    def fake_apredict(self, batch_verdicts):
+        async def apredict(predictor, lm, **inputs):
+            if predictor is self.examiner.evaluate_snippets:
+                self.calls.append("batch")
+                return SimpleNamespace(verdicts=batch_verdicts)
+            self.calls.append(inputs["snippet"])
+            if inputs["snippet"] == "broken":
+                raise RuntimeError("LM failure")
+            return SimpleNamespace(answer="yes" if "relevant" in inputs["snippet"] else "no")
+
+        return mock.patch(
+            "pipeline.apollo.src.agents.article_generator.apredict", apredict
+        )
+
+    def test_uses_batched_verdicts(self):
+        snippets = ["relevant a", "other b", "relevant c"]
+
+        with self.fake_apredict('{"1": "no", "2": "yes", "3": "no"}'):
+            verdicts = self.examiner.examine_batch("topic", "query", snippets)
+
+        self.assertEqual(verdicts, [False, True, False])
+        self.assertEqual(self.calls, ["batch"])
+
+    def test_falls_back_to_single_snippets_on_unparsable_verdicts(self):
+        snippets = ["relevant a", "other b", "broken"]
+
+        with self.fake_apredict('{"1": "yes"}'):
+            verdicts = self.examiner.examine_batch("topic", "query", snippets)
+
+        # A failed single examination counts as irrelevant
+        self.assertEqual(verdicts, [True, False, False])
+        self.assertEqual(self.calls[0], "batch")
+        self.assertCountEqual(self.calls[1:], snippets)
+
+    def test_single_snippet_skips_the_batch_prompt(self):
+        with self.fake_apredict('{"1": "no"}'):
+            verdicts = self.examiner.examine_batch("topic", "query", ["relevant a"])
+
+        self.assertEqual(verdicts, [True])
+        self.assertEqual(self.calls, ["relevant a"])
+
+
+if __name__ == "__main__":
+    unittest.main()
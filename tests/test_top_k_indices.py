@@ -0,0 +1,64 @@
+"""Tests of the row-wise top-k selection used by the knowledge base retrieval."""
+
+import unittest
+
+import numpy as np
+
+from pipeline.apollo.src.core.information import top_k_indices
+
+
+def reference_top_k(similarities, k):
+    """Full stable sort: descending similarity, ties by lower index."""
+    return np.array(
+        [
+            np.lexsort((np.arange(len(row)), -row))[: min(k, len(row))]
+            for row in similarities
+        ]
+    ).reshape(len(similarities), -1)
+
+
+class TopKIndicesTest(unittest.TestCase):
+    def test_orders_by_descending_similarity(self):
+        similarities = np.array([[0.1, 0.9, 0.5, 0.7], [0.8, 0.2, 0.6, 0.4]])
+
+        np.testing.assert_array_equal(
+            top_k_indices(similarities, 3), [[1, 3, 2], [0, 2, 3]]
+        )
+
+    def test_breaks_ties_by_lower_index(self):
+        similarities = np.array([[0.5, 0.9, 0.5, 0.5, 0.9]])
+
+        np.testing.assert_array_equal(top_k_indices(similarities, 2), [[1, 4]])
+        np.testing.assert_array_equal(top_k_indices(similarities, 3), [[1, 4, 0]])
+
+    def test_ties_at_the_kth_value_left_out_of_the_partition(self):
+        # Every value ties, argpartition may pick any k of them
+        similarities = np.full((3, 50), 0.3)
+
+        np.testing.assert_array_equal(
+            top_k_indices(similarities, 4), np.tile(np.arange(4), (3, 1))
+        )
+
+    def test_matches_a_full_stable_sort(self):
+        rng = np.random.default_rng(0)
+        # Few distinct values, so most rows have ties around the k-th one
+        similarities = rng.integers(0, 5, size=(40, 30)).astype(float)
+
+        for k in (1, 5, 29, 30):
+            with self.subTest(k=k):
+                np.testing.assert_array_equal(
+                    top_k_indices(similarities, k), reference_top_k(similarities, k)
+                )
+
+    def test_k_larger_than_or_equal_to_the_columns(self):
+        similarities = np.array([[0.2, 0.8, 0.2]])
+
+        np.testing.assert_array_equal(top_k_indices(similarities, 10), [[1, 0, 2]])
+
+    def test_k_zero_or_no_columns(self):
+        self.assertEqual(top_k_indices(np.ones((2, 3)), 0).shape, (2, 0))
+        self.assertEqual(top_k_indices(np.ones((2, 0)), 3).shape, (2, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
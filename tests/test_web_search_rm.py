@@ -0,0 +1,224 @@
+"""Tests of the pooled web search client against a local stub HTTP server."""
+
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from pipeline.apollo.src.tools.rm import BraveRM, Retriever, WebSearchSession, YouRM
+
+
+class StubSearchServer:
+    """Local search API recording every request it serves.
+
+    Responses are scripted per query: a list of (status, headers) pairs served
+    in order before falling back to a 200 with one hit for the query.
+    """
+
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+        self.scripts = {}
+        self.requests = []
+        self.client_ports = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                stub.handle(self)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/search"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def script(self, query, responses):
+        self.scripts[query] = list(responses)
+
+    def handle(self, handler):
+        raw_query = urlsplit(handler.path).query
+        params = parse_qs(raw_query)
+        query = (params.get("q") or params.get("query") or [""])[0]
+
+        with self.lock:
+            self.requests.append(
+                {
+                    "raw_query": raw_query,
+                    "query": query,
+                    "headers": dict(handler.headers),
+                    "time": time.time(),
+                }
+            )
+            self.client_ports.add(handler.client_address[1])
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            scripted = self.scripts.get(query)
+            status, headers = scripted.pop(0) if scripted else (200, {})
+
+        try:
+            time.sleep(self.delays.get(query, 0))
+            url = f"https://example.com/{len(query)}"
+            body = json.dumps(
+                {
+                    "hits": [{"url": url, "query": query}],
+                    "web": {"results": [{"url": url, "title": query}]},
+                }
+            ).encode()
+            handler.send_response(status)
+            for name, value in headers.items():
+                handler.send_header(name, value)
+            handler.send_header("Content-Type", "application/json")
+            handler.send_header("Content-Length", str(len(body)))
+            handler.end_headers()
+            handler.wfile.write(body)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class WebSearchSessionTest(unittest.TestCase):
+    def setUp(self):
+        self.server = StubSearchServer()
+        self.http = WebSearchSession(
+            max_concurrency=2, max_retries=3, base_backoff=0.01, timeout=5.0
+        )
+
+    def tearDown(self):
+        self.http.close()
+        self.server.close()
+
+    def test_reuses_keep_alive_connection(self):
+        for i in range(5):
+            self.http.get_json(self.server.url, params={"q": f"query {i}"})
+
+        self.assertEqual(len(self.server.requests), 5)
+        self.assertEqual(len(self.server.client_ports), 1)
+
+    def test_retries_429_after_retry_after(self):
+        self.server.script("limited", [(429, {"Retry-After": "0.2"})])
+
+        start_time = time.time()
+        result = self.http.get_json(self.server.url, params={"q": "limited"})
+
+        self.assertEqual(result["hits"][0]["query"], "limited")
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertGreaterEqual(
+            self.server.requests[1]["time"] - self.server.requests[0]["time"], 0.2
+        )
+        self.assertGreaterEqual(time.time() - start_time, 0.2)
+
+    def test_retries_transient_errors_with_jittered_backoff(self):
+        self.server.script("flaky", [(503, {}), (502, {})])
+
+        result = self.http.get_json(self.server.url, params={"q": "flaky"})
+
+        self.assertEqual(result["hits"][0]["query"], "flaky")
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_gives_up_after_max_retries(self):
+        self.server.script("blocked", [(429, {"Retry-After": "0"})] * 10)
+
+        with self.assertRaises(Exception):
+            self.http.get_json(self.server.url, params={"q": "blocked"})
+        self.assertEqual(len(self.server.requests), self.http.max_retries + 1)
+
+    def test_backoff_delay_is_jittered_and_bounded(self):
+        http = WebSearchSession(base_backoff=1.0, max_backoff=4.0)
+
+        for attempt in range(5):
+            expected = min(4.0, 2**attempt)
+            delays = [http.backoff_delay(attempt) for _ in range(50)]
+            self.assertTrue(all(expected * 0.5 <= d <= expected for d in delays))
+            self.assertGreater(len(set(delays)), 1)
+
+    def test_records_latency_per_query(self):
+        self.server.delays = {"slow": 0.1}
+
+        self.http.get_json(self.server.url, params={"q": "fast"})
+        self.http.get_json(self.server.url, params={"q": "slow"})
+        stats = self.http.get_latency_stats_and_reset()
+
+        self.assertEqual(stats["count"], 2)
+        self.assertGreaterEqual(stats["max"], 0.1)
+        self.assertLessEqual(stats["p50"], stats["max"])
+        self.assertEqual(self.http.get_latency_stats_and_reset(), {"count": 0})
+
+
+class WebSearchRetrieverTest(unittest.TestCase):
+    def setUp(self):
+        self.server = StubSearchServer()
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_brave_url_encodes_query(self):
+        rm = BraveRM(brave_search_api_key="test-key", k=3)
+        rm.base_url = self.server.url
+        query = "C++ & Rust? 50%/#1"
+
+        results = rm.forward(query)
+
+        request = self.server.requests[0]
+        self.assertEqual(parse_qs(request["raw_query"])["q"], [query])
+        self.assertNotIn("&", request["raw_query"].split("q=", 1)[1])
+        self.assertNotIn("#", request["raw_query"])
+        self.assertEqual(request["headers"]["X-Subscription-Token"], "test-key")
+        self.assertEqual(results[0]["title"], query)
+
+    def test_you_fan_out_is_bounded_and_ordered(self):
+        queries = [f"query {i}" for i in range(8)]
+        # Earlier queries answer later, so completion order is reversed
+        self.server.delays = {q: 0.05 * (len(queries) - i) for i, q in enumerate(queries)}
+        rm = YouRM(ydc_api_key="test-key", k=1, max_concurrency=3)
+        rm.base_url = self.server.url
+
+        results = rm.forward(queries)
+
+        self.assertEqual([r["query"] for r in results], queries)
+        self.assertLessEqual(self.server.max_in_flight, 3)
+        self.assertGreater(self.server.max_in_flight, 1)
+        self.assertLessEqual(len(self.server.client_ports), 3)
+        self.assertEqual(rm.get_usage_and_reset(), {"YouRM": len(queries)})
+        self.assertEqual(rm.http.get_latency_stats_and_reset(), {"count": 0})
+
+    def test_retriever_fans_out_through_the_session(self):
+        queries = [f"query {i}" for i in range(8)]
+        self.server.delays = {q: 0.05 for q in queries}
+        rm = BraveRM(brave_search_api_key="test-key", k=1, max_concurrency=2)
+        rm.base_url = self.server.url
+        retriever = Retriever(rm, max_thread=8)
+
+        results = retriever.retrieve_per_query(queries)
+
+        self.assertEqual([r[0].title for r in results], queries)
+        self.assertEqual([r[0].meta["query"] for r in results], queries)
+        self.assertLessEqual(self.server.max_in_flight, 2)
+        self.assertLessEqual(len(self.server.client_ports), 2)
+
+    def test_failed_query_returns_no_results(self):
+        self.server.script("blocked", [(429, {"Retry-After": "0"})] * 10)
+        rm = BraveRM(brave_search_api_key="test-key", max_retries=1)
+        rm.base_url = self.server.url
+
+        results = rm.forward(["blocked", "open"])
+
+        self.assertEqual([r["title"] for r in results], ["open"])
+
+
+if __name__ == "__main__":
+    unittest.main()